@@ -0,0 +1,436 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 벤치마크용 로컬 가짜 검색 엔진과 이미지 서버 (benchmark.py에서 사용)
+#
+# 검색 서버는 CollectLinks가 찾는 것과 같은 jsname/class를 가진 결과 그리드를 제공합니다.
+#   /search?q=...&tbm=isch            google, google_full (무한 스크롤, "결과 더보기" 버튼, 끝 표시, 이미지 뷰어)
+#   /search.naver?query=...           naver, naver_full (화면에 들어온 썸네일만 로드하는 지연 로딩, 이미지 뷰어)
+#   /tiles?site=&q=&offset=           스크롤할 때 페이지가 불러가는 다음 썸네일 목록 (JSON)
+#   /p/c/image/search.naver?query=&start=&display=
+#                                     네이버 이미지 검색 JSON 응답 (--naver-backend http)
+#                                     구글 페이지는 불러온 결과의 원본 URL을 AF_initDataCallback 인라인 스크립트로도 넣습니다.
+# 이미지 서버는 응답 지연, 오류 비율, 파일 크기를 설정할 수 있는 JPEG를 제공합니다.
+#   /thumb/gstatic.com/<site>/<keyword>/<n>.jpg, /full/<site>/<keyword>/<n>.jpg
+# 구글 썸네일 경로에는 실제와 같이 gstatic.com이 들어 있어 google_full 수집에서 원본과 구분됩니다.
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+# 결과 그리드 한 번에 불러오는 썸네일 수
+PAGE_SIZE = 20
+
+# 구글 결과 페이지에서 "결과 더보기" 버튼을 눌러야 다음을 불러오는 간격
+MORE_EVERY = 100
+
+GOOGLE_PAGE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+#grid {{ display: flex; flex-wrap: wrap; margin-right: 420px; }}
+.isv-r {{ width: 240px; height: 200px; margin: 4px; cursor: pointer; }}
+.isv-r img {{ width: 240px; height: 180px; background: #ddd; }}
+#more, #end {{ display: none; margin: 20px; }}
+#viewer {{ position: fixed; top: 0; right: 0; width: 400px; height: 100%; background: #fff; display: none; }}
+#viewer img {{ max-width: 100%; }}
+</style></head>
+<body>
+<div id="grid"></div>
+<input type="button" id="more" class="mye4qd" value="결과 더보기">
+<div id="end" class="OuJzKb Yu2Dnd">더 이상 표시할 콘텐츠가 없습니다.</div>
+<div id="viewer" jsname="figiqf"><img id="full" alt=""></div>
+<script>var CONFIG = {config};</script>
+<script>{script}</script>
+</body></html>
+'''
+
+NAVER_PAGE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+#grid {{ display: flex; flex-wrap: wrap; margin-right: 420px; }}
+.tile_item {{ width: 240px; height: 200px; margin: 4px; cursor: pointer; }}
+.tile_item img {{ width: 240px; height: 180px; background: #ddd; }}
+#viewer {{ position: fixed; top: 0; right: 0; width: 400px; height: 100%; background: #fff; display: none; }}
+#viewer img {{ max-width: 100%; }}
+</style></head>
+<body>
+<div id="grid"></div>
+<div id="viewer"><img id="full" class="_fe_image_viewer_image_fallback_target" alt=""></div>
+<script>var CONFIG = {config};</script>
+<script>{script}</script>
+</body></html>
+'''
+
+# 두 사이트가 함께 쓰는 페이지 스크립트.
+# 아래쪽에 가까워지면 다음 썸네일을 불러오고, 썸네일을 누르면 뷰어를 열며, 오른쪽 화살표로 다음 이미지로 넘어갑니다.
+PAGE_SCRIPT = '''
+var PLACEHOLDER = 'data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEKAAEALAAAAAABAAEAAAICTAEAOw==';
+var grid = document.getElementById('grid');
+var more = document.getElementById('more');
+var end = document.getElementById('end');
+var viewer = document.getElementById('viewer');
+var full = document.getElementById('full');
+var items = [], tiles = [], loading = false, waitingMore = false, current = -1;
+
+function AF_initDataCallback(data) {}
+
+function addPageData(batch) {
+    // 구글은 불러온 결과의 [썸네일, 세로, 가로], [원본, 세로, 가로]를 인라인 스크립트 데이터로 함께 넣습니다.
+    var entries = batch.map(function (item, i) {
+        return [1, [0, 'r' + (items.length - batch.length + i), [item.thumb, 180, 240],
+                    [item.full, item.height, item.width], null, 0]];
+    });
+    var script = document.createElement('script');
+    script.textContent = 'AF_initDataCallback(' + JSON.stringify({key: 'ds:1', data: [null, entries]}) + ');';
+    document.body.appendChild(script);
+}
+
+function nearBottom() {
+    return window.innerHeight + window.pageYOffset >= document.body.scrollHeight - window.innerHeight;
+}
+
+function load(force) {
+    if (loading || items.length >= CONFIG.total || (waitingMore && !force)) {
+        return;
+    }
+    loading = true;
+    fetch('/tiles?site=' + CONFIG.site + '&q=' + encodeURIComponent(CONFIG.q) + '&offset=' + items.length)
+        .then(function (r) { return r.json(); })
+        .then(function (data) {
+            data.items.forEach(addTile);
+            if (CONFIG.site === 'google') {
+                addPageData(data.items);
+            }
+            loading = false;
+            afterLoad();
+        })
+        .catch(function () { loading = false; });
+}
+
+function afterLoad() {
+    if (items.length >= CONFIG.total) {
+        if (more) { more.style.display = 'none'; }
+        if (end) { end.style.display = 'block'; }
+        return;
+    }
+    if (more && CONFIG.moreEvery && items.length % CONFIG.moreEvery === 0) {
+        waitingMore = true;
+        more.style.display = 'inline-block';
+        return;
+    }
+    reveal();
+    if (nearBottom()) {
+        load(false);
+    }
+}
+
+function addTile(item) {
+    var index = items.length;
+    var tile = document.createElement('div');
+    var img = document.createElement('img');
+    if (CONFIG.site === 'google') {
+        var inner = document.createElement('div');
+        tile.setAttribute('jsname', 'dTDiAc');
+        tile.className = 'isv-r';
+        inner.setAttribute('jsname', 'qQjpJ');
+        img.src = item.thumb;
+        inner.appendChild(img);
+        tile.appendChild(inner);
+    } else {
+        // 네이버는 화면에 들어온 썸네일만 실제 주소로 바꿉니다.
+        tile.className = 'tile_item _fe_image_tab_content_tile';
+        img.className = '_fe_image_tab_content_thumbnail_image';
+        img.src = PLACEHOLDER;
+        tile.appendChild(img);
+    }
+    tile.addEventListener('click', function () { open(index); });
+    grid.appendChild(tile);
+    items.push(item);
+    tiles.push(img);
+}
+
+function reveal() {
+    if (CONFIG.site !== 'naver') {
+        return;
+    }
+    var bottom = window.innerHeight * 1.5;
+    for (var i = 0; i < tiles.length; i++) {
+        var img = tiles[i];
+        if (img.src.indexOf('data:') === 0 && img.getBoundingClientRect().top < bottom) {
+            img.src = items[i].thumb;
+        }
+    }
+}
+
+function open(index) {
+    current = index;
+    viewer.style.display = 'block';
+    tiles[index].scrollIntoView({block: 'center'});
+    reveal();
+    if (CONFIG.site === 'google' && CONFIG.viewerDelay > 0) {
+        // 구글 뷰어는 썸네일(gstatic)을 먼저 보여 주고 원본으로 바꿉니다.
+        full.src = items[index].thumb;
+        setTimeout(function () {
+            if (current === index) { full.src = items[index].full; }
+        }, CONFIG.viewerDelay);
+    } else {
+        full.src = items[index].full;
+    }
+    if (items.length - index <= CONFIG.pageSize) {
+        load(true);
+    }
+}
+
+if (more) {
+    more.addEventListener('click', function () {
+        waitingMore = false;
+        more.style.display = 'none';
+        load(true);
+    });
+}
+
+window.addEventListener('scroll', function () {
+    reveal();
+    if (nearBottom()) {
+        load(false);
+    }
+});
+
+document.addEventListener('keydown', function (e) {
+    if (e.key === 'ArrowRight' && current >= 0 && current + 1 < items.length) {
+        open(current + 1);
+    }
+});
+
+load(false);
+'''
+
+
+def fake_jpeg(size, width, height):
+    """
+    크기가 size 바이트이고 헤더(SOF0)에 width x height가 적힌 JPEG 바이트를 만듭니다.
+    이미지 데이터는 없지만 크롤러의 형식 판별과 크기 필터에는 충분합니다.
+    """
+    head = (b'\xff\xd8'
+            + b'\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+            + b'\xff\xc0\x00\x11\x08' + height.to_bytes(2, 'big') + width.to_bytes(2, 'big')
+            + b'\x03\x01\x22\x00\x02\x11\x01\x03\x11\x01')
+    tail = b'\xff\xd9'
+
+    # 남은 크기는 주석(COM) 세그먼트로 채웁니다. 세그먼트 하나는 최대 65533 바이트입니다.
+    body = []
+    remaining = max(0, size - len(head) - len(tail))
+    while remaining > 0:
+        n = min(65533, max(0, remaining - 4))
+        body.append(b'\xff\xfe' + (n + 2).to_bytes(2, 'big') + b'\x00' * n)
+        remaining -= n + 4
+    return head + b''.join(body) + tail
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class FakeSearchServer:
+    """가짜 검색 서버와 이미지 서버를 각각 별도 포트에서 실행합니다."""
+
+    def __init__(self, images_per_keyword=100, page_delay=0.05, latency=0.05, jitter=0.05, error_rate=0.0,
+                 slow_rate=0.0, slow_latency=3.0, min_size=20 * 1024, max_size=200 * 1024, width=800, height=600,
+                 viewer_delay=0.2, seed=0):
+        """
+        :param images_per_keyword: 사이트별 키워드 하나의 검색 결과 수
+        :param page_delay: 다음 썸네일 목록 응답 지연(초)
+        :param latency: 이미지 응답 지연(초)
+        :param jitter: 이미지 응답 지연에 더하는 지수 분포 지연의 평균(초)
+        :param error_rate: 503 (Retry-After 없음)으로 응답하는 비율
+        :param slow_rate: slow_latency만큼 늦게 응답하는 비율 (꼬리 지연)
+        :param min_size: 원본 이미지 최소 크기(바이트)
+        :param max_size: 원본 이미지 최대 크기(바이트)
+        :param width: 원본 이미지 헤더의 가로 (썸네일은 240x180)
+        :param height: 원본 이미지 헤더의 세로
+        :param viewer_delay: google_full 뷰어가 썸네일을 원본으로 바꾸기까지의 시간(초)
+        :param seed: 이미지 크기를 정하는 난수 시드
+        """
+        self.images_per_keyword = images_per_keyword
+        self.page_delay = page_delay
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.min_size = min_size
+        self.max_size = max(min_size, max_size)
+        self.width = width
+        self.height = height
+        self.viewer_delay = viewer_delay
+        self.seed = seed
+
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.counters = {'pages': 0, 'tiles': 0, 'images': 0, 'image_bytes': 0, 'errors': 0, 'slow': 0}
+
+        self.search = _Server(('127.0.0.1', 0), self._handler(self._serve_search))
+        self.images = _Server(('127.0.0.1', 0), self._handler(self._serve_image))
+        self.threads = []
+
+    @staticmethod
+    def _handler(serve):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def search_base(self):
+        return 'http://127.0.0.1:{}'.format(self.search.server_address[1])
+
+    @property
+    def image_base(self):
+        return 'http://127.0.0.1:{}'.format(self.images.server_address[1])
+
+    def start(self):
+        for server in (self.search, self.images):
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def close(self):
+        for server in (self.search, self.images):
+            server.shutdown()
+            server.server_close()
+
+    def search_urls(self):
+        """CollectLinks(search_urls=...)에 넘길 사이트별 검색 URL"""
+        google = self.search_base + '/search?q={}&tbm=isch{}'
+        naver = self.search_base + '/search.naver?where=image&query={}{}'
+        return {'google': google, 'google_full': google, 'naver': naver, 'naver_full': naver,
+                'naver_api': self.search_base + '/p/c/image/search.naver'}
+
+    def image_url(self, site, keyword, index, thumb=False):
+        if thumb:
+            return '{}/thumb/gstatic.com/{}/{}/{}.jpg'.format(self.image_base, site, quote(keyword, safe=''), index)
+        return '{}/full/{}/{}/{}.jpg'.format(self.image_base, site, quote(keyword, safe=''), index)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def _count(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    @staticmethod
+    def _send(handler, status, body=b'', content_type='text/plain; charset=utf-8'):
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _serve_search(self, handler):
+        url = urlsplit(handler.path)
+        query = parse_qs(url.query)
+
+        if url.path == '/tiles':
+            site = query.get('site', ['google'])[0]
+            keyword = query.get('q', [''])[0]
+            offset = int(query.get('offset', ['0'])[0])
+            time.sleep(self.page_delay)
+            items = [{'thumb': self.image_url(site, keyword, i, thumb=True), 'full': self.image_url(site, keyword, i),
+                      'width': self.width, 'height': self.height}
+                     for i in range(offset, min(offset + PAGE_SIZE, self.images_per_keyword))]
+            self._count('tiles', len(items))
+            body = json.dumps({'items': items}).encode('utf-8')
+            self._send(handler, 200, body, 'application/json')
+            return
+
+        if url.path == '/p/c/image/search.naver':
+            keyword = query.get('query', [''])[0]
+            start = max(1, int(query.get('start', ['1'])[0]))
+            display = int(query.get('display', [str(PAGE_SIZE)])[0])
+            time.sleep(self.page_delay)
+            items = [{'thumb': self.image_url('naver', keyword, i, thumb=True),
+                      'originalUrl': self.image_url('naver', keyword, i),
+                      'orgWidth': str(self.width), 'orgHeight': str(self.height)}
+                     for i in range(start - 1, min(start - 1 + display, self.images_per_keyword))]
+            self._count('tiles', len(items))
+            body = json.dumps({'items': items}).encode('utf-8')
+            self._send(handler, 200, body, 'application/json')
+            return
+
+        if url.path == '/search':
+            site, page, keyword = 'google', GOOGLE_PAGE, query.get('q', [''])[0]
+        elif url.path == '/search.naver':
+            site, page, keyword = 'naver', NAVER_PAGE, query.get('query', [''])[0]
+        else:
+            self._send(handler, 404)
+            return
+
+        config = {'site': site, 'q': keyword, 'total': self.images_per_keyword, 'pageSize': PAGE_SIZE,
+                  'moreEvery': MORE_EVERY if site == 'google' else 0,
+                  'viewerDelay': int(self.viewer_delay * 1000)}
+        # </script>가 키워드에 들어 있어도 스크립트가 끊기지 않도록 '<'를 이스케이프합니다.
+        config_json = json.dumps(config, ensure_ascii=False).replace('<', '\\u003c')
+        title = keyword.replace('&', '&amp;').replace('<', '&lt;')
+        body = page.format(title=title, config=config_json, script=PAGE_SCRIPT).encode('utf-8')
+        self._count('pages')
+        self._send(handler, 200, body, 'text/html; charset=utf-8')
+
+    def _serve_image(self, handler):
+        parts = [unquote(part) for part in urlsplit(handler.path).path.strip('/').split('/')]
+        thumb = parts[0] == 'thumb'
+        if thumb:
+            parts = parts[1:]
+        if len(parts) != 4 or parts[0] not in ('full', 'gstatic.com'):
+            self._send(handler, 404)
+            return
+        site, keyword, name = parts[1:]
+
+        with self.lock:
+            slow = self.random.random() < self.slow_rate
+            error = self.random.random() < self.error_rate
+            delay = self.latency + (self.random.expovariate(1 / self.jitter) if self.jitter > 0 else 0)
+        if slow:
+            delay += self.slow_latency
+            self._count('slow')
+        time.sleep(delay)
+
+        if error:
+            self._count('errors')
+            self._send(handler, 503)
+            return
+
+        # 같은 이미지는 항상 같은 크기로 응답합니다.
+        rng = random.Random('{}:{}:{}:{}'.format(self.seed, site, keyword, name))
+        if thumb:
+            body = fake_jpeg(rng.randint(4 * 1024, 12 * 1024), 240, 180)
+        else:
+            body = fake_jpeg(rng.randint(self.min_size, self.max_size), self.width, self.height)
+        self._count('images')
+        self._count('image_bytes', len(body))
+        self._send(handler, 200, body, 'image/jpeg')
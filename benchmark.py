@@ -0,0 +1,273 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 로컬 가짜 검색 엔진과 이미지 서버(bench_server.py)로 AutoCrawler 전체를 실행하여
+# 처리량(키워드/분, 이미지/초, 바이트/초)과 단계별 p50/p99 지연 시간을 측정합니다.
+# 실제 Google/Naver에 접속하지 않으므로 커밋 사이의 성능을 같은 조건에서 비교할 수 있습니다.
+#
+#   python3 benchmark.py --keywords 4 --images 200 --json before.json
+#   python3 benchmark.py --keywords 4 --images 200 --compare before.json
+#   python3 benchmark.py --stage download --set n_io_threads=0     (Chrome 없이 다운로드 단계만)
+#   python3 benchmark.py --sites naver --set naver_backend="'http'"   (Chrome 없이 네이버 HTTP 수집)
+#
+# 단계별 지연 시간은 --profile 트레이스(trace_profile.py)의 구간에서 계산합니다.
+
+import argparse
+import ast
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from bench_server import FakeSearchServer
+from crawl_state import get_crawl_state
+from link_files import LinkFileWriter
+from main import AutoCrawler
+
+# 처리량 지표: 클수록 좋습니다.
+THROUGHPUT_KEYS = ('keywords_per_min', 'images_per_sec', 'bytes_per_sec')
+
+
+class BenchCrawler(AutoCrawler):
+    def imbalance_check(self):
+        # 입력을 기다리지 않도록 데이터 불균형 확인은 건너뜁니다.
+        print('벤치마크: 데이터 불균형 확인 생략')
+
+
+def percentile(ordered, p):
+    """정렬된 목록의 p 백분위 값"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def stage_latencies(trace_path):
+    """
+    트레이스의 구간 이름별 실행 시간 통계를 계산합니다.
+    :return: {구간 이름: {'count', 'p50', 'p99', 'total'}} (초)
+    """
+    with open(trace_path, encoding='utf-8') as f:
+        events = json.load(f)['traceEvents']
+
+    durations = {}
+    for event in events:
+        if event.get('ph') == 'X':
+            durations.setdefault(event['name'], []).append(event['dur'] / 1000000)
+
+    stages = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        stages[name] = {'count': len(values), 'p50': round(percentile(values, 50), 4),
+                        'p99': round(percentile(values, 99), 4), 'total': round(sum(values), 3)}
+    return stages
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def parse_overrides(values):
+    """--set key=value 목록을 AutoCrawler 인자 딕셔너리로 바꿉니다. 값은 파이썬 리터럴로 해석합니다."""
+    overrides = {}
+    for item in values:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f'--set 값은 key=value 형식이어야 합니다: {item}')
+        try:
+            overrides[key.strip()] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[key.strip()] = value
+    return overrides
+
+
+def write_link_files(server, links_path, keywords, sites, count):
+    """다운로드 단계만 측정할 때 가짜 이미지 서버를 가리키는 링크 목록 파일을 만듭니다."""
+    for keyword in keywords:
+        for site in sites:
+            writer = LinkFileWriter(links_path, keyword, site)
+            for i in range(count):
+                writer.write(server.image_url(site, keyword, i))
+            writer.close(complete=True)
+
+
+def run_benchmark(args):
+    """가짜 서버를 실행하고 그 위에서 AutoCrawler를 한 번 실행합니다. :return: 결과 딕셔너리"""
+    sites = [site.strip() for site in args.sites.split(',') if site.strip()]
+    keywords = ['{}{:03d}'.format(args.keyword_prefix, i) for i in range(args.keywords)]
+
+    work_dir = args.workdir or tempfile.mkdtemp(prefix='autocrawler-bench-')
+    os.makedirs(work_dir, exist_ok=True)
+    for name in ('download', 'links', 'trace.json'):
+        path = os.path.join(work_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    server = FakeSearchServer(images_per_keyword=args.images, page_delay=args.page_delay, latency=args.latency,
+                              jitter=args.jitter, error_rate=args.error_rate, slow_rate=args.slow_rate,
+                              slow_latency=args.slow_latency, min_size=args.min_size, max_size=args.max_size,
+                              viewer_delay=args.viewer_delay, seed=args.seed).start()
+    print(f'가짜 검색 서버: {server.search_base}, 가짜 이미지 서버: {server.image_base}')
+
+    options = {
+        'n_threads': args.threads,
+        'do_google': 'google' in sites,
+        'do_naver': 'naver' in sites,
+        'download_path': 'download',
+        'links_path': 'links',
+        'full_resolution': args.full,
+        'no_gui': True,
+        'limit': args.limit,
+        'profile': 'trace.json',
+        'search_urls': server.search_urls(),
+        'mode': 'download' if args.stage == 'download' else 'all',
+    }
+    options.update(parse_overrides(args.set))
+
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        with open('keywords.txt', 'w', encoding='utf-8') as f:
+            f.write(''.join(keyword + '\n' for keyword in keywords))
+        if args.stage == 'download':
+            write_link_files(server, options['links_path'], keywords, sites, args.images)
+
+        crawler = BenchCrawler(**options)
+        started = time.time()
+        crawler.do_crawling()
+        elapsed = time.time() - started
+
+        rows = get_crawl_state(crawler.state_path).counts()
+        stages = stage_latencies(options['profile']) if os.path.exists(options['profile']) else {}
+    finally:
+        os.chdir(cwd)
+        server.close()
+
+    images = sum(row[2] for row in rows)
+    n_bytes = sum(row[3] for row in rows)
+    done_keywords = len({row[0] for row in rows if row[2] > 0})
+
+    result = {
+        'revision': git_revision(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('json', 'compare', 'keep')},
+        'elapsed_seconds': round(elapsed, 3),
+        'keywords': done_keywords,
+        'images': images,
+        'bytes': n_bytes,
+        'keywords_per_min': round(done_keywords / elapsed * 60, 3) if elapsed else 0,
+        'images_per_sec': round(images / elapsed, 3) if elapsed else 0,
+        'bytes_per_sec': round(n_bytes / elapsed, 1) if elapsed else 0,
+        'stages': stages,
+        'server': server.stats(),
+    }
+
+    if args.keep or args.workdir:
+        print(f'작업 디렉토리: {work_dir}')
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def _change(before, after):
+    if not before:
+        return ''
+    return ' ({:+.1f}%)'.format((after - before) / before * 100)
+
+
+def print_report(result, baseline=None):
+    print('=== 벤치마크 결과 ===')
+    if baseline is not None:
+        print(f"비교 대상: {baseline.get('revision')} -> {result.get('revision')}")
+    print(f"경과 시간: {result['elapsed_seconds']:.1f}초, 키워드 {result['keywords']}, "
+          f"이미지 {result['images']}, {result['bytes'] / (1024 * 1024):.1f}MB")
+
+    for key in THROUGHPUT_KEYS:
+        value = result[key]
+        text = f'{value:,.2f}'
+        if baseline is not None and key in baseline:
+            text = f"{baseline[key]:,.2f} -> {text}{_change(baseline[key], value)}"
+        print(f'{key:>18}: {text}')
+
+    print('--- 단계별 지연 시간 (초) ---')
+    print('{:<24}{:>8}{:>12}{:>12}{:>12}'.format('구간', '횟수', 'p50', 'p99', '합계'))
+    base_stages = baseline.get('stages', {}) if baseline is not None else {}
+    for name, stage in result['stages'].items():
+        line = '{:<24}{:>8}{:>12.4f}{:>12.4f}{:>12.2f}'.format(name, stage['count'], stage['p50'], stage['p99'],
+                                                             stage['total'])
+        base = base_stages.get(name)
+        if base:
+            line += '   p50{} p99{}'.format(_change(base['p50'], stage['p50']) or ' -',
+                                           _change(base['p99'], stage['p99']) or ' -')
+        print(line)
+    print(f"가짜 서버: {result['server']}")
+    print('====================')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 가짜 검색 엔진과 이미지 서버로 AutoCrawler 성능을 측정합니다.')
+    parser.add_argument('--keywords', type=int, default=4, help='키워드 수')
+    parser.add_argument('--keyword-prefix', type=str, default='bench', help='키워드 이름 앞부분')
+    parser.add_argument('--images', type=int, default=100, help='사이트별 키워드 하나의 검색 결과 수')
+    parser.add_argument('--sites', type=str, default='google,naver', help='google, naver 중 쉼표로 구분')
+    parser.add_argument('--full', action='store_true', help='google_full, naver_full 수집 (이미지 뷰어)')
+    parser.add_argument('--stage', type=str, default='all', choices=['all', 'download'],
+                        help='all: 브라우저 수집과 다운로드, download: 링크 목록 파일로 다운로드만 (Chrome 불필요)')
+    parser.add_argument('--threads', type=int, default=2, help='브라우저 워커 수')
+    parser.add_argument('--limit', type=int, default=0, help='작업당 최대 이미지 수 (0: 무제한)')
+    parser.add_argument('--page-delay', type=float, default=0.05, help='다음 썸네일 목록 응답 지연(초)')
+    parser.add_argument('--latency', type=float, default=0.05, help='이미지 응답 지연(초)')
+    parser.add_argument('--jitter', type=float, default=0.05, help='이미지 응답에 더하는 지수 분포 지연의 평균(초)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503으로 응답하는 비율')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='--slow-latency만큼 늦게 응답하는 비율')
+    parser.add_argument('--slow-latency', type=float, default=3.0, help='느린 응답의 추가 지연(초)')
+    parser.add_argument('--min-size', type=int, default=20 * 1024, help='원본 이미지 최소 크기(바이트)')
+    parser.add_argument('--max-size', type=int, default=200 * 1024, help='원본 이미지 최대 크기(바이트)')
+    parser.add_argument('--viewer-delay', type=float, default=0.2,
+                        help='google_full 뷰어가 썸네일을 원본으로 바꾸기까지의 시간(초)')
+    parser.add_argument('--seed', type=int, default=0, help='가짜 서버 난수 시드')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='AutoCrawler 인자를 바꿉니다. 여러 번 쓸 수 있습니다. 예: --set n_io_threads=0 --set hedge=True')
+    parser.add_argument('--workdir', type=str, default='', help='작업 디렉토리 (기본값: 임시 디렉토리, 끝나면 삭제)')
+    parser.add_argument('--keep', action='store_true', help='임시 작업 디렉토리를 지우지 않습니다.')
+    parser.add_argument('--json', type=str, default='', help='결과를 JSON 파일로 저장합니다.')
+    parser.add_argument('--compare', type=str, default='', help='이전 결과 JSON 파일과 비교합니다.')
+    args = parser.parse_args()
+
+    if args.workdir:
+        args.workdir = os.path.abspath(args.workdir)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    result = run_benchmark(args)
+    print_report(result, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f'결과 저장: {args.json}')
+
+
+if __name__ == '__main__':
+    main()
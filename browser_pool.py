@@ -0,0 +1,109 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import random
+import threading
+from multiprocessing import util
+from collect_links import CollectLinks
+
+
+class BrowserPool:
+    """
+    워커 프로세스 안에서 실행 중인 Chrome 브라우저를 보관하고 (키워드, 사이트) 작업마다 재사용합니다.
+    작업이 끝나면 브라우저 상태를 초기화하고, 브라우저가 죽은 경우에만 새로 실행합니다.
+    """
+
+    def __init__(self, max_browsers=1):
+        """
+        :param max_browsers: 프로세스당 유지할 최대 브라우저 수
+        """
+        self.max_browsers = max(1, max_browsers)
+        self.idle = []  # 사용 가능한 CollectLinks 목록
+        self.n_busy = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, no_gui=False, proxy_list=None, **kwargs):
+        """
+        사용 가능한 브라우저를 반환합니다. 없으면 새로 실행합니다.
+        프록시는 작업마다 proxy_list에서 무작위로 하나 선택합니다. 보관 중인 브라우저의 프록시가
+        선택된 프록시와 다르면 그 브라우저를 종료하고 선택된 프록시로 새로 실행합니다.
+        나머지 인자(driver_path, diagnostics 등)는 CollectLinks에 그대로 전달됩니다.
+        """
+        proxy = None
+        if proxy_list:
+            proxy = random.choice(proxy_list)
+            print(f"선택된 프록시: {proxy}")
+
+        with self.lock:
+            while self.idle:
+                collect = self.idle.pop()
+                if collect.no_gui == no_gui and collect.proxy == proxy and collect.is_alive():
+                    self.n_busy += 1
+                    print('실행 중인 브라우저 재사용')
+                    return collect
+                print('사용할 수 없는 브라우저 종료')
+                collect.quit()
+
+            self.n_busy += 1
+
+        try:
+            return CollectLinks(no_gui=no_gui, proxy=proxy, keep_alive=True, **kwargs)
+        except Exception:
+            with self.lock:
+                self.n_busy -= 1
+            raise
+
+    def release(self, collect):
+        """작업이 끝난 브라우저를 초기화하여 풀에 돌려놓습니다. 죽은 브라우저는 종료합니다."""
+        with self.lock:
+            self.n_busy -= 1
+
+            if collect.browser is None:
+                return
+
+            if not collect.reset():
+                print('브라우저 초기화 실패. 다음 작업에서 새로 실행합니다.')
+                collect.quit()
+                return
+
+            if len(self.idle) + self.n_busy >= self.max_browsers:
+                collect.quit()
+                return
+
+            self.idle.append(collect)
+
+    def close_all(self):
+        """보관 중인 모든 브라우저를 종료합니다."""
+        with self.lock:
+            while self.idle:
+                self.idle.pop().quit()
+
+
+_pool = None
+_pool_pid = None
+
+
+def get_browser_pool(max_browsers=1):
+    """현재 프로세스의 브라우저 풀을 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _pool, _pool_pid
+
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = BrowserPool(max_browsers=max_browsers)
+        _pool_pid = os.getpid()
+        # 워커 프로세스가 정상 종료될 때 (pool.close(), pool.join()) 브라우저도 종료합니다.
+        util.Finalize(_pool, _pool.close_all, exitpriority=10)
+    return _pool
@@ -21,34 +21,403 @@ import os
 import sys
 import platform
 import subprocess
+import json
+import base64
+from metrics import timer
+from trace_profile import span
+from google_page_data import parse_google_images
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import ElementNotVisibleException, StaleElementReferenceException
+from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 
 
-class CollectLinks:
-    def __init__(self, no_gui=False, proxy=None):
-        # 디버깅 정보 출력
-        print("=== 디버깅 정보 ===")
-        print(f"Python 버전: {sys.version}")
-        print(f"운영체제: {platform.system()} {platform.release()}")
-        print(f"아키텍처: {platform.machine()}")
-        print(f"현재 작업 디렉토리: {os.getcwd()}")
-
-        # Chrome 브라우저 버전 확인 시도
+# ChromeDriver 탐색 결과를 Chrome 버전별로 저장해 두는 파일
+DRIVER_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.autocrawler', 'chromedriver_cache.json')
+
+# 현재 프로세스에서 이미 찾은 ChromeDriver 경로
+_resolved_driver_path = None
+
+# xpath에 해당하는 요소 중 arguments[1]번째 이후 요소의 src, data-src, 크기를 한 번에 반환하는 스크립트.
+# 현재 페이지에서 이미 반환한 src는 window.__autocrawlerSeen에 기록해 두고 다시 반환하지 않습니다.
+# arguments[2]가 true이면 아직 로드되지 않은(src가 없거나 data URL인) 요소에서 멈추고,
+# 그 위치를 total로 돌려주어 다음 호출에서 다시 확인합니다.
+EXTRACT_SRCS_JS = '''
+var xpath = arguments[0], offset = arguments[1], waitLazy = arguments[2];
+var snapshot = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var seen = window.__autocrawlerSeen = window.__autocrawlerSeen || new Set();
+var items = [];
+
+for (var i = offset; i < snapshot.snapshotLength; i++) {
+    var el = snapshot.snapshotItem(i);
+    var src = el.src || el.getAttribute('src');
+    if ((!src || src.indexOf('data:') === 0) && el.getAttribute('data-src')) {
+        src = el.getAttribute('data-src');
+    }
+    if (waitLazy && (!src || src.indexOf('data:') === 0)) {
+        return {total: i, items: items};
+    }
+    if (!src || seen.has(src)) {
+        continue;
+    }
+    seen.add(src);
+    items.push({
+        src: src,
+        data_src: el.getAttribute('data-src'),
+        width: el.naturalWidth || el.width || 0,
+        height: el.naturalHeight || el.height || 0
+    });
+}
+return {total: snapshot.snapshotLength, items: items};
+'''
+
+# 페이지 안에서 스크롤하며 결과 그리드가 더 이상 늘어나지 않을 때까지 기다리는 비동기 스크립트.
+# arguments: 이미지 xpath, "더보기" 버튼 xpath 목록, 끝 표시 xpath 목록, 정지 판단 시간(ms),
+#            이번 호출의 최대 실행 시간(ms), 이전 호출에서의 이미지 수, 이전 호출에서 늘어나지 않은 시간(ms),
+#            이전 호출에서의 스크롤 위치
+# 결과: {count: 이미지 수, idle: 늘어나지 않은 시간(ms), y: 스크롤 위치, done: 스크롤 종료 여부}
+SCROLL_UNTIL_IDLE_JS = '''
+var xpath = arguments[0], moreXpaths = arguments[1], endXpaths = arguments[2];
+var quietMs = arguments[3], maxMs = arguments[4], lastCount = arguments[5], idleMs = arguments[6];
+var lastY = arguments[7];
+var callback = arguments[arguments.length - 1];
+
+function count() {
+    return document.evaluate('count(' + xpath + ')', document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+}
+function visible(xp) {
+    var el = document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return el && el.offsetParent !== null ? el : null;
+}
+
+var start = Date.now();
+var lastGrow = start - idleMs;
+
+function step() {
+    var ended = endXpaths.some(function (xp) { return visible(xp) !== null; });
+    if (!ended) {
+        moreXpaths.forEach(function (xp) {
+            var el = visible(xp);
+            if (el) { el.click(); }
+        });
+        // 한 화면씩 내려서 지연 로딩 이미지가 모두 화면을 지나가도록 합니다.
+        window.scrollBy(0, window.innerHeight);
+    }
+
+    // 이미지 수가 늘거나 아직 내려갈 곳이 남아 있으면 계속 진행합니다.
+    var n = count(), y = window.pageYOffset, now = Date.now();
+    if (n > lastCount || y !== lastY) {
+        lastCount = n;
+        lastY = y;
+        lastGrow = now;
+    }
+
+    if (ended || now - lastGrow >= quietMs) {
+        callback({count: lastCount, idle: now - lastGrow, y: lastY, done: true});
+    } else if (now - start >= maxMs) {
+        callback({count: lastCount, idle: now - lastGrow, y: lastY, done: false});
+    } else {
+        setTimeout(step, 100);
+    }
+}
+step();
+'''
+
+# 페이지의 모든 인라인 스크립트 텍스트. 스크롤하면서 추가된 스크립트도 포함됩니다. (google_page_data.py가 파싱)
+PAGE_SCRIPTS_JS = '''
+return Array.prototype.map.call(document.scripts, function (s) { return s.textContent; }).join('\\n');
+'''
+
+# 이미지 뷰어를 다음 이미지로 넘기고, 미리보기 이미지의 src가 새 원본 URL로 바뀔 때까지 기다리는 비동기 스크립트.
+# 폴링하지 않고 MutationObserver(src 변경, 요소 추가)와 load 이벤트로 확인하므로 이미지 하나에 브라우저 왕복 한 번이면 됩니다.
+# arguments: 뷰어 이미지 xpath 목록, 제외할 src 부분 문자열(썸네일 등), 오른쪽 화살표 키 이벤트를 보낼지 여부,
+#            최대 대기 시간(ms)
+# 결과: {src: 새 원본 URL 또는 null (시간 초과)}
+# 이미 반환한 src는 window.__autocrawlerViewerSeen에 기록해 두므로, 이전 이미지가 남아 있어도 다시 반환하지 않습니다.
+VIEWER_NEXT_JS = '''
+var xpaths = arguments[0], exclude = arguments[1], press = arguments[2], timeoutMs = arguments[3];
+var callback = arguments[arguments.length - 1];
+var seen = window.__autocrawlerViewerSeen = window.__autocrawlerViewerSeen || new Set();
+var observer = null, timer = null, finished = false;
+
+function candidate() {
+    // 앞의 xpath에 해당하는 이미지가 있으면 뒤의 xpath는 보지 않습니다.
+    for (var i = 0; i < xpaths.length; i++) {
+        var hidden = null;
+        var snapshot = document.evaluate(xpaths[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var j = 0; j < snapshot.snapshotLength; j++) {
+            var img = snapshot.snapshotItem(j);
+            var src = img.src || img.getAttribute('src');
+            if (!src || src.indexOf('data:') === 0 || (exclude && src.indexOf(exclude) !== -1) || seen.has(src)) {
+                continue;
+            }
+            // 뷰어가 이전, 다음 이미지를 숨겨 두는 경우가 있으므로 보이는 이미지를 먼저 고릅니다.
+            if (img.offsetParent !== null) {
+                return img;
+            }
+            hidden = hidden || img;
+        }
+        if (hidden) {
+            return hidden;
+        }
+    }
+    return null;
+}
+
+function finish(img) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) { observer.disconnect(); }
+    if (timer) { clearTimeout(timer); }
+    document.removeEventListener('load', check, true);
+    if (!img) {
+        callback({src: null});
+        return;
+    }
+    var src = img.src || img.getAttribute('src');
+    seen.add(src);
+    img.setAttribute('style', 'background: yellow; border: 2px solid red;');
+    callback({src: src});
+}
+
+function check() {
+    var img = candidate();
+    if (img) { finish(img); }
+}
+
+if (press) {
+    var target = document.activeElement || document.body;
+    ['keydown', 'keyup'].forEach(function (type) {
+        target.dispatchEvent(new KeyboardEvent(type, {key: 'ArrowRight', code: 'ArrowRight', bubbles: true}));
+    });
+}
+
+check();
+if (!finished) {
+    observer = new MutationObserver(check);
+    observer.observe(document.documentElement, {subtree: true, childList: true, attributes: true,
+                                                attributeFilter: ['src']});
+    document.addEventListener('load', check, true);
+    timer = setTimeout(function () { finish(null); }, timeoutMs);
+}
+'''
+
+
+def get_chrome_version():
+    """설치된 Chrome 버전 문자열을 반환합니다. (예: 'Google Chrome 135.0.7049.95') 찾지 못하면 'unknown'"""
+    if platform.system() == 'Darwin':  # macOS
+        candidates = [['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome', '--version']]
+    else:
+        candidates = [['google-chrome', '--version'], ['chromium', '--version'], ['chromium-browser', '--version']]
+
+    for cmd in candidates:
+        try:
+            return subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode('utf-8').strip()
+        except Exception:
+            continue
+
+    print("Chrome 버전 확인 실패")
+    return "unknown"
+
+
+def find_chromedriver(chrome_version):
+    """가능한 경로들을 탐색하여 ChromeDriver 경로를 찾습니다. 찾지 못하면 None"""
+    # 가능한 경로들 리스트
+    possible_paths = [
+        '/opt/homebrew/bin/chromedriver',  # Homebrew 설치 경로
+        './chromedriver',  # 현재 디렉토리
+        '/usr/local/bin/chromedriver',  # 일반적인 설치 경로
+        '/usr/bin/chromedriver',
+        os.path.expanduser('~/.wdm/drivers/chromedriver/mac64/latest/chromedriver'),  # WebDriver Manager 최신 버전
+    ]
+
+    # Chrome 버전 기반으로 특정 WebDriver Manager 경로 추가
+    if 'Chrome' in chrome_version or 'Chromium' in chrome_version:
+        chrome_ver = chrome_version.split(' ')[-1].split('.')[0]  # 메이저 버전만 추출 (예: 135)
+        wdm_path = os.path.expanduser(f'~/.wdm/drivers/chromedriver/mac64/{chrome_ver}')
+
+        # 디렉토리가 존재하면 탐색
+        if os.path.exists(wdm_path):
+            for root, dirs, files in os.walk(wdm_path):
+                for file in files:
+                    if file == 'chromedriver':
+                        possible_paths.append(os.path.join(root, file))
+
+    # WebDriver Manager가 저장한 정확한 경로 추가
+    wdm_exact_path = "/Users/junhoha/.wdm/drivers/chromedriver/mac64/135.0.7049.95/chromedriver-mac-arm64/chromedriver"
+    possible_paths.append(wdm_exact_path)
+
+    # 첫 번째 유효한 경로 사용
+    for path in possible_paths:
+        if os.path.exists(path):
+            print(f"유효한 ChromeDriver 경로 발견: {path}")
+
+            # 실행 권한 확인 및 설정
+            if not os.access(path, os.X_OK):
+                print(f"ChromeDriver에 실행 권한 부여: {path}")
+                os.chmod(path, 0o755)
+
+            # 검역 속성 제거 시도 (Mac용)
+            if platform.system() == 'Darwin':
+                try:
+                    print(f"검역 속성 제거 시도: {path}")
+                    subprocess.run(['xattr', '-d', 'com.apple.quarantine', path],
+                                   check=False, stderr=subprocess.PIPE)
+                except Exception as e:
+                    print(f"검역 속성 제거 오류 (무시됨): {e}")
+
+            return os.path.abspath(path)
+
+    return None
+
+
+def resolve_chromedriver(use_cache=True):
+    """
+    ChromeDriver 경로를 반환합니다.
+    프로세스당 한 번만 탐색하며, 결과는 Chrome 버전별로 DRIVER_CACHE_PATH에 저장되어 다음 실행에서 재사용됩니다.
+    """
+    global _resolved_driver_path
+
+    if _resolved_driver_path and os.path.exists(_resolved_driver_path):
+        return _resolved_driver_path
+
+    chrome_version = get_chrome_version()
+
+    cache = {}
+    if use_cache:
         try:
-            if platform.system() == 'Darwin':  # macOS
-                chrome_version_cmd = ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome', '--version']
-                chrome_version = subprocess.check_output(chrome_version_cmd).decode('utf-8').strip()
-                print(f"설치된 Chrome 버전: {chrome_version}")
+            with open(DRIVER_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+        cached_path = cache.get(chrome_version)
+        if cached_path and os.path.exists(cached_path) and os.access(cached_path, os.X_OK):
+            _resolved_driver_path = cached_path
+            return cached_path
+
+    path = find_chromedriver(chrome_version)
+    if path is None:
+        return None
+
+    _resolved_driver_path = path
+    if use_cache:
+        try:
+            cache[chrome_version] = path
+            os.makedirs(os.path.dirname(DRIVER_CACHE_PATH), exist_ok=True)
+            with open(DRIVER_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            print(f"ChromeDriver 캐시 저장 실패 (무시됨): {e}")
+
+    return path
+
+
+def print_driver_diagnostics(path):
+    """ChromeDriver 파일 정보와 서명 상태를 출력합니다."""
+    print("=== 디버깅 정보 ===")
+    print(f"Python 버전: {sys.version}")
+    print(f"운영체제: {platform.system()} {platform.release()}")
+    print(f"아키텍처: {platform.machine()}")
+    print(f"현재 작업 디렉토리: {os.getcwd()}")
+    print(f"설치된 Chrome 버전: {get_chrome_version()}")
+    print(f"ChromeDriver 경로: {path}")
+
+    # 파일 상태 확인
+    try:
+        file_info = subprocess.run(['file', path], capture_output=True, text=True)
+        print(f"ChromeDriver 파일 정보: {file_info.stdout.strip()}")
+    except Exception as e:
+        print(f"파일 정보 확인 오류: {e}")
+
+    # 서명 확인 (Mac용)
+    if platform.system() == 'Darwin':
+        try:
+            codesign = subprocess.run(['codesign', '-v', path],
+                                      capture_output=True, text=True)
+            print(f"CodeSign 상태: {codesign.stderr if codesign.stderr else '정상'}")
         except Exception as e:
-            print(f"Chrome 버전 확인 실패: {e}")
-            chrome_version = "unknown"
+            print(f"CodeSign 확인 오류: {e}")
+
+
+class CapturedLink(str):
+    """
+    브라우저가 페이지를 그리면서 이미 받은 이미지 바이트(body)를 함께 가진 링크.
+    일반 문자열처럼 URL로 쓸 수 있고, 다운로더는 body가 있으면 다시 받지 않고 바로 저장합니다.
+    """
+
+    def __new__(cls, url, body):
+        link = super().__new__(cls, url)
+        link.body = body
+        return link
+
+    def __reduce__(self):
+        # 브라우저 워커에서 다운로드 프로세스로 보낼 때 body도 함께 전달합니다.
+        return CapturedLink, (str(self), self.body)
+
+
+class CollectLinks:
+    # 사이트별 검색 결과 페이지 URL. {0}: 키워드, {1}: 추가 파라미터 (얼굴 검색 등)
+    SEARCH_URLS = {
+        'google': 'https://www.google.com/search?q={}&source=lnms&tbm=isch{}',
+        'naver': 'https://search.naver.com/search.naver?where=image&sm=tab_jum&query={}{}',
+        'google_full': 'https://www.google.com/search?q={}&tbm=isch{}',
+        'naver_full': 'https://search.naver.com/search.naver?where=image&sm=tab_jum&query={}{}',
+    }
+
+    # 구글 결과 페이지의 "결과 더보기" 버튼과 "끝에 도달했습니다" 표시
+    GOOGLE_MORE_XPATHS = ['//input[@type="button" and contains(@class, "mye4qd")]']
+    GOOGLE_END_XPATHS = ['//div[contains(@class, "OuJzKb") and contains(@class, "Yu2Dnd")]']
+
+    # 스크롤 스크립트 한 번의 최대 실행 시간. 호출 사이에 새로 로드된 링크를 다운로더에 넘깁니다.
+    SCROLL_ROUND_SECONDS = 2
+    # 키워드 하나를 스크롤하는 최대 시간
+    SCROLL_MAX_SECONDS = 300
+    # 전체 해상도 모드에서 뷰어가 다음 이미지로 바뀌기를 기다리는 최대 시간.
+    # 연속 VIEWER_MAX_MISSES번 바뀌지 않으면 마지막 이미지로 봅니다.
+    VIEWER_WAIT_SECONDS = 5
+    VIEWER_MAX_MISSES = 2
+
+    # 전체 해상도 모드의 뷰어 원본 이미지
+    GOOGLE_VIEWER_XPATHS = [
+        '//div[@jsname="figiqf"]//img',
+        '//div[contains(@jsname, "figiqf")]//img',
+        '//div[contains(@class, "isv-r")]//img',
+    ]
+    NAVER_VIEWER_XPATHS = [
+        '//img[@class="_fe_image_viewer_image_fallback_target"]',
+        '//img[contains(@class, "_fe_image_viewer_image")]',
+        '//img[contains(@class, "image__image")]',
+    ]
+
+    def __init__(self, no_gui=False, proxy=None, keep_alive=False, driver_path=None, diagnostics=False,
+                 scroll_quiet=3.0, capture=False, search_urls=None):
+        """
+        :param no_gui: 헤드리스 모드
+        :param proxy: 브라우저에 사용할 프록시
+        :param keep_alive: True이면 수집이 끝나도 브라우저를 닫지 않습니다. (BrowserPool에서 재사용)
+        :param driver_path: ChromeDriver 경로. None이면 resolve_chromedriver()로 찾습니다.
+        :param diagnostics: 시스템, ChromeDriver, 브라우저 버전 정보를 출력합니다.
+        :param scroll_quiet: 결과 그리드가 이 시간(초) 동안 늘어나지 않으면 스크롤을 멈춥니다.
+        :param capture: DevTools 네트워크 이벤트로 브라우저가 받은 이미지 응답을 수집하여
+                        링크와 함께 넘깁니다. (CapturedLink)
+        :param search_urls: SEARCH_URLS 중 바꿀 사이트별 검색 URL. (벤치마크의 가짜 검색 서버 등)
+        """
+        self.no_gui = no_gui
+        self.proxy = proxy
+        self.keep_alive = keep_alive
+        self.scroll_quiet = scroll_quiet
+        self.capture = capture
+        self.captured = {}  # 이미지 URL -> DevTools requestId
+        self.search_urls = dict(self.SEARCH_URLS, **(search_urls or {}))
+        self.viewer_key_events = True  # False이면 뷰어를 넘길 때 페이지 스크립트 대신 WebDriver로 키를 보냅니다.
+        self.browser = None
 
         chrome_options = Options()
         chrome_options.add_argument('--no-sandbox')
@@ -61,7 +430,6 @@ class CollectLinks:
         # Mac ARM64에서는 추가 옵션 설정
         is_mac_arm = platform.system() == 'Darwin' and platform.machine() == 'arm64'
         if is_mac_arm:
-            print("Mac ARM64 아키텍처에 최적화된 설정 적용")
             chrome_options.add_argument('--disable-features=TranslateUI')
             chrome_options.add_argument('--disable-blink-features=AutomationControlled')
             chrome_options.add_argument('--disable-web-security')
@@ -76,67 +444,12 @@ class CollectLinks:
         if proxy:
             chrome_options.add_argument("--proxy-server={}".format(proxy))
 
-        try:
-            # 수동으로 크롬드라이버 경로 찾기 시도
-            chrome_driver_path = None
-
-            # 가능한 경로들 리스트
-            possible_paths = [
-                '/opt/homebrew/bin/chromedriver',  # Homebrew 설치 경로
-                './chromedriver',  # 현재 디렉토리
-                '/usr/local/bin/chromedriver',  # 일반적인 설치 경로
-                os.path.expanduser('~/.wdm/drivers/chromedriver/mac64/latest/chromedriver'),  # WebDriver Manager 최신 버전
-            ]
-
-            # Chrome 버전 기반으로 특정 WebDriver Manager 경로 추가
-            if 'Chrome' in chrome_version:
-                chrome_ver = chrome_version.split(' ')[-1].split('.')[0]  # 메이저 버전만 추출 (예: 135)
-                wdm_path = os.path.expanduser(f'~/.wdm/drivers/chromedriver/mac64/{chrome_ver}')
-
-                # 디렉토리가 존재하면 탐색
-                if os.path.exists(wdm_path):
-                    for root, dirs, files in os.walk(wdm_path):
-                        for file in files:
-                            if file == 'chromedriver':
-                                possible_paths.append(os.path.join(root, file))
-
-            # WebDriver Manager가 저장한 정확한 경로 추가
-            wdm_exact_path = "/Users/junhoha/.wdm/drivers/chromedriver/mac64/135.0.7049.95/chromedriver-mac-arm64/chromedriver"
-            possible_paths.append(wdm_exact_path)
-
-            # 첫 번째 유효한 경로 사용
-            for path in possible_paths:
-                if os.path.exists(path):
-                    print(f"유효한 ChromeDriver 경로 발견: {path}")
-                    chrome_driver_path = path
-
-                    # 실행 권한 확인 및 설정
-                    if not os.access(path, os.X_OK):
-                        print(f"ChromeDriver에 실행 권한 부여: {path}")
-                        os.chmod(path, 0o755)
-
-                    # 검역 속성 제거 시도 (Mac용)
-                    try:
-                        print(f"검역 속성 제거 시도: {path}")
-                        subprocess.run(['xattr', '-d', 'com.apple.quarantine', path],
-                                       check=False, stderr=subprocess.PIPE)
-                    except Exception as e:
-                        print(f"검역 속성 제거 오류 (무시됨): {e}")
-
-                    # 파일 상태 확인
-                    file_info = subprocess.run(['file', path], capture_output=True, text=True)
-                    print(f"ChromeDriver 파일 정보: {file_info.stdout.strip()}")
+        if capture:
+            # 네트워크 이벤트를 performance 로그로 받습니다.
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
 
-                    # 서명 확인 (Mac용)
-                    if platform.system() == 'Darwin':
-                        try:
-                            codesign = subprocess.run(['codesign', '-v', path],
-                                                      capture_output=True, text=True)
-                            print(f"CodeSign 상태: {codesign.stderr if codesign.stderr else '정상'}")
-                        except Exception as e:
-                            print(f"CodeSign 확인 오류: {e}")
-
-                    break
+        try:
+            chrome_driver_path = driver_path or resolve_chromedriver()
 
             if not chrome_driver_path:
                 print("유효한 ChromeDriver를 찾을 수 없습니다.")
@@ -144,36 +457,23 @@ class CollectLinks:
                 self.browser = None
                 return
 
+            if diagnostics:
+                print_driver_diagnostics(chrome_driver_path)
+
             # 서비스 생성 및 브라우저 초기화
             service = Service(executable_path=chrome_driver_path)
+            with timer('autocrawler_browser_launch_seconds'), span('CollectLinks.__init__', 'browser'):
+                self.browser = webdriver.Chrome(service=service, options=chrome_options)
 
-            print("Chrome 브라우저 실행 시도...")
-            self.browser = webdriver.Chrome(service=service, options=chrome_options)
-            print("Chrome 브라우저 실행 성공!")
-
-            # 브라우저 및 드라이버 버전 확인
-            browser_version = 'Failed to detect version'
-            chromedriver_version = 'Failed to detect version'
-            major_version_different = False
-
-            if 'browserVersion' in self.browser.capabilities:
-                browser_version = str(self.browser.capabilities['browserVersion'])
-
-            if 'chrome' in self.browser.capabilities:
-                if 'chromedriverVersion' in self.browser.capabilities['chrome']:
-                    chromedriver_version = str(self.browser.capabilities['chrome']['chromedriverVersion']).split(' ')[0]
+            if capture:
+                # 응답 본문을 나중에 Network.getResponseBody로 꺼낼 수 있도록 버퍼를 넉넉히 잡습니다.
+                self.browser.execute_cdp_cmd('Network.enable', {
+                    'maxTotalBufferSize': 200 * 1024 * 1024,
+                    'maxResourceBufferSize': 20 * 1024 * 1024,
+                })
 
-            if browser_version.split('.')[0] != chromedriver_version.split('.')[0]:
-                major_version_different = True
-
-            print('_________________________________')
-            print('Current web-browser version:\t{}'.format(browser_version))
-            print('Current chrome-driver version:\t{}'.format(chromedriver_version))
-            if major_version_different:
-                print('warning: Version different')
-                print(
-                    'Download correct version at "http://chromedriver.chromium.org/downloads" and place in "./chromedriver"')
-            print('_________________________________')
+            if diagnostics:
+                self.print_version_info()
 
         except Exception as e:
             print(f"브라우저 초기화 중 오류 발생: {e}")
@@ -182,6 +482,31 @@ class CollectLinks:
             # 예외가 발생해도 계속 진행할 수 있도록 None 설정
             self.browser = None
 
+    def print_version_info(self):
+        """브라우저와 ChromeDriver의 버전을 비교하여 출력합니다."""
+        browser_version = 'Failed to detect version'
+        chromedriver_version = 'Failed to detect version'
+        major_version_different = False
+
+        if 'browserVersion' in self.browser.capabilities:
+            browser_version = str(self.browser.capabilities['browserVersion'])
+
+        if 'chrome' in self.browser.capabilities:
+            if 'chromedriverVersion' in self.browser.capabilities['chrome']:
+                chromedriver_version = str(self.browser.capabilities['chrome']['chromedriverVersion']).split(' ')[0]
+
+        if browser_version.split('.')[0] != chromedriver_version.split('.')[0]:
+            major_version_different = True
+
+        print('_________________________________')
+        print('Current web-browser version:\t{}'.format(browser_version))
+        print('Current chrome-driver version:\t{}'.format(chromedriver_version))
+        if major_version_different:
+            print('warning: Version different')
+            print(
+                'Download correct version at "http://chromedriver.chromium.org/downloads" and place in "./chromedriver"')
+        print('_________________________________')
+
     # 나머지 메소드는 이전과 동일하게 유지...
     def get_scroll(self):
         if self.browser is None:
@@ -223,149 +548,359 @@ class CollectLinks:
     def remove_duplicates(_list):
         return list(dict.fromkeys(_list))
 
+    def close_browser(self):
+        try:
+            if self.browser:
+                self.browser.close()
+        except Exception as e:
+            print(f"브라우저 종료 중 오류: {e}")
+
+    def finish(self):
+        """수집이 끝났을 때 호출됩니다. 재사용할 브라우저는 닫지 않습니다."""
+        if not self.keep_alive:
+            self.close_browser()
+
+    def quit(self):
+        """브라우저와 ChromeDriver 프로세스를 완전히 종료합니다."""
+        try:
+            if self.browser:
+                self.browser.quit()
+        except Exception as e:
+            print(f"브라우저 종료 중 오류: {e}")
+        self.browser = None
+
+    def is_alive(self):
+        """브라우저가 응답하는지 확인합니다."""
+        if self.browser is None:
+            return False
+        try:
+            return len(self.browser.window_handles) > 0
+        except Exception:
+            return False
+
+    def reset(self):
+        """
+        다음 작업을 위해 브라우저 상태를 초기화합니다.
+        추가로 열린 창을 닫고, 쿠키와 스토리지를 지운 뒤 빈 페이지로 이동합니다.
+        :return: 초기화 성공 여부. 실패하면 브라우저가 죽은 것으로 봅니다.
+        """
+        if not self.is_alive():
+            return False
+        try:
+            handles = self.browser.window_handles
+            for handle in handles[1:]:
+                self.browser.switch_to.window(handle)
+                self.browser.close()
+            self.browser.switch_to.window(handles[0])
+            self.browser.delete_all_cookies()
+            self.browser.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            self.browser.get('about:blank')
+            self.captured = {}
+            if self.capture:
+                self.browser.get_log('performance')  # 이전 작업의 네트워크 이벤트 비우기
+            return True
+        except Exception as e:
+            print(f"브라우저 초기화 오류: {e}")
+            return False
+
+    def update_captured(self):
+        """performance 로그에서 성공한 이미지 응답을 찾아 URL별 requestId를 기록합니다."""
+        try:
+            entries = self.browser.get_log('performance')
+        except Exception as e:
+            print(f"네트워크 로그 읽기 오류: {e}")
+            return
+
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+                if message.get('method') != 'Network.responseReceived':
+                    continue
+                params = message['params']
+                response = params['response']
+                is_image = params.get('type') == 'Image' or str(response.get('mimeType', '')).startswith('image/')
+                if is_image and response.get('status') == 200:
+                    self.captured[response['url']] = params['requestId']
+            except (KeyError, ValueError):
+                continue
+
+    def with_body(self, src):
+        """
+        capture 모드에서 브라우저가 이미 받은 이미지면 바이트를 붙인 CapturedLink를 반환합니다.
+        그 외에는 src를 그대로 반환합니다.
+        """
+        if not self.capture or src.startswith('data:'):
+            return src
+
+        if src not in self.captured:
+            self.update_captured()
+        request_id = self.captured.pop(src, None)
+        if request_id is None:
+            return src
+
+        try:
+            with span('getResponseBody', 'browser'):
+                result = self.browser.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            if result.get('base64Encoded'):
+                body = base64.b64decode(result['body'])
+            else:
+                body = result['body'].encode('latin-1')
+            return CapturedLink(src, body)
+        except Exception:
+            # 버퍼에서 이미 밀려난 응답은 다운로더가 다시 받습니다.
+            return src
+
+    def extract_srcs(self, xpath, offset=0, with_meta=False, wait_lazy=False):
+        """
+        xpath에 해당하는 요소 중 offset 이후의 이미지 정보를 한 번의 execute_script로 가져옵니다.
+        중복 제거는 브라우저 안에서 하며, 같은 페이지에서 이전 호출로 이미 반환한 src는 다시 반환하지 않습니다.
+        :param with_meta: True이면 src 대신 {'src', 'data_src', 'width', 'height'} 딕셔너리 목록을 반환합니다.
+        :param wait_lazy: True이면 아직 로드되지 않은 요소부터는 다음 호출에서 다시 확인합니다.
+        :return: (결과 목록, 지금까지 확인한 요소 수)
+        """
+        with span('extract_srcs', 'browser', offset=offset):
+            result = self.browser.execute_script(EXTRACT_SRCS_JS, xpath, offset, wait_lazy)
+        items = result['items']
+        if not with_meta:
+            items = [item['src'] for item in items]
+        return items, int(result['total'])
+
+    def scrape_new_srcs(self, xpath, offset=0, wait_lazy=False):
+        """xpath에 해당하는 요소 중 offset 이후에 새로 추가된 요소의 src를 반환합니다."""
+        try:
+            return self.extract_srcs(xpath, offset, wait_lazy=wait_lazy)
+        except Exception as e:
+            print(f'[Exception occurred while collecting links] {e}')
+            return [], offset
+
+    def count_elements(self, xpath):
+        return int(self.browser.execute_script(
+            "return document.evaluate('count(' + arguments[0] + ')', document, null, "
+            "XPathResult.NUMBER_TYPE, null).numberValue;", xpath))
+
+    def scroll_until_idle(self, xpath, more_xpaths=(), end_xpaths=()):
+        """
+        페이지 안에서 스크롤하여 xpath에 해당하는 이미지 수가 scroll_quiet 동안 늘어나지 않거나
+        끝 표시가 나타날 때까지 기다립니다. SCROLL_ROUND_SECONDS마다 현재 이미지 수를 yield 하므로
+        호출하는 쪽에서 그 사이에 새 링크를 가져갈 수 있습니다.
+        """
+        quiet_ms = int(self.scroll_quiet * 1000)
+        round_ms = int(self.SCROLL_ROUND_SECONDS * 1000)
+        self.browser.set_script_timeout(self.SCROLL_ROUND_SECONDS + self.scroll_quiet + 10)
+
+        count = 0
+        idle_ms = 0
+        y = -1
+        t_start = time.time()
+
+        while True:
+            with span('scroll', 'browser', count=count):
+                result = self.browser.execute_async_script(SCROLL_UNTIL_IDLE_JS, xpath, list(more_xpaths),
+                                                           list(end_xpaths), quiet_ms, round_ms, count, idle_ms, y)
+            count = int(result['count'])
+            idle_ms = int(result['idle'])
+            y = result['y']
+            yield count
+
+            if result['done']:
+                break
+            if time.time() - t_start > self.SCROLL_MAX_SECONDS:
+                print(f"최대 스크롤 시간({self.SCROLL_MAX_SECONDS}초)에 도달하여 종료")
+                break
+
+    def viewer_next(self, xpaths, exclude=None, press=True):
+        """
+        이미지 뷰어를 다음 이미지로 넘기고 미리보기가 새 원본 URL로 바뀔 때까지 기다립니다.
+        :param exclude: 원본이 아닌 미리보기 src에 들어 있는 문자열 (예: 구글 썸네일의 gstatic.com)
+        :param press: False이면 넘기지 않고 현재 이미지를 기다립니다. (처음 연 이미지)
+        :return: 새 원본 URL. VIEWER_WAIT_SECONDS 안에 바뀌지 않으면 None
+        """
+        if press and not self.viewer_key_events:
+            self.browser.find_element(By.TAG_NAME, 'body').send_keys(Keys.RIGHT)
+            press = False
+        result = self.browser.execute_async_script(VIEWER_NEXT_JS, list(xpaths), exclude, press,
+                                                   int(self.VIEWER_WAIT_SECONDS * 1000))
+        return result.get('src') if result else None
+
+    def iter_viewer(self, xpaths, exclude=None, limit=0):
+        """
+        첫 이미지를 연 뷰어에서 다음 이미지로 넘기며 원본 URL을 yield 합니다.
+        뷰어가 연속 VIEWER_MAX_MISSES번 바뀌지 않거나 limit개를 찾으면 멈춥니다.
+        """
+        self.browser.set_script_timeout(self.VIEWER_WAIT_SECONDS + 10)
+        self.viewer_key_events = True
+        key_events_worked = False
+        press = False
+        misses = 0
+        count = 0
+
+        while not limit or count < limit:
+            try:
+                with span('viewer_next', 'browser'):
+                    src = self.viewer_next(xpaths, exclude, press)
+            except StaleElementReferenceException:
+                src = None
+            except Exception as e:
+                print(f'[Exception occurred while waiting for the viewer] {e}')
+                src = None
+
+            if src is None:
+                misses += 1
+                if misses >= self.VIEWER_MAX_MISSES:
+                    print(f"뷰어가 {self.VIEWER_MAX_MISSES}번 연속 바뀌지 않아 종료")
+                    break
+                if press and self.viewer_key_events and not key_events_worked:
+                    # 페이지가 스크립트로 만든 키 이벤트를 무시하면 WebDriver로 키를 보냅니다. (왕복 한 번 추가)
+                    print('뷰어가 스크립트 키 이벤트에 반응하지 않아 WebDriver로 키를 보냅니다.')
+                    self.viewer_key_events = False
+                press = True
+                continue
+
+            if press and self.viewer_key_events:
+                key_events_worked = True
+            press = True
+            misses = 0
+            count += 1
+            yield src
+
+    # 리스트를 반환하는 기존 인터페이스. 수집이 끝나야 다운로드를 시작할 수 있습니다.
     def google(self, keyword, add_url=""):
+        return list(self.iter_google(keyword, add_url))
+
+    def naver(self, keyword, add_url=""):
+        return list(self.iter_naver(keyword, add_url))
+
+    def google_full(self, keyword, add_url="", limit=100):
+        return list(self.iter_google_full(keyword, add_url, limit))
+
+    def google_page_data(self, keyword, add_url="", limit=100):
+        return list(self.iter_google_page_data(keyword, add_url, limit))
+
+    def naver_full(self, keyword, add_url=""):
+        return list(self.iter_naver_full(keyword, add_url))
+
+    # 아래 iter_* 메소드는 링크를 찾는 즉시 yield 하는 제너레이터입니다.
+    # 소비자가 제너레이터를 닫으면(close) 스크롤을 멈추고 브라우저를 종료합니다.
+    def iter_google(self, keyword, add_url=""):
         if self.browser is None:
             print("브라우저가 초기화되지 않았습니다.")
-            return []
+            return
 
+        links = set()
         try:
             print(f"Google 검색 시작: {keyword}")
-            self.browser.get("https://www.google.com/search?q={}&source=lnms&tbm=isch{}".format(keyword, add_url))
+            with span('page_load', 'browser', keyword=keyword, site='google'):
+                self.browser.get(self.search_urls['google'].format(keyword, add_url))
             time.sleep(1)
             print('Scrolling down')
-            elem = self.browser.find_element(By.TAG_NAME, "body")
-            last_scroll = 0
-            scroll_patience = 0
-            NUM_MAX_SCROLL_PATIENCE = 50
-
-            while True:
-                elem.send_keys(Keys.PAGE_DOWN)
-                time.sleep(0.2)
-                scroll = self.get_scroll()
-                if scroll == last_scroll:
-                    scroll_patience += 1
-                else:
-                    scroll_patience = 0
-                    last_scroll = scroll
-                if scroll_patience >= NUM_MAX_SCROLL_PATIENCE:
-                    break
-
-            print('Scraping links')
-            imgs = self.browser.find_elements(By.XPATH, '//div[@jsname="dTDiAc"]/div[@jsname="qQjpJ"]//img')
-            print(f"이미지 요소 {len(imgs)}개 찾음")
+            xpath = '//div[@jsname="dTDiAc"]/div[@jsname="qQjpJ"]//img'
+            n_scraped = 0
+
+            for _ in self.scroll_until_idle(xpath, self.GOOGLE_MORE_XPATHS, self.GOOGLE_END_XPATHS):
+                # 스크롤로 새로 로드된 이미지만 가져옵니다.
+                srcs, n_scraped = self.scrape_new_srcs(xpath, n_scraped)
+                for src in srcs:
+                    if src not in links:
+                        links.add(src)
+                        if len(links) <= 5:  # 처음 5개 링크만 로그 출력
+                            print(f"이미지 링크 #{len(links)}: {src[:50]}...")
+                        yield self.with_body(src)
+
+            # 스크롤 중에 아직 로드되지 않았던 요소는 offset 이후에 다시 읽지 않으므로, 스크롤이 끝난 뒤
+            # 처음부터 한 번 더 가져옵니다. (이미 반환한 src는 브라우저 안에서 걸러집니다)
+            srcs, n_scraped = self.scrape_new_srcs(xpath, 0)
+            for src in srcs:
+                if src not in links:
+                    links.add(src)
+                    yield self.with_body(src)
+
+            print(f"이미지 요소 {n_scraped}개 찾음")
 
-            links = []
-            for idx, img in enumerate(imgs):
-                try:
-                    src = img.get_attribute("src")
-                    if src:
-                        links.append(src)
-                        if idx < 5:  # 처음 5개 링크만 로그 출력
-                            print(f"이미지 링크 #{idx}: {src[:50]}...")
-                except Exception as e:
-                    print(f'[Exception occurred while collecting links from google] {e}')
-
-            links = self.remove_duplicates(links)
             print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google', keyword, len(links)))
-            try:
-                self.browser.close()
-            except Exception as e:
-                print(f"브라우저 종료 중 오류: {e}")
-            return links
         except Exception as e:
             print(f"Google 검색 중 오류 발생: {e}")
             import traceback
             traceback.print_exc()
-            try:
-                if self.browser:
-                    self.browser.close()
-            except:
-                pass
-            return []
+        finally:
+            self.finish()
 
-    def naver(self, keyword, add_url=""):
+    def iter_naver(self, keyword, add_url=""):
         if self.browser is None:
             print("브라우저가 초기화되지 않았습니다.")
-            return []
+            return
 
+        links = set()
         try:
             print(f"Naver 검색 시작: {keyword}")
-            self.browser.get(
-                "https://search.naver.com/search.naver?where=image&sm=tab_jum&query={}{}".format(keyword, add_url))
+            with span('page_load', 'browser', keyword=keyword, site='naver'):
+                self.browser.get(self.search_urls['naver'].format(keyword, add_url))
             time.sleep(1)
             print('Scrolling down')
-            elem = self.browser.find_element(By.TAG_NAME, "body")
-
-            for i in range(60):
-                elem.send_keys(Keys.PAGE_DOWN)
-                time.sleep(0.2)
-
-            # XPath 패턴 디버깅
-            print("XPath로 이미지 요소 찾는 중...")
-            try:
-                # 여러 XPath 패턴 시도
-                xpath_patterns = [
-                    '//div[@class="tile_item _fe_image_tab_content_tile"]//img[@class="_fe_image_tab_content_thumbnail_image"]',
-                    '//div[contains(@class, "tile_item")]//img[contains(@class, "thumbnail_image")]',
-                    '//img[contains(@class, "thumbnail_image")]'
-                ]
-
-                imgs = []
-                for pattern in xpath_patterns:
-                    print(f"XPath 패턴 시도: {pattern}")
-                    imgs = self.browser.find_elements(By.XPATH, pattern)
-                    if len(imgs) > 0:
-                        print(f"패턴 {pattern}으로 {len(imgs)}개 요소 찾음")
-                        break
-
-                if len(imgs) == 0:
-                    print("모든 XPath 패턴으로 요소를 찾지 못함. CSS 선택자 시도...")
-                    imgs = self.browser.find_elements(By.CSS_SELECTOR,
-                                                      'img.thumbnail_image, img._fe_image_tab_content_thumbnail_image')
-                    print(f"CSS 선택자로 {len(imgs)}개 요소 찾음")
-            except Exception as e:
-                print(f"XPath/CSS 선택자 검색 중 오류: {e}")
-                imgs = []
 
-            print('Scraping links')
-            links = []
+            # 여러 XPath 패턴 시도. 요소를 찾은 패턴을 이후 스크롤에서도 계속 사용합니다.
+            xpath_patterns = [
+                '//div[@class="tile_item _fe_image_tab_content_tile"]//img[@class="_fe_image_tab_content_thumbnail_image"]',
+                '//div[contains(@class, "tile_item")]//img[contains(@class, "thumbnail_image")]',
+                '//img[contains(@class, "thumbnail_image")]'
+            ]
+            xpath = None
+            n_scraped = 0
 
-            for idx, img in enumerate(imgs):
+            # 패턴을 정하기 전에는 가장 넓은 패턴으로 그리드 크기를 셉니다.
+            for _ in self.scroll_until_idle(xpath_patterns[-1]):
                 try:
-                    src = img.get_attribute("src")
-                    if src and src[0] != 'd':  # data URL 제외
-                        links.append(src)
-                        if idx < 5:  # 처음 5개 링크만 로그 출력
-                            print(f"이미지 링크 #{idx}: {src[:50]}...")
+                    if xpath is None:
+                        for pattern in xpath_patterns:
+                            if self.count_elements(pattern) > 0:
+                                xpath = pattern
+                                break
+                        if xpath is None:
+                            continue
+
+                    # 아직 로드되지 않은 썸네일은 다음 라운드에서 다시 확인합니다.
+                    srcs, n_scraped = self.scrape_new_srcs(xpath, n_scraped, wait_lazy=True)
                 except Exception as e:
-                    print(f'[Exception occurred while collecting links from naver] {e}')
+                    print(f"XPath 검색 중 오류: {e}")
+                    continue
+
+                for src in srcs:
+                    if src[0] != 'd' and src not in links:  # data URL 제외
+                        links.add(src)
+                        if len(links) <= 5:  # 처음 5개 링크만 로그 출력
+                            print(f"이미지 링크 #{len(links)}: {src[:50]}...")
+                        yield self.with_body(src)
+
+            # 스크롤이 끝난 뒤 남은 요소를 한 번에 가져옵니다.
+            if xpath is not None:
+                srcs, n_scraped = self.scrape_new_srcs(xpath, n_scraped)
+                for src in srcs:
+                    if src[0] != 'd' and src not in links:  # data URL 제외
+                        links.add(src)
+                        yield self.with_body(src)
+
+            if xpath is not None:
+                print(f"패턴 {xpath}으로 {n_scraped}개 요소 찾음")
+
+            if xpath is None:
+                print("모든 XPath 패턴으로 요소를 찾지 못함")
 
-            links = self.remove_duplicates(links)
             print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('naver', keyword, len(links)))
-            try:
-                self.browser.close()
-            except Exception as e:
-                print(f"브라우저 종료 중 오류: {e}")
-            return links
         except Exception as e:
             print(f"Naver 검색 중 오류 발생: {e}")
             import traceback
             traceback.print_exc()
-            try:
-                if self.browser:
-                    self.browser.close()
-            except:
-                pass
-            return []
+        finally:
+            self.finish()
 
-    def google_full(self, keyword, add_url="", limit=100):
+    def iter_google_full(self, keyword, add_url="", limit=100):
         if self.browser is None:
             print("브라우저가 초기화되지 않았습니다.")
-            return []
+            return
 
         try:
             print('[Full Resolution Mode] Google')
-            self.browser.get("https://www.google.com/search?q={}&tbm=isch{}".format(keyword, add_url))
+            with span('page_load', 'browser', keyword=keyword, site='google_full'):
+                self.browser.get(self.search_urls['google_full'].format(keyword, add_url))
             time.sleep(1)
 
             # 첫 번째 이미지 요소 찾기 시도
@@ -391,112 +926,92 @@ class CollectLinks:
 
                 if not clicked:
                     print("모든 XPath 패턴으로 이미지를 클릭하지 못함")
-                    # 이미지가 없을 경우 빈 배열 반환
-                    return []
+                    # 이미지가 없을 경우 빈 결과 반환
+                    return
             except Exception as e:
                 print(f"이미지 클릭 중 오류: {e}")
-                return []
+                return
 
-            time.sleep(1)
-            body = self.browser.find_element(By.TAG_NAME, "body")
             print('Scraping links')
 
-            links = []
+            links = set()
             limit = 10000 if limit == 0 else limit
-            count = 1
-            last_scroll = 0
-            scroll_patience = 0
-            NUM_MAX_SCROLL_PATIENCE = 100
 
-            while len(links) < limit:
-                try:
-                    # XPath 패턴 여러 개 시도
-                    xpath_patterns = [
-                        '//div[@jsname="figiqf"]//img[not(contains(@src,"gstatic.com"))]',
-                        '//div[contains(@jsname, "figiqf")]//img[not(contains(@src,"gstatic.com"))]',
-                        '//div[contains(@class, "isv-r")]//img[not(contains(@src,"gstatic.com"))]'
-                    ]
-
-                    imgs = []
-                    t1 = time.time()
-                    xpath_used = ""
-
-                    while True:
-                        for pattern in xpath_patterns:
-                            imgs = body.find_elements(By.XPATH, pattern)
-                            if len(imgs) > 0:
-                                xpath_used = pattern
-                                break
+            # 다음 이미지로 넘기고 원본이 뜰 때까지 기다리는 일을 페이지 안의 스크립트 한 번으로 처리합니다.
+            for src in self.iter_viewer(self.GOOGLE_VIEWER_XPATHS, exclude='gstatic.com', limit=limit):
+                if src not in links:
+                    links.add(src)
+                    print('%d: %s' % (len(links), src[:50] + '...'))
+                    yield self.with_body(src)
 
-                        t2 = time.time()
-                        if len(imgs) > 0:
-                            break
-                        if t2 - t1 > 5:
-                            print(f"5초 내에 이미지를 찾지 못함")
-                            break
-                        time.sleep(0.1)
-
-                    if len(imgs) > 0:
-                        print(f"패턴 {xpath_used}으로 이미지 찾음")
-                        self.highlight(imgs[0])
-                        src = imgs[0].get_attribute('src')
-
-                        if src is not None and src not in links:
-                            links.append(src)
-                            print('%d: %s' % (count, src[:50] + '...'))
-                            count += 1
-                except KeyboardInterrupt:
-                    print("키보드 인터럽트로 중단")
-                    break
-                except StaleElementReferenceException:
-                    # 예상된 예외라 무시
-                    pass
-                except Exception as e:
-                    print(f'[Exception occurred while collecting links from google_full] {e}')
+            print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google_full', keyword, len(links)))
+        except Exception as e:
+            print(f"Google Full 검색 중 오류 발생: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.finish()
+
+    def iter_google_page_data(self, keyword, add_url="", limit=100):
+        """
+        결과 그리드를 한 번 끝까지 스크롤한 뒤, 페이지의 인라인 스크립트 데이터에서 원본 URL과 크기를 한 번에 꺼냅니다.
+        이미지마다 뷰어를 열지 않으므로 iter_google_full보다 훨씬 빠릅니다.
+        데이터에서 원본을 찾지 못하면 iter_google_full(뷰어를 넘기며 수집)로 대신합니다.
+        :return: ImageLink(가로, 세로를 가진 URL) 제너레이터
+        """
+        if self.browser is None:
+            print("브라우저가 초기화되지 않았습니다.")
+            return
 
-                scroll = self.get_scroll()
-                if scroll == last_scroll:
-                    scroll_patience += 1
-                else:
-                    scroll_patience = 0
-                    last_scroll = scroll
+        images = []
+        try:
+            print('[Full Resolution Mode] Google (페이지 데이터)')
+            with span('page_load', 'browser', keyword=keyword, site='google_full'):
+                self.browser.get(self.search_urls['google_full'].format(keyword, add_url))
+            time.sleep(1)
 
-                if scroll_patience >= NUM_MAX_SCROLL_PATIENCE:
-                    print(f"최대 스크롤 인내심({NUM_MAX_SCROLL_PATIENCE})에 도달하여 종료")
+            print('Scrolling down')
+            xpath = '//div[@jsname="dTDiAc"]'
+            n_tiles = 0
+            for n_tiles in self.scroll_until_idle(xpath, self.GOOGLE_MORE_XPATHS, self.GOOGLE_END_XPATHS):
+                if limit and n_tiles >= limit:
                     break
 
-                body.send_keys(Keys.RIGHT)
-
-            links = self.remove_duplicates(links)
-            print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google_full', keyword, len(links)))
-            try:
-                self.browser.close()
-            except Exception as e:
-                print(f"브라우저 종료 중 오류: {e}")
-            return links
+            with span('page_data', 'browser', keyword=keyword):
+                images = parse_google_images(self.browser.execute_script(PAGE_SCRIPTS_JS))
+            print(f'결과 {n_tiles}개 중 페이지 데이터에서 원본 {len(images)}개 찾음')
         except Exception as e:
-            print(f"Google Full 검색 중 오류 발생: {e}")
+            print(f"Google 페이지 데이터 수집 중 오류 발생: {e}")
             import traceback
             traceback.print_exc()
-            try:
-                if self.browser:
-                    self.browser.close()
-            except:
-                pass
-            return []
 
-    def naver_full(self, keyword, add_url=""):
+        if not images:
+            print('페이지 데이터에서 원본을 찾지 못해 이미지를 하나씩 열어 수집합니다.')
+            yield from self.iter_google_full(keyword, add_url, limit)
+            return
+
+        if limit:
+            images = images[:limit]
+        try:
+            # 원본은 브라우저가 받은 적이 없으므로 capture로 가져올 바이트가 없습니다.
+            for image in images:
+                yield image
+
+            print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google_full', keyword, len(images)))
+        finally:
+            self.finish()
+
+    def iter_naver_full(self, keyword, add_url=""):
         if self.browser is None:
             print("브라우저가 초기화되지 않았습니다.")
-            return []
+            return
 
         try:
             print('[Full Resolution Mode] Naver')
-            self.browser.get(
-                "https://search.naver.com/search.naver?where=image&sm=tab_jum&query={}{}".format(keyword, add_url))
+            with span('page_load', 'browser', keyword=keyword, site='naver_full'):
+                self.browser.get(self.search_urls['naver_full'].format(keyword, add_url))
             time.sleep(1)
 
-            elem = self.browser.find_element(By.TAG_NAME, "body")
             print('첫 번째 이미지 클릭 시도...')
 
             # 여러 XPath 패턴 시도
@@ -519,84 +1034,31 @@ class CollectLinks:
 
             if not clicked:
                 print("모든 XPath 패턴으로 이미지를 클릭하지 못함")
-                return []
+                return
 
-            time.sleep(1)
             print('Scraping links')
 
-            links = []
-            count = 1
-            last_scroll = 0
-            scroll_patience = 0
-
-            while True:
-                try:
-                    # 여러 XPath 패턴 시도
-                    xpath_patterns = [
-                        '//img[@class="_fe_image_viewer_image_fallback_target"]',
-                        '//img[contains(@class, "_fe_image_viewer_image")]',
-                        '//img[contains(@class, "image__image")]'
-                    ]
-
-                    imgs = []
-                    for pattern in xpath_patterns:
-                        imgs = self.browser.find_elements(By.XPATH, pattern)
-                        if len(imgs) > 0:
-                            print(f"패턴 {pattern}으로 {len(imgs)}개 이미지 찾음")
-                            break
-
-                    for img in imgs:
-                        self.highlight(img)
-                        src = img.get_attribute('src')
-
-                        if src not in links and src is not None:
-                            links.append(src)
-                            print('%d: %s' % (count, src[:50] + '...'))
-                            count += 1
-
-                except StaleElementReferenceException:
-                    # 예상된 예외라 무시
-                    pass
-                except Exception as e:
-                    print(f'[Exception occurred while collecting links from naver_full] {e}')
-
-                scroll = self.get_scroll()
-                if scroll == last_scroll:
-                    scroll_patience += 1
-                else:
-                    scroll_patience = 0
-                    last_scroll = scroll
-
-                if scroll_patience >= 100:
-                    print("최대 스크롤 인내심(100)에 도달하여 종료")
-                    break
+            links = set()
+            for src in self.iter_viewer(self.NAVER_VIEWER_XPATHS):
+                if src not in links:
+                    links.add(src)
+                    print('%d: %s' % (len(links), src[:50] + '...'))
+                    yield self.with_body(src)
 
-                elem.send_keys(Keys.RIGHT)
-
-            links = self.remove_duplicates(links)
             print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('naver_full', keyword, len(links)))
-            try:
-                self.browser.close()
-            except Exception as e:
-                print(f"브라우저 종료 중 오류: {e}")
-            return links
         except Exception as e:
             print(f"Naver Full 검색 중 오류 발생: {e}")
             import traceback
             traceback.print_exc()
-            try:
-                if self.browser:
-                    self.browser.close()
-            except:
-                pass
-            return []
+        finally:
+            self.finish()
 
 
 if __name__ == '__main__':
     try:
         print("테스트 실행 중...")
         # 추가 테스트: WebDriverManager 의존성 제거
-        collect = CollectLinks(no_gui=False)  # GUI 모드로 디버깅
+        collect = CollectLinks(no_gui=False, diagnostics=True)  # GUI 모드로 디버깅
         if collect.browser:
             links = collect.google('test')  # 간단한 테스트 키워드
             print(f"총 {len(links)}개 링크 수집 완료")
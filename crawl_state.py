@@ -0,0 +1,182 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class CrawlState:
+    """
+    다운로드 디렉토리에 두는 SQLite 크롤링 상태 저장소.
+    (키워드, 사이트, URL)마다 상태, 파일 경로, 크기, 오류를 기록하여
+    중단된 키워드를 이어서 받을 수 있게 합니다.
+    (키워드, 사이트)별 이미지 수와 바이트 수(counts)는 기록할 때마다 갱신되므로
+    다운로드 디렉토리를 다시 훑지 않고 키워드 수에 비례하는 시간에 읽을 수 있습니다.
+    """
+
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_DUPLICATE = 'duplicate'
+    STATUS_FILTERED = 'filtered'  # 크기 필터(--min-bytes 등)로 받지 않음
+
+    def __init__(self, path):
+        """
+        :param path: SQLite 파일 경로 (예: download/crawl_state.sqlite3)
+        """
+        self.path = path
+        self.local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.connect() as conn:
+            has_counts = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counts'").fetchone()
+            conn.execute('CREATE TABLE IF NOT EXISTS urls ('
+                         'keyword TEXT, site TEXT, url TEXT, idx INTEGER, status TEXT, path TEXT, '
+                         'bytes INTEGER, error TEXT, updated REAL, PRIMARY KEY (keyword, site, url))')
+            conn.execute('CREATE TABLE IF NOT EXISTS tasks ('
+                         'keyword TEXT, site TEXT, status TEXT, success INTEGER, updated REAL, '
+                         'PRIMARY KEY (keyword, site))')
+            conn.execute('CREATE TABLE IF NOT EXISTS counts ('
+                         'keyword TEXT, site TEXT, images INTEGER, bytes INTEGER, PRIMARY KEY (keyword, site))')
+
+            if not has_counts:
+                # 이전 버전의 상태 파일은 기록된 URL에서 한 번만 집계합니다.
+                conn.execute('INSERT INTO counts (keyword, site, images, bytes) '
+                             'SELECT keyword, site, COUNT(*), COALESCE(SUM(bytes), 0) FROM urls WHERE status = ? '
+                             'GROUP BY keyword, site', (self.STATUS_DONE,))
+
+    def connect(self):
+        """스레드마다 별도의 SQLite 연결을 사용합니다."""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+        return conn
+
+    @staticmethod
+    def url_key(url):
+        """긴 base64 data URL은 해시로 바꾸어 저장합니다."""
+        url = str(url)
+        if url.startswith('data:'):
+            return 'data:sha1:' + hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return url
+
+    def load_urls(self, keyword, site):
+        """
+        (키워드, 사이트)에 기록된 URL을 반환합니다.
+        :return: {url_key: (idx, status, path)}
+        """
+        rows = self.connect().execute('SELECT url, idx, status, path FROM urls WHERE keyword = ? AND site = ?',
+                                      (keyword, site)).fetchall()
+        return {url: (idx, status, path) for url, idx, status, path in rows}
+
+    def next_index(self, keyword, site):
+        """새 URL에 사용할 파일 번호를 반환합니다. 이전 실행의 파일과 겹치지 않습니다."""
+        row = self.connect().execute('SELECT MAX(idx) FROM urls WHERE keyword = ? AND site = ?',
+                                     (keyword, site)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def record(self, keyword, site, url, idx, status, path=None, size=None, error=None):
+        """URL 하나의 다운로드 결과를 기록하고 (키워드, 사이트)별 이미지 수를 갱신합니다."""
+        url = self.url_key(url)
+        with self.connect() as conn:
+            old = conn.execute('SELECT status, bytes FROM urls WHERE keyword = ? AND site = ? AND url = ?',
+                               (keyword, site, url)).fetchone()
+            conn.execute('INSERT OR REPLACE INTO urls (keyword, site, url, idx, status, path, bytes, error, updated) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (keyword, site, url, idx, status, path, size, error, time.time()))
+
+            images = 0
+            n_bytes = 0
+            if old is not None and old[0] == self.STATUS_DONE:
+                images -= 1
+                n_bytes -= old[1] or 0
+            if status == self.STATUS_DONE:
+                images += 1
+                n_bytes += size or 0
+            if images or n_bytes:
+                conn.execute('INSERT INTO counts (keyword, site, images, bytes) VALUES (?, ?, ?, ?) '
+                             'ON CONFLICT (keyword, site) DO UPDATE SET '
+                             'images = images + excluded.images, bytes = bytes + excluded.bytes',
+                             (keyword, site, images, n_bytes))
+
+    def mark_task(self, keyword, site, status, success=0):
+        """(키워드, 사이트) 작업의 상태를 기록합니다."""
+        with self.connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO tasks (keyword, site, status, success, updated) '
+                         'VALUES (?, ?, ?, ?, ?)', (keyword, site, status, success, time.time()))
+
+    def task_result(self, keyword, site, since=0):
+        """
+        (키워드, 사이트) 작업의 상태를 반환합니다. since 이후에 기록된 결과만 봅니다.
+        :return: (status, success) 또는 기록이 없으면 (None, 0)
+        """
+        row = self.connect().execute('SELECT status, success FROM tasks WHERE keyword = ? AND site = ? AND updated >= ?',
+                                     (keyword, site, since)).fetchone()
+        return (row[0], row[1] or 0) if row is not None else (None, 0)
+
+    def done_tasks(self):
+        """완료된 (키워드, 사이트) 집합을 반환합니다."""
+        rows = self.connect().execute('SELECT keyword, site FROM tasks WHERE status = ?',
+                                      (self.STATUS_DONE,)).fetchall()
+        return set(rows)
+
+    def counts(self):
+        """
+        (키워드, 사이트)별 이미지 수와 바이트 수를 반환합니다.
+        :return: [(keyword, site, images, bytes)] 목록
+        """
+        return self.connect().execute('SELECT keyword, site, images, bytes FROM counts '
+                                      'ORDER BY keyword, site').fetchall()
+
+    def replace_counts(self, rows):
+        """
+        다운로드 디렉토리를 다시 훑어 얻은 집계로 counts를 교체합니다. (--rescan)
+        :param rows: [(keyword, site, images, bytes)] 목록
+        """
+        with self.connect() as conn:
+            conn.execute('DELETE FROM counts')
+            conn.executemany('INSERT INTO counts (keyword, site, images, bytes) VALUES (?, ?, ?, ?)', rows)
+
+    def forget_keyword(self, keyword):
+        """키워드의 모든 기록을 지웁니다. 키워드 디렉토리를 지운 뒤 다시 받을 때 사용합니다."""
+        with self.connect() as conn:
+            for table in ('urls', 'tasks', 'counts'):
+                conn.execute(f'DELETE FROM {table} WHERE keyword = ?', (keyword,))
+
+
+_states = {}
+_states_pid = None
+_states_lock = threading.Lock()
+
+
+def get_crawl_state(path):
+    """현재 프로세스에서 path에 해당하는 CrawlState를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _states, _states_pid
+
+    with _states_lock:
+        if _states_pid != os.getpid():
+            _states = {}
+            _states_pid = os.getpid()
+        if path not in _states:
+            _states[path] = CrawlState(path)
+        return _states[path]
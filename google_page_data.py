@@ -0,0 +1,101 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 구글 이미지 검색 결과 페이지의 인라인 스크립트 데이터(AF_initDataCallback 등)에서 원본 이미지 URL을 꺼냅니다.
+# 결과 하나는 데이터 안에 [썸네일 URL, 세로, 가로] 다음에 [원본 URL, 세로, 가로] 배열로 들어 있습니다.
+# 브라우저 없이 문자열만 다루므로 저장해 둔 HTML로 확인할 수 있습니다:
+#
+#   python3 google_page_data.py saved_result_page.html
+
+import json
+import re
+import sys
+from urllib.parse import urlsplit
+from link_files import ImageLink
+
+# ["https://...", 세로, 가로] 형태의 배열. URL 안의 이스케이프(= 등, https:\/\/처럼 이스케이프된 /)도 함께 잡습니다.
+_IMAGE_ENTRY = re.compile(r'\[\s*"((?:https?:)?(?:\\*/){2}(?:[^"\\]|\\.)+)"\s*,\s*(\d+)\s*,\s*(\d+)\s*\]')
+
+# 원본이 아닌 구글 자체 이미지(썸네일, 로고, 아이콘)의 호스트
+_GOOGLE_HOSTS = ('gstatic.com', 'google.com')
+
+
+def decode_js_string(value):
+    """자바스크립트 문자열 리터럴 안의 이스케이프(\\u003d, \\/ 등)를 풉니다. 여러 번 이스케이프된 경우도 처리합니다."""
+    for _ in range(3):
+        if '\\' not in value:
+            break
+        try:
+            value = json.loads('"' + value + '"')
+        except ValueError:
+            break
+    return value
+
+
+def is_google_image(url):
+    """구글이 제공하는 썸네일이나 아이콘이면 True"""
+    if 'gstatic.com' in url:
+        return True
+    host = urlsplit(url).hostname or ''
+    return any(host == domain or host.endswith('.' + domain) for domain in _GOOGLE_HOSTS)
+
+
+def parse_google_images(text):
+    """
+    결과 페이지의 HTML이나 인라인 스크립트 텍스트에서 원본 이미지 목록을 찾습니다.
+    :return: 페이지에 나온 순서대로 중복 없는 ImageLink 목록
+    """
+    # 문자열 안에 JSON이 들어 있는 경우(\"...\")도 같은 정규식으로 찾을 수 있도록 따옴표 이스케이프를 풉니다.
+    for _ in range(3):
+        unescaped = text.replace('\\"', '"')
+        if unescaped == text:
+            break
+        text = unescaped
+
+    images = []
+    seen = set()
+    thumbnail = None
+
+    for match in _IMAGE_ENTRY.finditer(text):
+        url = decode_js_string(match.group(1))
+        if url.startswith('//'):
+            url = 'https:' + url
+        height, width = int(match.group(2)), int(match.group(3))
+
+        if is_google_image(url):
+            # 다음에 나오는 원본의 썸네일
+            thumbnail = url
+            continue
+
+        if url not in seen:
+            seen.add(url)
+            images.append(ImageLink(url, width, height, thumbnail))
+        thumbnail = None
+
+    return images
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('사용법: python3 google_page_data.py <저장한 결과 페이지.html> [...]')
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            found = parse_google_images(f.read())
+        print(f'{path}: 원본 이미지 {len(found)}개')
+        for image in found[:10]:
+            print(f'  {image.width}x{image.height} {image}')
@@ -0,0 +1,239 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 느린 응답 하나가 작업 전체를 붙잡지 않도록, 응답이 지금까지의 p95보다 늦으면
+# 같은 요청을 한 번 더 보내고(hedged request) 먼저 도착한 응답을 사용합니다.
+# 헤지 요청도 호스트 동시 요청 제한(host_limiter)의 자리를 하나 차지하며, 자리가 없으면 헤지하지 않습니다.
+
+import os
+import threading
+import time
+from collections import deque
+
+# p95를 계산하기 전에 모아야 하는 최소 응답 수
+MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """최근 응답 시간(요청부터 응답 헤더까지)을 모아 백분위수를 계산합니다."""
+
+    def __init__(self, size=1000):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p):
+        """:return: p 백분위 응답 시간(초). 응답이 MIN_SAMPLES개보다 적으면 None"""
+        with self.lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class TaskTiming:
+    """(키워드, 사이트) 작업 하나의 다운로드 시간, 재시도, 헤지 통계"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.saved = 0.0  # 헤지가 이겼을 때 원래 요청보다 먼저 받은 시간의 합
+        self.unsettled = 0  # 헤지가 이겼지만 원래 요청이 아직 끝나지 않아 줄인 시간을 모르는 수
+
+    def add_latency(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def add_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def add_hedge(self, won):
+        with self.lock:
+            self.hedges += 1
+            if won:
+                self.hedge_wins += 1
+                self.unsettled += 1
+
+    def add_saved(self, seconds):
+        with self.lock:
+            self.saved += max(0.0, seconds)
+            self.unsettled = max(0, self.unsettled - 1)
+
+    def summary(self):
+        with self.lock:
+            if not self.latencies:
+                return f'응답 없음, 재시도 {self.retries}'
+            ordered = sorted(self.latencies)
+            p50 = ordered[len(ordered) // 2]
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            text = f'응답 시간 p50 {p50:.2f}초, p95 {p95:.2f}초, 최대 {ordered[-1]:.2f}초, 재시도 {self.retries}'
+            if self.hedges:
+                text += f', 헤지 {self.hedges} (이김 {self.hedge_wins}, 줄인 시간 {self.saved:.1f}초'
+                if self.unsettled:
+                    text += f' + 원래 요청 대기 중 {self.unsettled}'
+                text += ')'
+            return text
+
+
+class _Attempt:
+    """요청 하나를 별도 스레드에서 실행합니다. 결과는 공유 Condition으로 알립니다."""
+
+    def __init__(self, session, url, timeout, cond, on_finish=None):
+        self.session = session
+        self.url = url
+        self.timeout = timeout
+        self.cond = cond
+        self.on_finish = on_finish
+        self.response = None
+        self.error = None
+        self.finished = False
+        self.abandoned = False
+        self.started = time.time()
+        self.elapsed = None
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def _run(self):
+        response = None
+        error = None
+        try:
+            response = self.session.get(self.url, stream=True, timeout=self.timeout)
+        except Exception as e:
+            error = e
+
+        with self.cond:
+            self.elapsed = time.time() - self.started
+            self.response = response
+            self.error = error
+            self.finished = True
+            abandoned = self.abandoned
+            self.cond.notify_all()
+
+        # 진 요청은 본문을 받지 않고 바로 닫습니다. (이미 보낸 요청 자체는 취소할 수 없습니다)
+        if abandoned and response is not None:
+            response.close()
+        if self.on_finish is not None:
+            self.on_finish(self)
+
+
+def _succeeded(attempt):
+    return attempt.error is None and attempt.response is not None and attempt.response.ok
+
+
+def hedged_get(session, url, timeout=10, hedge_after=None, tracker=None, timing=None, limiter=None, host=None):
+    """
+    session.get(url, stream=True)과 같지만, hedge_after초 안에 응답 헤더가 오지 않으면
+    같은 요청을 한 번 더 보내고 먼저 도착한 응답을 반환합니다. 진 요청의 응답은 닫습니다.
+    :param hedge_after: 헤지 요청을 보낼 시간(초). None이면 헤지하지 않습니다.
+    :param tracker: 원래 요청의 응답 시간을 기록할 LatencyTracker (성공한 응답만 기록합니다)
+    :param timing: 헤지 통계를 기록할 TaskTiming
+    :param limiter: 헤지 요청의 자리를 잡을 HostLimiter. 호스트에 자리가 없으면 헤지하지 않습니다.
+    :param host: limiter의 호스트 이름
+    :return: requests.Response. 두 요청이 모두 실패하면 원래 요청의 예외를 다시 발생시킵니다.
+    """
+    if hedge_after is None:
+        started = time.time()
+        response = session.get(url, stream=True, timeout=timeout)
+        if tracker is not None and response.ok:
+            tracker.add(time.time() - started)
+        return response
+
+    cond = threading.Condition()
+    hedge_started = {}
+    attempts = {}
+
+    def release_hedge_slot():
+        # 두 요청이 모두 끝나면 헤지 요청의 자리를 돌려줍니다. 이긴 요청의 본문은 원래 요청의 자리로 받습니다.
+        with cond:
+            if not attempts.get('slot') or not all(a.finished for a in (attempts['primary'], attempts['secondary'])):
+                return
+            attempts['slot'] = False
+        limiter.release(host, ok=False)
+
+    def primary_finished(attempt):
+        # 헤지 요청이 이긴 경우, 원래 요청이 끝난 시각으로 헤지가 줄인 시간을 계산합니다.
+        if tracker is not None and _succeeded(attempt):
+            tracker.add(attempt.elapsed)
+        if timing is not None and attempt.abandoned and 'won_at' in hedge_started:
+            timing.add_saved(attempt.elapsed - hedge_started['won_at'])
+        release_hedge_slot()
+
+    primary = _Attempt(session, url, timeout, cond, on_finish=primary_finished)
+    attempts['primary'] = primary
+
+    with cond:
+        cond.wait_for(lambda: primary.finished, timeout=hedge_after)
+        if not primary.finished and limiter is not None and not limiter.try_acquire(host):
+            # 호스트가 이미 동시 요청 제한에 걸려 있으면 헤지하지 않고 원래 요청을 기다립니다.
+            cond.wait_for(lambda: primary.finished)
+        if primary.finished:
+            if primary.error is not None:
+                raise primary.error
+            return primary.response
+
+        attempts['slot'] = limiter is not None
+        secondary = _Attempt(session, url, timeout, cond, on_finish=lambda attempt: release_hedge_slot())
+        attempts['secondary'] = secondary
+
+        def settled():
+            if primary.finished and primary.response is not None:
+                return True
+            if secondary.finished and secondary.response is not None:
+                return True
+            return primary.finished and secondary.finished
+
+        cond.wait_for(settled)
+
+        if primary.finished and primary.response is not None:
+            winner, loser = primary, secondary
+        elif secondary.finished and secondary.response is not None:
+            winner, loser = secondary, primary
+            hedge_started['won_at'] = time.time() - primary.started
+        else:
+            raise primary.error
+
+        loser.abandoned = True
+        loser_response = loser.response if loser.finished else None
+        # 원래 요청이 끝나서 줄인 시간을 기록하기 전에 헤지를 먼저 기록합니다.
+        if timing is not None:
+            timing.add_hedge(won=winner is secondary)
+
+    if loser_response is not None:
+        loser_response.close()
+    return winner.response
+
+
+_tracker = None
+_tracker_pid = None
+_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker():
+    """현재 프로세스의 응답 시간 기록기를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _tracker, _tracker_pid
+
+    with _tracker_lock:
+        if _tracker is None or _tracker_pid != os.getpid():
+            _tracker = LatencyTracker()
+            _tracker_pid = os.getpid()
+        return _tracker
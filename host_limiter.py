@@ -0,0 +1,163 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Retry-After가 이보다 길면 이 시간(초)만 기다립니다.
+MAX_RETRY_AFTER = 120
+
+
+def parse_retry_after(value):
+    """
+    Retry-After 헤더 값(초 또는 HTTP 날짜)을 기다릴 시간(초)으로 바꿉니다.
+    :return: 초. 값이 없거나 잘못되었으면 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+class _HostState:
+    def __init__(self, limit):
+        self.limit = float(limit)  # 허용하는 동시 요청 수 (소수점 이하는 증가 중인 값)
+        self.in_flight = 0
+        self.blocked_until = 0.0  # Retry-After로 요청을 보내지 않을 시각
+        self.latency = None  # 응답 시간 지수 이동 평균 (초)
+
+
+class HostLimiter:
+    """
+    호스트별로 동시 요청 수를 조절합니다. (AIMD: additive increase, multiplicative decrease)
+    응답이 빠르고 성공하는 동안에는 동시 요청 수를 조금씩 늘리고,
+    429, 503, 타임아웃, 연결 끊김이 발생하면 절반으로 줄입니다. Retry-After가 있으면 그동안 요청을 보내지 않습니다.
+    한 프로세스의 모든 (키워드, 사이트) 작업이 공유하므로, 호스트마다 감당할 수 있는 처리량에 맞춰집니다.
+    """
+
+    def __init__(self, max_limit=16, initial_limit=4, min_limit=1, latency_target=2.0):
+        """
+        :param max_limit: 호스트당 최대 동시 요청 수
+        :param initial_limit: 처음 보는 호스트의 동시 요청 수
+        :param min_limit: 호스트당 최소 동시 요청 수
+        :param latency_target: 평균 응답 시간(초)이 이보다 길면 동시 요청 수를 늘리지 않습니다.
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.initial_limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.latency_target = latency_target
+        self.hosts = {}
+        self.cond = threading.Condition()
+
+    @staticmethod
+    def host_of(url):
+        return urlparse(str(url)).netloc.lower()
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = _HostState(self.initial_limit)
+            self.hosts[host] = state
+        return state
+
+    def acquire(self, host, stop_event=None):
+        """
+        host에 요청을 보낼 수 있을 때까지 기다립니다.
+        :return: True. 기다리는 동안 stop_event가 설정되면 False
+        """
+        with self.cond:
+            state = self._state(host)
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                wait_seconds = state.blocked_until - time.time()
+                if wait_seconds <= 0 and state.in_flight < int(state.limit):
+                    state.in_flight += 1
+                    return True
+                # stop_event를 확인할 수 있도록 길게 기다리지 않습니다.
+                self.cond.wait(timeout=min(0.5, wait_seconds) if wait_seconds > 0 else 0.5)
+
+    def try_acquire(self, host):
+        """
+        host에 자리가 있으면 기다리지 않고 하나를 잡습니다. (헤지 요청)
+        :return: 자리를 잡았으면 True
+        """
+        with self.cond:
+            state = self._state(host)
+            if state.blocked_until <= time.time() and state.in_flight < int(state.limit):
+                state.in_flight += 1
+                return True
+            return False
+
+    def release(self, host, ok, latency=None, overloaded=False, retry_after=None):
+        """
+        요청 결과를 반영하여 host의 동시 요청 수를 조절합니다.
+        :param ok: 요청이 성공했는지 여부
+        :param latency: 응답 헤더를 받을 때까지 걸린 시간(초)
+        :param overloaded: 429, 503, 타임아웃, 연결 끊김처럼 호스트가 과부하 상태임을 나타내는 실패
+        :param retry_after: Retry-After 헤더로 받은 대기 시간(초)
+        """
+        with self.cond:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+
+            if latency is not None:
+                state.latency = latency if state.latency is None else state.latency * 0.8 + latency * 0.2
+
+            if overloaded:
+                old_limit = int(state.limit)
+                state.limit = max(self.min_limit, state.limit / 2)
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until, time.time() + retry_after)
+                if int(state.limit) != old_limit or retry_after:
+                    print(f'호스트 과부하 감지 - {host}: 동시 요청 {old_limit} -> {int(state.limit)}'
+                          + (f', {retry_after:.0f}초 대기' if retry_after else ''))
+            elif ok and (state.latency is None or state.latency <= self.latency_target):
+                # 동시 요청 수만큼 성공할 때마다 1씩 늘어납니다.
+                state.limit = min(self.max_limit, state.limit + 1 / state.limit)
+
+            self.cond.notify_all()
+
+    def limits(self):
+        """호스트별 현재 동시 요청 수를 반환합니다."""
+        with self.cond:
+            return {host: int(state.limit) for host, state in self.hosts.items()}
+
+
+_limiter = None
+_limiter_pid = None
+_limiter_lock = threading.Lock()
+
+
+def get_host_limiter(max_limit=16):
+    """현재 프로세스의 호스트 동시 요청 제한기를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _limiter, _limiter_pid
+
+    with _limiter_lock:
+        if _limiter is None or _limiter_pid != os.getpid():
+            _limiter = HostLimiter(max_limit=max_limit)
+            _limiter_pid = os.getpid()
+        return _limiter
@@ -0,0 +1,64 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# 워커 프로세스마다 하나의 세션을 두고 모든 (키워드, 사이트) 작업이 공유합니다.
+# gstatic, pstatic 같은 소수의 CDN 호스트에 keep-alive 연결을 재사용하여
+# 이미지마다 TCP+TLS 핸드셰이크를 다시 하지 않도록 합니다.
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+# 연결 풀을 유지할 호스트 수
+NUM_POOL_HOSTS = 32
+
+
+def get_session(pool_size=16):
+    """
+    현재 프로세스의 공유 세션을 반환합니다. 처음 호출될 때 생성됩니다.
+    :param pool_size: 호스트당 유지할 최대 연결 수
+    """
+    global _session, _session_pid
+
+    # fork된 자식 프로세스는 부모의 소켓을 물려받으므로 새 세션을 만듭니다.
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=NUM_POOL_HOSTS, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+            _session_pid = os.getpid()
+            print(f'HTTP 세션 생성 (pid: {_session_pid}, 호스트당 연결 수: {pool_size})')
+    return _session
+
+
+def close_session():
+    """현재 프로세스의 공유 세션을 닫습니다."""
+    global _session, _session_pid
+
+    with _session_lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+        _session_pid = None
@@ -0,0 +1,136 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 응답 본문의 앞부분(매직 바이트)만 보고 이미지 형식을 판별합니다.
+# imghdr는 Python 3.13에서 제거되었으므로 사용하지 않습니다.
+
+# 형식을 판별하는 데 필요한 최소 바이트 수
+SNIFF_SIZE = 12
+
+
+def sniff_image_type(head):
+    """
+    :param head: 파일의 앞부분 바이트 (SNIFF_SIZE 이상)
+    :return: 'jpg', 'png', 'gif', 'webp' 중 하나. 이미지가 아니면 None
+    """
+    if head[:3] == b'\xff\xd8\xff':
+        return 'jpg'
+    if head[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def read_head(chunks, size=SNIFF_SIZE):
+    """
+    청크 이터레이터에서 앞부분 size 바이트 이상을 읽습니다.
+    :return: (앞부분 바이트, 나머지 청크 이터레이터)
+    """
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= size:
+            break
+    return head, chunks
+
+
+# 이미지 크기(가로, 세로)를 찾기 위해 읽을 최대 바이트 수. JPEG는 EXIF 뒤에 SOF가 있을 수 있습니다.
+DIMENSION_SNIFF_MAX = 128 * 1024
+
+# 크기 정보가 있는 JPEG SOF 마커 (DHT, JPG, DAC 제외)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_dimensions(head):
+    i = 2
+    while i + 4 <= len(head):
+        if head[i] != 0xFF:
+            return None
+        marker = head[i + 1]
+        if marker == 0xFF:  # 채움 바이트
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # 길이가 없는 마커
+            i += 2
+            continue
+        length = int.from_bytes(head[i + 2:i + 4], 'big')
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 > len(head):
+                return None
+            height = int.from_bytes(head[i + 5:i + 7], 'big')
+            width = int.from_bytes(head[i + 7:i + 9], 'big')
+            return width, height
+        if marker == 0xDA:  # SOS - SOF 없이 이미지 데이터가 시작됨
+            return None
+        i += 2 + length
+    return None
+
+
+def _webp_dimensions(head):
+    chunk = head[12:16]
+    if chunk == b'VP8X' and len(head) >= 30:
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    if chunk == b'VP8L' and len(head) >= 25:
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8 ' and len(head) >= 30:
+        width = int.from_bytes(head[26:28], 'little') & 0x3FFF
+        height = int.from_bytes(head[28:30], 'little') & 0x3FFF
+        return width, height
+    return None
+
+
+def image_dimensions(head):
+    """
+    파일 앞부분의 헤더(JPEG SOF, PNG IHDR, GIF, WebP)에서 이미지 크기를 읽습니다.
+    :param head: 파일의 앞부분 바이트
+    :return: (가로, 세로). 크기를 찾기에 바이트가 부족하거나 알 수 없는 형식이면 None
+    """
+    ext = sniff_image_type(head)
+    if ext == 'png':
+        if len(head) >= 24 and head[12:16] == b'IHDR':
+            return int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big')
+        return None
+    if ext == 'gif':
+        if len(head) >= 10:
+            return int.from_bytes(head[6:8], 'little'), int.from_bytes(head[8:10], 'little')
+        return None
+    if ext == 'jpg':
+        return _jpeg_dimensions(head)
+    if ext == 'webp':
+        return _webp_dimensions(head)
+    return None
+
+
+def read_dimensions(head, chunks, max_size=DIMENSION_SNIFF_MAX):
+    """
+    이미지 크기를 찾을 때까지 청크를 더 읽습니다. 최대 max_size 바이트까지만 읽습니다.
+    :return: ((가로, 세로) 또는 None, 지금까지 읽은 앞부분 바이트, 나머지 청크 이터레이터)
+    """
+    while True:
+        size = image_dimensions(head)
+        if size is not None or len(head) >= max_size:
+            return size, head, chunks
+        more, chunks = read_head(chunks, min(max(len(head), 4096), max_size - len(head)))
+        if not more:
+            return None, head, chunks
+        head += more
@@ -0,0 +1,152 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class ImageStore:
+    """
+    내용 주소 기반(content-addressed) 이미지 저장소.
+    같은 바이트의 이미지는 사이트나 키워드가 달라도 objects/ 아래에 한 번만 저장하고,
+    키워드 디렉토리에는 하드링크를 만듭니다. (하드링크를 지원하지 않는 파일 시스템에서는 복사)
+    인덱스는 SQLite 파일로 유지되므로 다시 실행해도 이미 저장된 이미지는 다시 쓰지 않습니다.
+    """
+
+    STATUS_STORED = 'stored'  # 새 이미지를 저장함
+    STATUS_LINKED = 'linked'  # 이미 저장된 이미지를 이 키워드에 연결함
+    STATUS_DUPLICATE = 'duplicate'  # 이 키워드에 이미 같은 이미지가 있음
+
+    def __init__(self, root):
+        """
+        :param root: 저장소 디렉토리 (예: download/.store)
+        """
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.index_path = os.path.join(root, 'index.sqlite3')
+        self.local = threading.local()
+        self.lock = threading.Lock()  # 같은 프로세스의 다운로드 스레드끼리 키워드 안의 중복을 막습니다.
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        with self.connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS blobs ('
+                         'hash TEXT PRIMARY KEY, ext TEXT, size INTEGER, created REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS refs ('
+                         'hash TEXT, keyword TEXT, path TEXT, PRIMARY KEY (hash, keyword))')
+
+    def connect(self):
+        """스레드마다 별도의 SQLite 연결을 사용합니다."""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=60)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+        return conn
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def add(self, fileobj, digest, ext, keyword, dest_no_ext):
+        """
+        이미지를 저장소에 추가하고 키워드 디렉토리에 연결합니다.
+        :param fileobj: 이미지 바이트를 읽을 수 있는 파일 객체 (처음부터 읽습니다)
+        :param digest: 이미지 바이트의 sha256 hex
+        :param ext: 확장자 (jpg, png, gif 등)
+        :param keyword: 키워드 (키워드 안의 중복 판단에 사용)
+        :param dest_no_ext: 확장자를 제외한 키워드 디렉토리 안의 파일 경로
+        :return: (상태, 파일 경로). 상태는 STATUS_* 중 하나
+        """
+        existing = self.find_ref(digest, keyword)
+        if existing is not None:
+            return self.STATUS_DUPLICATE, existing
+
+        blob = self.blob_path(digest)
+        status = self.STATUS_LINKED
+
+        if not os.path.exists(blob):
+            status = self.STATUS_STORED
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+
+            tmp = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+            fileobj.seek(0)
+            with open(tmp, 'wb') as f:
+                shutil.copyfileobj(fileobj, f)
+
+            # 다른 프로세스가 같은 이미지를 먼저 저장했을 수 있으므로 덮어쓰지 않는 link를 사용합니다.
+            try:
+                os.link(tmp, blob)
+            except FileExistsError:
+                status = self.STATUS_LINKED
+            except OSError:
+                os.replace(tmp, blob)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        with self.lock:
+            # 저장하는 동안 다른 스레드가 같은 이미지를 이 키워드에 연결했을 수 있습니다.
+            existing = self.find_ref(digest, keyword)
+            if existing is not None:
+                return self.STATUS_DUPLICATE, existing
+
+            path = dest_no_ext + '.' + ext
+            if os.path.exists(path):
+                os.remove(path)
+            try:
+                os.link(blob, path)
+            except OSError:
+                shutil.copyfile(blob, path)
+
+            conn = self.connect()
+            with conn:
+                conn.execute('INSERT OR IGNORE INTO blobs (hash, ext, size, created) VALUES (?, ?, ?, ?)',
+                             (digest, ext, os.path.getsize(blob), time.time()))
+                conn.execute('INSERT OR REPLACE INTO refs (hash, keyword, path) VALUES (?, ?, ?)',
+                             (digest, keyword, path))
+
+        return status, path
+
+    def find_ref(self, digest, keyword):
+        """키워드 디렉토리에 이미 연결된 같은 이미지의 경로를 반환합니다. 없으면 None"""
+        row = self.connect().execute('SELECT path FROM refs WHERE hash = ? AND keyword = ?',
+                                     (digest, keyword)).fetchone()
+        if row is not None and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+
+_stores = {}
+_stores_pid = None
+_stores_lock = threading.Lock()
+
+
+def get_image_store(root):
+    """현재 프로세스에서 root에 해당하는 ImageStore를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _stores, _stores_pid
+
+    with _stores_lock:
+        if _stores_pid != os.getpid():
+            _stores = {}
+            _stores_pid = os.getpid()
+        if root not in _stores:
+            _stores[root] = ImageStore(root)
+        return _stores[root]
@@ -0,0 +1,132 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 수집한 링크 목록을 키워드/사이트별 JSONL 파일로 주고받기 위한 모듈입니다.
+# Selenium 없이도 import 할 수 있어야 하므로 collect_links를 import 하지 않습니다.
+#
+# 파일 위치: <links_path>/<keyword>/<site>.jsonl
+# 한 줄에 링크 하나: {"keyword": "...", "site": "google", "url": "..."} (+ 추가 정보)
+# 수집 중에는 <site>.jsonl.part에 쓰고, 수집이 끝나면 <site>.jsonl로 이름을 바꿉니다.
+
+import os
+import json
+
+LINK_FILE_EXT = '.jsonl'
+PART_EXT = '.part'
+
+
+class ImageLink(str):
+    """가로, 세로를 함께 가진 이미지 링크. 일반 문자열처럼 URL로 쓸 수 있습니다."""
+
+    def __new__(cls, url, width, height, thumbnail=None):
+        link = super().__new__(cls, url)
+        link.width = width
+        link.height = height
+        link.thumbnail = thumbnail
+        return link
+
+    def __reduce__(self):
+        # 브라우저 워커에서 다운로드 프로세스로 보낼 때 크기도 함께 전달합니다.
+        return ImageLink, (str(self), self.width, self.height, self.thumbnail)
+
+
+def link_file_path(links_path, keyword, site):
+    return os.path.join(links_path, keyword.replace('"', ''), site + LINK_FILE_EXT)
+
+
+class LinkFileWriter:
+    """수집되는 링크를 JSONL 파일에 한 줄씩 기록합니다."""
+
+    def __init__(self, links_path, keyword, site):
+        self.keyword = keyword
+        self.site = site
+        self.path = link_file_path(links_path, keyword, site)
+        self.part_path = self.path + PART_EXT
+        self.count = 0
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.part_path, 'w', encoding='utf-8')
+
+    def write(self, url, **meta):
+        record = {'keyword': self.keyword, 'site': self.site, 'url': url}
+        record.update(meta)
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.count += 1
+
+    def close(self, complete=True):
+        """
+        :param complete: True이면 수집이 끝난 것으로 보고 .jsonl로 이름을 바꿉니다.
+                         False이면 .part 파일을 남겨 두어 다운로드 대상에서 제외됩니다.
+        """
+        self.file.close()
+        if complete:
+            os.replace(self.part_path, self.path)
+
+
+def read_link_file(path):
+    """JSONL 링크 파일의 레코드를 하나씩 yield 합니다. 깨진 줄은 건너뜁니다."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                print(f'링크 파일의 잘못된 줄 건너뛰기 - {path}: {line[:50]}')
+
+
+def iter_link_urls(path):
+    """
+    JSONL 링크 파일의 URL을 yield 합니다. 가로, 세로가 기록되어 있으면 ImageLink로 반환하여
+    다운로드할 때 --min-dim/--max-dim으로 요청 전에 거를 수 있게 합니다.
+    """
+    for record in read_link_file(path):
+        if not record.get('url'):
+            continue
+        if record.get('width') and record.get('height'):
+            yield ImageLink(record['url'], record['width'], record['height'])
+        else:
+            yield record['url']
+
+
+def find_link_files(links_path):
+    """
+    수집이 끝난 링크 파일을 모두 찾습니다.
+    :return: [(keyword, site, path)] 목록
+    """
+    found = []
+    if not os.path.isdir(links_path):
+        return found
+
+    for dir_name in sorted(os.listdir(links_path)):
+        dir_path = os.path.join(links_path, dir_name)
+        if not os.path.isdir(dir_path):
+            continue
+        for file_name in sorted(os.listdir(dir_path)):
+            if not file_name.endswith(LINK_FILE_EXT):
+                continue
+            path = os.path.join(dir_path, file_name)
+            site = file_name[:-len(LINK_FILE_EXT)]
+
+            # 키워드는 레코드에 기록된 원래 키워드를 사용합니다.
+            keyword = dir_name
+            for record in read_link_file(path):
+                keyword = record.get('keyword', dir_name)
+                break
+            found.append((keyword, site, path))
+    return found
@@ -0,0 +1,227 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 브라우저 워커(수집)와 I/O 풀(다운로드)을 나누어 실행하기 위한 모듈입니다.
+#
+#   브라우저 워커 프로세스 --(링크 배치)--> 크기가 제한된 큐 --> 메인 프로세스의 LinkDispatcher
+#                                                            --> (키워드, 사이트)별 TaskLinks --> 공유 다운로드 스레드 풀
+#
+# 큐 항목: (keyword, site_name, [링크, ...]). 링크 목록 대신 None이면 해당 작업의 수집이 끝났다는 뜻입니다.
+# 다운로더가 목표 개수를 채우면 stop_flags[(keyword, site_name)]를 설정하여 브라우저 워커의 스크롤을 멈춥니다.
+
+import queue
+import threading
+import time
+import traceback
+from metrics import get_metrics
+
+# 링크를 이 개수만큼 모으거나 FLUSH_SECONDS가 지나면 배치로 보냅니다.
+BATCH_SIZE = 16
+FLUSH_SECONDS = 1.0
+
+
+def _put(link_queue, item, stop_flags, key):
+    # 큐가 가득 찬 경우에도 중단 요청을 확인할 수 있도록 타임아웃을 두고 반복합니다.
+    while not stop_flags.get(key, False):
+        try:
+            link_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def send_batches(generator, link_queue, stop_flags, keyword, site_name):
+    """
+    제너레이터가 yield 하는 링크를 배치로 묶어 큐에 넣습니다. 브라우저 워커에서 실행됩니다.
+    다운로더가 중단을 요청하면 제너레이터를 닫아 스크롤을 멈춥니다.
+    :return: 보낸 링크 수
+    """
+    key = (keyword, site_name)
+    batch = []
+    sent = 0
+    last_flush = time.time()
+
+    try:
+        for link in generator:
+            batch.append(link)
+            if len(batch) < BATCH_SIZE and time.time() - last_flush < FLUSH_SECONDS:
+                continue
+            if not _put(link_queue, (keyword, site_name, batch), stop_flags, key):
+                batch = []
+                break
+            sent += len(batch)
+            batch = []
+            last_flush = time.time()
+
+        if batch and _put(link_queue, (keyword, site_name, batch), stop_flags, key):
+            sent += len(batch)
+
+    finally:
+        if hasattr(generator, 'close'):
+            generator.close()
+        # 끝 표시는 반드시 전달되어야 다운로더가 작업을 마칠 수 있습니다.
+        link_queue.put((keyword, site_name, None))
+
+    return sent
+
+
+class TaskLinks:
+    """
+    LinkDispatcher가 나눠 준 (키워드, 사이트)의 링크 배치를 download_images에 이터러블로 제공합니다.
+    close()를 호출하면 브라우저 워커에 수집 중단을 요청하고, 남은 배치는 버립니다.
+    """
+
+    def __init__(self, key, stop_flags, slots):
+        """
+        :param key: (keyword, site_name)
+        :param stop_flags: 브라우저 워커와 공유하는 중단 요청 딕셔너리 (Manager().dict())
+        :param slots: 메인 프로세스에 쌓아둘 수 있는 배치 수를 제한하는 세마포어
+        """
+        self.key = key
+        self.stop_flags = stop_flags
+        self.slots = slots
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def put(self, batch):
+        """배치를 추가합니다. None은 수집이 끝났다는 표시입니다. 이미 닫힌 작업의 배치는 버립니다."""
+        with self.lock:
+            if self.closed:
+                self.slots.release()
+                return
+            self.queue.put(batch)
+
+    def __iter__(self):
+        while not self.closed:
+            try:
+                batch = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.slots.release()
+            if batch is None:
+                return
+            for link in batch:
+                if self.closed:
+                    return
+                yield link
+
+    def close(self):
+        """다운로더가 더 이상 링크가 필요 없을 때 호출합니다. 수집을 중단시킵니다."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            try:
+                self.stop_flags[self.key] = True
+            except Exception as e:
+                print(f'수집 중단 요청 실패 - {e}')
+
+            # 아직 읽지 않은 배치가 차지한 자리를 돌려줍니다.
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.slots.release()
+
+
+class LinkDispatcher:
+    """
+    브라우저 워커가 보낸 링크 배치를 (키워드, 사이트)별 TaskLinks로 나누고,
+    작업마다 다운로드 스레드를 하나씩 실행합니다. 메인 프로세스에서 실행됩니다.
+    """
+
+    def __init__(self, run_task, stop_flags, max_batches=64):
+        """
+        :param run_task: run_task(keyword, site_name, links) - 작업 하나의 링크를 모두 다운로드하는 함수
+        :param stop_flags: 브라우저 워커와 공유하는 중단 요청 딕셔너리
+        :param max_batches: 메인 프로세스에 쌓아둘 수 있는 최대 배치 수.
+                            가득 차면 큐에서 꺼내지 않으므로 브라우저 워커의 수집이 잠시 멈춥니다.
+        """
+        self.run_task = run_task
+        self.stop_flags = stop_flags
+        self.slots = threading.BoundedSemaphore(max(1, max_batches))
+        self.tasks = {}
+        self.threads = []
+
+    def _run(self, keyword, site_name, links):
+        try:
+            self.run_task(keyword, site_name, links)
+        except Exception as e:
+            print(f'다운로드 작업 오류 {site_name}:{keyword} - {e}')
+            traceback.print_exc()
+        finally:
+            links.close()
+
+    def dispatch(self, item):
+        keyword, site_name, batch = item
+        key = (keyword, site_name)
+
+        links = self.tasks.get(key)
+        if links is None:
+            links = TaskLinks(key, self.stop_flags, self.slots)
+            self.tasks[key] = links
+            thread = threading.Thread(target=self._run, args=(keyword, site_name, links), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        links.put(batch)
+
+    def run(self, link_queue, result):
+        """
+        브라우저 워커가 모두 끝날 때까지 큐의 배치를 나눠 주고, 다운로드 스레드가 끝나기를 기다립니다.
+        :param link_queue: 브라우저 워커와 공유하는 큐
+        :param result: 브라우저 워커 풀의 AsyncResult
+        """
+        metrics = get_metrics()
+        last_report = 0
+        while True:
+            if metrics.enabled and time.time() - last_report >= 1.0:
+                last_report = time.time()
+                metrics.set_gauge('autocrawler_link_queue_batches', link_queue.qsize())
+                metrics.set_gauge('autocrawler_download_tasks_active', sum(t.is_alive() for t in self.threads))
+
+            self.slots.acquire()
+            try:
+                item = link_queue.get(timeout=0.5)
+            except queue.Empty:
+                self.slots.release()
+                if result.ready():
+                    break
+                continue
+            self.dispatch(item)
+
+        # 워커가 끝나기 직전에 넣은 배치를 마저 처리합니다.
+        while True:
+            self.slots.acquire()
+            try:
+                item = link_queue.get_nowait()
+            except queue.Empty:
+                self.slots.release()
+                break
+            self.dispatch(item)
+
+        for thread in self.threads:
+            thread.join()
+        metrics.set_gauge('autocrawler_link_queue_batches', 0)
+        metrics.set_gauge('autocrawler_download_tasks_active', 0)
+
+    def close_all(self):
+        """모든 작업의 수집과 다운로드를 중단합니다."""
+        for links in self.tasks.values():
+            links.close()
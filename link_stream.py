@@ -0,0 +1,84 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import queue
+import threading
+import traceback
+
+
+class LinkStream:
+    """
+    CollectLinks의 iter_* 제너레이터를 백그라운드 스레드에서 실행하고,
+    수집된 링크를 크기가 제한된 큐를 통해 다운로더에 전달합니다.
+    스크롤(수집)과 다운로드가 동시에 진행됩니다.
+    """
+
+    _END = object()
+
+    def __init__(self, generator, maxsize=1000):
+        """
+        :param generator: 링크를 yield 하는 제너레이터 (예: CollectLinks.iter_google)
+        :param maxsize: 큐에 쌓아둘 수 있는 최대 링크 수. 가득 차면 수집이 잠시 멈춥니다.
+        """
+        self.generator = generator
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        # 큐가 가득 찬 경우에도 중단 요청을 확인할 수 있도록 타임아웃을 두고 반복합니다.
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for link in self.generator:
+                if not self._put(link):
+                    break
+        except Exception as e:
+            print(f'링크 수집 스레드 오류: {e}')
+            traceback.print_exc()
+        finally:
+            # 제너레이터를 닫으면 스크롤을 멈추고 브라우저를 종료합니다.
+            try:
+                if hasattr(self.generator, 'close'):
+                    self.generator.close()
+            except Exception as e:
+                print(f'링크 수집 종료 중 오류: {e}')
+            self._put(self._END)
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                if not self.thread.is_alive() and self.queue.empty():
+                    return
+                continue
+            if item is self._END:
+                return
+            yield item
+
+    def close(self):
+        """다운로더가 더 이상 링크가 필요 없을 때 호출합니다. 수집을 중단시킵니다."""
+        self.stop_event.set()
+        self.thread.join()
@@ -17,18 +17,49 @@ Copyright 2018 YoongiKim
 import os
 import requests
 import shutil
-from multiprocessing import Pool
+import multiprocessing
+from multiprocessing import Pool, Manager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import threading
 import signal
 import argparse
-from collect_links import CollectLinks
-import imghdr
+from link_stream import LinkStream
+from link_pipeline import LinkDispatcher, send_batches
+from http_session import get_session
+from host_limiter import get_host_limiter, HostLimiter, parse_retry_after
+from hedged_request import hedged_get, get_latency_tracker, TaskTiming
+from image_store import get_image_store, ImageStore
+from crawl_state import get_crawl_state, CrawlState
+from link_files import LinkFileWriter, link_file_path, iter_link_urls, find_link_files
+from shard_writer import write_sample, close_shard_writer, close_shard_writers, split_member_ref, ShardMember, SHARD_PREFIX
+from image_sniff import sniff_image_type, read_head, read_dimensions
+from metrics import get_metrics, MetricsServer
+from trace_profile import span, get_profiler, merge_trace, parts_directory, clear_parts
+from naver_http import NaverHttpCollector
+from task_queue import get_task_queue, worker_id, Heartbeat, TaskQueue
+import hashlib
+import tarfile
+import time
+import tempfile
+import itertools
 import base64
-from pathlib import Path
 import random
 import traceback
 import platform
 import sys
-from urllib3.exceptions import ReadTimeoutError, ConnectTimeoutError
+from http.client import IncompleteRead
+from urllib3.exceptions import ReadTimeoutError, ConnectTimeoutError, ProtocolError, HTTPError
+
+# 다시 시도할 HTTP 응답 코드와 백오프 시간(초)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 10.0
+
+# 공유 작업 큐에 대기 중인 작업이 없을 때 다른 워커의 작업을 기다리는 간격(초)
+QUEUE_POLL_SECONDS = 10
+
+# 다운로드 디렉토리를 다시 훑을 때(--rescan) 이미지로 세는 확장자
+IMAGE_EXTENSIONS = ('jpg', 'png', 'gif', 'webp')
 
 
 class Sites:
@@ -58,10 +89,16 @@ class Sites:
 
 class AutoCrawler:
     def __init__(self, skip_already_exist=True, n_threads=4, do_google=True, do_naver=True, download_path='download',
-                 full_resolution=False, face=False, no_gui=False, limit=0, proxy_list=None):
+                 full_resolution=False, face=False, no_gui=False, limit=0, proxy_list=None, n_download_threads=8,
+                 http_pool_size=16, reuse_browser=True, diagnostics=False, scroll_quiet=3.0, dedup=False,
+                 mode='all', links_path='links', capture=False, n_io_threads=32, link_queue_size=64,
+                 host_limit=16, retries=2, hedge=False, min_bytes=0, max_bytes=0, min_dim=0, max_dim=0,
+                 output='files', shard_size=1024, shard_by='keyword', metrics_port=0, metrics_summary='',
+                 profile='', search_urls=None, full_source='page', naver_backend='selenium', naver_fallback=True,
+                 task_queue='', lease_seconds=300):
         """
         :param skip_already_exist: Skips keyword already downloaded before. This is needed when re-downloading.
-        :param n_threads: Number of threads to download.
+        :param n_threads: Number of browser worker processes (each runs one Chrome).
         :param do_google: Download from google.com (boolean)
         :param do_naver: Download from naver.com (boolean)
         :param download_path: Download folder path
@@ -69,7 +106,58 @@ class AutoCrawler:
         :param face: Face search mode
         :param no_gui: No GUI mode. Acceleration for full_resolution mode.
         :param limit: Maximum count of images to download. (0: infinite)
-        :param proxy_list: The proxy list. Every thread will randomly choose one from the list.
+        :param proxy_list: The proxy list. Every task will randomly choose one from the list.
+        :param n_download_threads: Number of concurrent image requests per (keyword, site) task.
+        :param http_pool_size: Number of keep-alive connections kept per host by each worker's HTTP session.
+        :param reuse_browser: Keep Chrome running in each worker and reuse it for the next (keyword, site) task.
+        :param diagnostics: Print ChromeDriver file, signature and version information whenever Chrome starts.
+        :param scroll_quiet: Stop scrolling once the result grid has not grown for this many seconds.
+        :param dedup: Store identical images once in a content-addressed store and hardlink them into keyword folders.
+        :param mode: 'all' (collect and download), 'collect' (only write link lists) or
+                     'download' (only download from link lists, without Selenium)
+        :param links_path: Folder of the per-keyword/site JSONL link lists used by 'collect' and 'download' modes
+        :param capture: Take image bytes the browser already loaded (DevTools network events) instead of
+                        downloading them again
+        :param n_io_threads: Size of the download thread pool shared by all tasks in the main process.
+                             Browser workers only collect links and send them in batches. (0: download in each
+                             browser worker as before)
+        :param link_queue_size: Maximum number of link batches waiting between browser workers and the download pool
+        :param host_limit: Upper bound of concurrent requests per image host. The actual limit adapts (AIMD) to
+                           latency, 429/503 responses, timeouts and Retry-After. (0: no per-host limit)
+        :param retries: Number of retries with jittered exponential backoff for timeouts, connection errors and
+                        429/5xx responses.
+        :param hedge: Send a duplicate request when the response is slower than the p95 seen so far and use
+                      whichever arrives first.
+        :param min_bytes: Skip images smaller than this many bytes (Content-Length). (0: no limit)
+        :param max_bytes: Skip images larger than this many bytes (Content-Length). (0: no limit)
+        :param min_dim: Skip images whose width or height is smaller than this, read from the image header. (0: no limit)
+        :param max_dim: Skip images whose width or height is larger than this, read from the image header. (0: no limit)
+        :param output: 'files' (one file per image, default) or 'tar' (append images and JSON metadata to rolling
+                       WebDataset-style tar shards)
+        :param shard_size: Maximum size of one tar shard in MB
+        :param shard_by: 'keyword' (shards in each keyword folder) or 'global' (shards in the download folder)
+        :param metrics_port: Serve throughput and per-stage latency metrics in Prometheus text format on
+                             http://127.0.0.1:<port>/metrics while crawling. (0: no endpoint)
+        :param metrics_summary: Write a JSON summary of the metrics here when the crawl ends.
+                                (default with metrics_port: <download_path>/metrics_summary.json)
+        :param profile: Record timed spans of every crawl phase (browser start, page load, scrolling, link
+                        extraction, requests, validation, writes) per worker and task, and write them here as
+                        Chrome trace-event JSON for Perfetto or chrome://tracing. ('': no profiling)
+        :param search_urls: Override the search page URL per site ('google', 'naver', 'google_full', 'naver_full'),
+                            e.g. to point the browser at the local fake search engine of benchmark.py.
+        :param full_source: How Google full resolution URLs are collected. 'page' (scroll the grid once and read all
+                            original URLs and sizes from the page's embedded data, clicking through only if none are
+                            found) or 'viewer' (open every image in the viewer)
+        :param naver_backend: How Naver links are collected. 'selenium' (scroll the result page in Chrome) or 'http'
+                              (page through Naver's JSON image search responses with the worker's HTTP session,
+                              no browser). search_urls['naver_api'] overrides the endpoint.
+        :param naver_fallback: With naver_backend='http', collect with Selenium when the first JSON page fails or
+                               has no results.
+        :param task_queue: Shared work queue ('sqlite:///<path>' or a SQLite file path on a volume every node can
+                           reach). Each node adds its keywords.txt tasks, then its workers lease (keyword, site) tasks
+                           one at a time until the queue is empty, so many hosts can split one job. ('': local only)
+        :param lease_seconds: A leased task is handed to another worker if its lease is not renewed for this long.
+                              Workers renew it every lease_seconds / 3 while the task runs.
         """
 
         self.skip = skip_already_exist
@@ -82,6 +170,44 @@ class AutoCrawler:
         self.no_gui = no_gui
         self.limit = limit
         self.proxy_list = proxy_list if proxy_list and len(proxy_list) > 0 and proxy_list[0] else None
+        self.n_download_threads = max(1, n_download_threads)
+        self.n_io_threads = max(0, n_io_threads)
+        self.link_queue_size = max(1, link_queue_size)
+        self.host_limit = max(0, host_limit)
+        self.retries = max(0, retries)
+        self.hedge = hedge
+        self.min_bytes = max(0, min_bytes)
+        self.max_bytes = max(0, max_bytes)
+        self.min_dim = max(0, min_dim)
+        self.max_dim = max(0, max_dim)
+        self.output = output
+        self.shard_size = max(1, shard_size) * 1024 * 1024
+        self.shard_by = shard_by
+        self.metrics_port = max(0, metrics_port)
+        if self.metrics_port and not metrics_summary:
+            metrics_summary = os.path.join(download_path, 'metrics_summary.json')
+        self.metrics_summary = metrics_summary
+        self.profile = profile
+        self.search_urls = search_urls
+        self.full_source = full_source
+        self.naver_backend = naver_backend
+        self.naver_fallback = naver_fallback
+        self.task_queue = task_queue
+        self.lease_seconds = max(10, lease_seconds)
+        self.http_pool_size = max(self.n_download_threads, self.n_io_threads, http_pool_size)
+        self.reuse_browser = reuse_browser
+        self.diagnostics = diagnostics
+        self.scroll_quiet = scroll_quiet
+        self.dedup = dedup
+        self.store_path = os.path.join(self.download_path, '.store')
+        self.state_path = os.path.join(self.download_path, 'crawl_state.sqlite3')
+        self.mode = mode
+        self.links_path = links_path
+        self.capture = capture and mode == 'all'  # 링크 목록만 저장하는 collect 모드에서는 필요 없습니다.
+        self.driver_path = None  # do_crawling에서 한 번만 찾아서 워커에 전달합니다.
+        self.link_queue = None  # 분리 실행 시 브라우저 워커 -> 다운로드 풀 큐 (Manager().Queue())
+        self.stop_flags = None  # 분리 실행 시 다운로더 -> 브라우저 워커 수집 중단 요청 (Manager().dict())
+        self.lease = None  # 공유 작업 큐에서 처리 중인 작업의 Heartbeat (--task-queue)
 
         # 시스템 정보 출력
         self.print_system_info()
@@ -98,16 +224,58 @@ class AutoCrawler:
         print(f"현재 작업 디렉토리: {os.getcwd()}")
         print("=== 프로그램 설정 ===")
         print(f"건너뛰기: {self.skip}")
-        print(f"스레드 수: {self.n_threads}")
+        print(f"브라우저 워커 수: {self.n_threads}")
         print(f"Google 사용: {self.do_google}")
         print(f"Naver 사용: {self.do_naver}")
         print(f"전체 해상도: {self.full_resolution}")
+        if self.full_resolution:
+            print(f"구글 원본 URL 수집 방식: {self.full_source}")
+        if self.do_naver:
+            print(f"네이버 수집 방식: {self.naver_backend}"
+                  + (f" (실패 시 Selenium: {self.naver_fallback})" if self.naver_backend == 'http' else ''))
         print(f"얼굴 검색: {self.face}")
         print(f"GUI 없음: {self.no_gui}")
         print(f"이미지 제한: {self.limit if self.limit > 0 else '무제한'}")
         print(f"프록시 목록: {self.proxy_list}")
+        print(f"작업당 동시 다운로드 수: {self.n_download_threads}")
+        print(f"호스트당 HTTP 연결 수: {self.http_pool_size}")
+        print(f"브라우저 재사용: {self.reuse_browser}")
+        print(f"스크롤 정지 판단 시간: {self.scroll_quiet}초")
+        print(f"중복 제거 저장소: {self.dedup}")
+        print(f"실행 모드: {self.mode}")
+        print(f"브라우저 응답 재사용: {self.capture}")
+        print(f"호스트당 최대 동시 요청 수: {self.host_limit if self.host_limit > 0 else '무제한'}")
+        print(f"다운로드 재시도 횟수: {self.retries}")
+        print(f"헤지 요청: {self.hedge}")
+        if self.min_bytes or self.max_bytes or self.min_dim or self.max_dim:
+            print(f"크기 필터: {self.min_bytes}~{self.max_bytes or '무제한'} 바이트, "
+                  f"{self.min_dim}~{self.max_dim or '무제한'} 픽셀")
+        print(f"저장 방식: {self.output}")
+        if self.output == 'tar':
+            print(f"샤드 크기: {self.shard_size // (1024 * 1024)}MB ({self.shard_by})")
+        if self.staged():
+            print(f"다운로드 풀 스레드 수: {self.n_io_threads}")
+            print(f"링크 배치 큐 크기: {self.link_queue_size}")
+        if self.mode != 'all':
+            print(f"링크 목록 경로: {self.links_path}")
+        if self.metrics_enabled():
+            print(f"지표 포트: {self.metrics_port if self.metrics_port else '없음'}")
+            print(f"지표 요약 파일: {self.metrics_summary}")
+        if self.profile:
+            print(f"프로파일 파일: {self.profile}")
+        if self.task_queue:
+            print(f"공유 작업 큐: {self.task_queue} (임대 {self.lease_seconds}초)")
         print("===================")
 
+    def metrics_enabled(self):
+        """크롤링 지표를 모으는지 여부"""
+        return bool(self.metrics_port or self.metrics_summary)
+
+    def staged(self):
+        """브라우저 워커 풀(수집)과 다운로드 풀을 나누어 실행하는지 여부"""
+        # 공유 작업 큐를 쓰면 작업을 임대한 워커가 다운로드까지 마쳐야 결과를 보고할 수 있습니다.
+        return self.mode == 'all' and self.n_io_threads > 0 and not self.task_queue
+
     @staticmethod
     def all_dirs(path):
         """지정된 경로의 모든 디렉토리 목록을 반환합니다."""
@@ -115,7 +283,8 @@ class AutoCrawler:
         try:
             for dir in os.listdir(path):
                 dir_path = os.path.join(path, dir)
-                if os.path.isdir(dir_path):
+                # .store 같은 숨김 디렉토리는 키워드 디렉토리가 아닙니다.
+                if os.path.isdir(dir_path) and not dir.startswith('.'):
                     paths.append(dir_path)
         except Exception as e:
             print(f"디렉토리 목록 가져오기 오류: {e}")
@@ -128,47 +297,13 @@ class AutoCrawler:
         try:
             for root, dirs, files in os.walk(path):
                 for file in files:
-                    file_path = os.path.join(path, file)
+                    file_path = os.path.join(root, file)
                     if os.path.isfile(file_path):
                         paths.append(file_path)
         except Exception as e:
             print(f"파일 목록 가져오기 오류: {e}")
         return paths
 
-    @staticmethod
-    def get_extension_from_link(link, default='jpg'):
-        """URL에서 파일 확장자를 추출합니다."""
-        try:
-            splits = str(link).split('.')
-            if len(splits) == 0:
-                return default
-            ext = splits[-1].lower()
-            # 확장자에 추가 파라미터가 있는 경우 제거 (예: .jpg?param=value)
-            if '?' in ext:
-                ext = ext.split('?')[0]
-            if ext == 'jpg' or ext == 'jpeg':
-                return 'jpg'
-            elif ext == 'gif':
-                return 'gif'
-            elif ext == 'png':
-                return 'png'
-            else:
-                return default
-        except Exception:
-            return default
-
-    @staticmethod
-    def validate_image(path):
-        """이미지 파일의 유효성을 검사합니다."""
-        try:
-            ext = imghdr.what(path)
-            if ext == 'jpeg':
-                ext = 'jpg'
-            return ext  # 유효하지 않은 경우 None 반환
-        except Exception as e:
-            print(f"이미지 유효성 검사 오류: {e}")
-            return None
-
     @staticmethod
     def make_dir(dirname):
         """디렉토리를 생성합니다."""
@@ -214,8 +349,14 @@ class AutoCrawler:
         return keywords
 
     @staticmethod
-    def save_object_to_file(object, file_path, is_base64=False):
-        """객체를 파일로 저장합니다."""
+    def save_object_to_file(chunks, file_path, stop_event=None):
+        """
+        청크들을 파일로 저장합니다. 파일은 한 번만 열고 순서대로 씁니다.
+        stop_event가 설정되면 None을 반환합니다. 본문을 받다가 연결이 끊기거나 시간이 초과되면
+        download_once가 다시 시도할 수 있도록 예외를 그대로 발생시킵니다.
+        끝까지 저장하지 못한 경우에는 받던 파일을 지웁니다. (잘린 이미지가 남지 않도록)
+        """
+        saved = False
         try:
             # 디렉토리 경로 확인 및 생성
             directory = os.path.dirname(file_path)
@@ -223,14 +364,61 @@ class AutoCrawler:
                 os.makedirs(directory)
 
             with open('{}'.format(file_path), 'wb') as file:
-                if is_base64:
-                    file.write(object)
-                else:
-                    shutil.copyfileobj(object.raw, file)
+                for chunk in chunks:
+                    if stop_event is not None and stop_event.is_set():
+                        return None
+                    file.write(chunk)
+
+            saved = True
             return True
+        except (requests.exceptions.RequestException, HTTPError, IncompleteRead):
+            raise
         except Exception as e:
             print(f'파일 저장 실패 - {e}')
             return False
+        finally:
+            if not saved and os.path.exists(file_path):
+                os.remove(file_path)
+
+    @staticmethod
+    def read_to_buffer(chunks, stop_event=None):
+        """
+        청크들을 받으면서 sha256을 계산합니다. 작은 이미지는 메모리에, 큰 이미지는 임시 파일에 둡니다.
+        :return: (버퍼, sha256 hex). stop_event가 설정되면 None
+        """
+        buffer = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        sha = hashlib.sha256()
+
+        for chunk in chunks:
+            if stop_event is not None and stop_event.is_set():
+                buffer.close()
+                return None
+            sha.update(chunk)
+            buffer.write(chunk)
+
+        buffer.seek(0)
+        return buffer, sha.hexdigest()
+
+    def bytes_filter_reason(self, size):
+        """이미지 크기(바이트)가 필터를 통과하지 못하면 이유를, 통과하면 None을 반환합니다."""
+        if size is None:
+            return None
+        if self.min_bytes and size < self.min_bytes:
+            return f'{size} 바이트 < {self.min_bytes}'
+        if self.max_bytes and size > self.max_bytes:
+            return f'{size} 바이트 > {self.max_bytes}'
+        return None
+
+    def dimension_filter_reason(self, dimensions):
+        """이미지 가로, 세로가 필터를 통과하지 못하면 이유를, 통과하면(또는 알 수 없으면) None을 반환합니다."""
+        if dimensions is None:
+            return None
+        width, height = dimensions
+        if self.min_dim and min(width, height) < self.min_dim:
+            return f'{width}x{height} < {self.min_dim}'
+        if self.max_dim and max(width, height) > self.max_dim:
+            return f'{width}x{height} > {self.max_dim}'
+        return None
 
     @staticmethod
     def base64_to_object(src):
@@ -243,99 +431,450 @@ class AutoCrawler:
             print(f"Base64 디코딩 오류: {e}")
             return None
 
-    def download_images(self, keyword, links, site_name, max_count=0):
-        """이미지 URL 목록에서 이미지를 다운로드합니다."""
-        keyword_dir = self.make_dir('{}/{}'.format(self.download_path, keyword.replace('"', '')))
-        total = len(links)
-        success_count = 0
-        fail_count = 0
+    def download_image(self, keyword, index, link, site_name, stop_event=None, timing=None):
+        """
+        이미지 하나를 다운로드합니다. 다운로드 스레드에서 실행됩니다.
+        타임아웃, 연결 오류, 429/5xx 응답은 최대 retries번까지 지터를 준 지수 백오프 후 다시 시도합니다.
+        :param timing: 작업의 다운로드 시간 통계를 기록할 TaskTiming
+        :return: (결과, 저장 경로, 오류). 결과는 True(성공), False(실패), None(중단됨 또는 중복)
+        """
+        metrics = get_metrics()
+        metrics.add_gauge('autocrawler_downloads_in_flight', 1)
+        started = time.time()
+        try:
+            result, path, error = self.download_with_retries(keyword, index, link, site_name, stop_event, timing)
+        finally:
+            metrics.add_gauge('autocrawler_downloads_in_flight', -1)
+
+        if timing is not None and result is not None:
+            timing.add_latency(time.time() - started)
+        if metrics.enabled:
+            self.record_download_metrics(link, site_name, result, path, error, time.time() - started)
+        return result, path, error
+
+    def download_with_retries(self, keyword, index, link, site_name, stop_event=None, timing=None):
+        """download_once를 retries번까지 다시 시도합니다. :return: (결과, 저장 경로, 오류)"""
+        attempt = 0
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None, None, None
+
+            result, path, error, retry_after = self.download_once(keyword, index, link, site_name, stop_event, timing)
+            if retry_after is None or attempt >= self.retries:
+                break
 
-        if max_count == 0:
-            max_count = total
+            # 지터를 준 지수 백오프. 서버가 Retry-After를 보냈으면 그보다 일찍 다시 요청하지 않습니다.
+            backoff = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt))
+            delay = max(backoff / 2 + random.uniform(0, backoff / 2), retry_after)
+            attempt += 1
+            print(f'다시 시도 {attempt}/{self.retries} ({delay:.1f}초 후) - {error}')
+            if timing is not None:
+                timing.add_retry()
+
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return None, None, None
+            else:
+                time.sleep(delay)
 
-        for index, link in enumerate(links):
-            if success_count >= max_count:
-                break
+        return result, path, error
 
-            try:
-                print('다운로드 중 {} from {}: {} / {}'.format(keyword, site_name, success_count + 1, max_count))
-
-                if str(link).startswith('data:image/jpeg;base64'):
-                    response = self.base64_to_object(link)
-                    ext = 'jpg'
-                    is_base64 = True
-                elif str(link).startswith('data:image/png;base64'):
-                    response = self.base64_to_object(link)
-                    ext = 'png'
-                    is_base64 = True
-                else:
-                    response = requests.get(link, stream=True, timeout=10)
-                    ext = self.get_extension_from_link(link)
-                    is_base64 = False
+    @staticmethod
+    def record_download_metrics(link, site_name, result, path, error, seconds):
+        """다운로드 하나의 결과, 시간, 바이트 수를 지표에 기록합니다. 중단된 다운로드는 기록하지 않습니다."""
+        if result:
+            outcome = 'success'
+        elif result is False:
+            outcome = 'timeout' if error and error.startswith('타임아웃') else 'fail'
+        elif error in (CrawlState.STATUS_FILTERED, CrawlState.STATUS_DUPLICATE):
+            outcome = error
+        else:
+            return
+
+        if getattr(link, 'body', None):
+            host = 'capture'
+        elif str(link).startswith('data:'):
+            host = 'data'
+        else:
+            host = HostLimiter.host_of(link)
+
+        metrics = get_metrics()
+        metrics.inc('autocrawler_downloads_total', site=site_name, host=host, result=outcome)
+        metrics.observe('autocrawler_download_seconds', seconds, site=site_name)
+        if result:
+            size = path.size if isinstance(path, ShardMember) else os.path.getsize(path)
+            metrics.inc('autocrawler_download_bytes_total', size, site=site_name, host=host)
+
+    def download_once(self, keyword, index, link, site_name, stop_event=None, timing=None):
+        """
+        이미지 하나를 한 번 다운로드합니다.
+        응답의 첫 바이트로 이미지 형식을 먼저 판별하므로, 이미지가 아닌 응답은 디스크에 쓰지 않고
+        파일은 올바른 확장자로 한 번에 저장됩니다.
+        :return: (결과, 저장 경로, 오류, retry_after). retry_after는 다시 시도할 수 있는 실패이면
+                 최소 대기 시간(초), 그렇지 않으면 None
+        """
+        response = None
+        limiter = None
+        host = None
+        latency = None
+        overloaded = False
+        retry_after = None
+        try:
+            print('다운로드 중 {} from {}: #{}'.format(keyword, site_name, index))
+
+            if (self.min_dim or self.max_dim) and getattr(link, 'width', None):
+                # 검색 결과 데이터에 크기가 있으면 요청하기 전에 거릅니다. (--full-source page)
+                reason = self.dimension_filter_reason((link.width, link.height))
+                if reason is not None:
+                    print(f'크기 필터로 건너뛰기 ({reason}) - {link}')
+                    return None, None, CrawlState.STATUS_FILTERED, None
+
+            if getattr(link, 'body', None):
+                # 브라우저가 페이지를 그리면서 이미 받은 이미지 (--capture)
+                chunks = [link.body]
+                length = len(link.body)
+            elif str(link).startswith('data:image/'):
+                data = self.base64_to_object(link)
+                if data is None:
+                    return False, None, 'Base64 디코딩 오류', None
+                chunks = [data]
+                length = len(data)
+            else:
+                if self.host_limit > 0:
+                    # 호스트별 동시 요청 수 제한 - 자리가 날 때까지 기다립니다.
+                    limiter = get_host_limiter(self.host_limit)
+                    host = HostLimiter.host_of(link)
+                    if not limiter.acquire(host, stop_event):
+                        host = None
+                        return None, None, None, None
+
+                # 응답이 지금까지의 p95보다 늦으면 같은 요청을 한 번 더 보냅니다. (--hedge)
+                tracker = get_latency_tracker()
+                hedge_after = tracker.percentile(95) if self.hedge else None
+                started = time.time()
+                with span('requests.get', 'download', keyword=keyword, site=site_name, index=index):
+                    response = hedged_get(get_session(self.http_pool_size), link, timeout=10,
+                                          hedge_after=hedge_after, tracker=tracker, timing=timing,
+                                          limiter=limiter if host is not None else None, host=host)
+                latency = time.time() - started
+
+                if response.status_code in (429, 503):
+                    overloaded = True
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
 
                 # 응답 코드 확인 (Base64가 아닌 경우)
-                if not is_base64 and response.status_code != 200:
+                if response.status_code != 200:
                     print(f'다운로드 실패: HTTP {response.status_code} - {link}')
-                    fail_count += 1
-                    continue
+                    retry = (retry_after or 0.0) if response.status_code in RETRY_STATUS_CODES else None
+                    return False, None, f'HTTP {response.status_code}', retry
+
+                content_length = response.headers.get('Content-Length', '')
+                length = int(content_length) if content_length.isdigit() else None
+                chunks = response.iter_content(chunk_size=64 * 1024)
+
+            # 크기 필터 - 본문을 받기 전에 Content-Length로 먼저 거릅니다. 연결은 finally에서 끊습니다.
+            reason = self.bytes_filter_reason(length)
+            if reason is not None:
+                print(f'크기 필터로 건너뛰기 ({reason}) - {link}')
+                return None, None, CrawlState.STATUS_FILTERED, None
+
+            # 이미지 유효성 검사 - 첫 바이트만 보고 이미지가 아니면 바로 중단합니다.
+            with span('validate', 'download', keyword=keyword, site=site_name, index=index):
+                head, chunks = read_head(chunks)
+                ext = sniff_image_type(head)
+                dimensions = None
+                if ext is not None and (self.min_dim or self.max_dim):
+                    # 이미지 헤더(JPEG SOF, PNG IHDR, GIF)에서 가로, 세로를 읽을 때까지만 받습니다.
+                    dimensions, head, chunks = read_dimensions(head, chunks)
+
+            if ext is None:
+                print('읽을 수 없는 파일 - {}'.format(link))
+                return False, None, '읽을 수 없는 파일', None
+
+            if self.min_dim or self.max_dim:
+                reason = self.dimension_filter_reason(dimensions)
+                if reason is not None:
+                    print(f'크기 필터로 건너뛰기 ({reason}) - {link}')
+                    return None, None, CrawlState.STATUS_FILTERED, None
+
+            chunks = itertools.chain([head], chunks)
+            no_ext_path = '{}/{}/{}_{}'.format(self.download_path.replace('"', ''), keyword, site_name,
+                                               str(index).zfill(4))
+
+            # 본문은 스트리밍으로 받으므로 저장 구간에는 남은 본문을 받는 시간도 포함됩니다.
+            with span('write', 'download', keyword=keyword, site=site_name, index=index, output=self.output):
+                if self.output == 'tar':
+                    return self.write_to_shard(keyword, index, link, site_name, chunks, ext, stop_event) + (None,)
+
+                if self.dedup:
+                    return self.store_image(keyword, chunks, ext, no_ext_path, stop_event) + (None,)
 
-                no_ext_path = '{}/{}/{}_{}'.format(self.download_path.replace('"', ''), keyword, site_name,
-                                                   str(index).zfill(4))
                 path = no_ext_path + '.' + ext
+                saved = self.save_object_to_file(chunks, path, stop_event=stop_event)
+
+            if saved is None:
+                return None, None, None, None
+            if not saved:
+                return False, None, '파일 저장 실패', None
+
+            return True, path, None, None
+
+        except (ReadTimeoutError, ConnectTimeoutError, requests.exceptions.ReadTimeout,
+                requests.exceptions.ConnectTimeout) as e:
+            overloaded = True
+            print(f'다운로드 타임아웃 - {e}')
+            return False, None, f'타임아웃: {e}', 0.0
+
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, ProtocolError,
+                IncompleteRead) as e:
+            # 연결이 끊기거나 거부된 경우도 호스트 과부하로 봅니다.
+            overloaded = True
+            print(f'다운로드 실패 - {e}')
+            return False, None, str(e), 0.0
+
+        except Exception as e:
+            print(f'다운로드 실패 - {e}')
+            return False, None, str(e), None
 
-                if self.save_object_to_file(response, path, is_base64=is_base64):
+        finally:
+            if response is not None:
+                response.close()
+            if host is not None:
+                ok = response is not None and response.status_code == 200 and not overloaded
+                limiter.release(host, ok, latency=latency, overloaded=overloaded, retry_after=retry_after)
+
+    def write_to_shard(self, keyword, index, link, site_name, chunks, ext, stop_event):
+        """
+        이미지를 받아 tar 샤드에 이미지와 JSON 메타데이터를 이어 씁니다. (--output tar)
+        :return: (결과, ShardMember, 오류)
+        """
+        buffered = self.read_to_buffer(chunks, stop_event=stop_event)
+        if buffered is None:
+            return None, None, None
+        buffer, digest = buffered
+
+        sanitized_keyword = keyword.replace('"', '')
+        key = '{}_{}'.format(site_name, str(index).zfill(4))
+        if self.shard_by == 'global':
+            directory = self.download_path.replace('"', '')
+            key = '{}/{}'.format(sanitized_keyword, key)
+            prefix = SHARD_PREFIX
+        else:
+            # 같은 키워드의 사이트별 작업은 따로 끝나므로 샤드도 사이트별로 씁니다.
+            directory = '{}/{}'.format(self.download_path.replace('"', ''), sanitized_keyword)
+            prefix = site_name
+
+        try:
+            buffer.seek(0, os.SEEK_END)
+            size = buffer.tell()
+            meta = {'keyword': keyword, 'site': site_name, 'index': index, 'url': CrawlState.url_key(link),
+                    'ext': ext, 'bytes': size, 'sha256': digest}
+            member = write_sample(directory, self.shard_size, key, ext, buffer, size, meta, prefix)
+        finally:
+            buffer.close()
+        return True, member, None
+
+    @staticmethod
+    def stored_exists(path):
+        """저장된 이미지(파일 또는 샤드 멤버)가 남아 있는지 확인합니다."""
+        return os.path.exists(split_member_ref(path)[0])
+
+    def store_image(self, keyword, chunks, ext, no_ext_path, stop_event):
+        """
+        이미지를 받으면서 해시를 계산하고 내용 주소 기반 저장소에 저장합니다.
+        같은 키워드에 이미 같은 이미지가 있으면 저장하지 않고 (None, 기존 경로, 'duplicate')를 반환합니다.
+        """
+        buffered = self.read_to_buffer(chunks, stop_event=stop_event)
+        if buffered is None:
+            return None, None, None
+        buffer, digest = buffered
+
+        try:
+            store = get_image_store(self.store_path)
+            status, path = store.add(buffer, digest, ext, keyword, no_ext_path)
+        finally:
+            buffer.close()
+
+        if status == ImageStore.STATUS_DUPLICATE:
+            print(f'중복 이미지 건너뛰기 - {path}')
+            return None, path, CrawlState.STATUS_DUPLICATE
+        if status == ImageStore.STATUS_LINKED:
+            print(f'이미 저장된 이미지 연결 - {digest[:12]} -> {path}')
+        return True, path, None
+
+    def download_images(self, keyword, links, site_name, max_count=0, executor=None):
+        """
+        이미지 URL 목록에서 이미지를 다운로드합니다.
+        links는 리스트뿐 아니라 LinkStream 같은 이터러블도 받으며, max_count에 도달하면
+        links.close()를 호출하여 링크 수집을 중단시킵니다.
+        최대 n_download_threads개의 요청을 동시에 처리합니다.
+        URL별 결과는 CrawlState에 기록되며, 이전 실행에서 이미 받은 URL은 다시 받지 않습니다.
+        executor가 주어지면 여러 작업이 공유하는 다운로드 풀에 요청을 넣습니다. (종료는 호출한 쪽에서 합니다)
+        """
+        keyword_dir = self.make_dir('{}/{}'.format(self.download_path, keyword.replace('"', '')))
+        success_count = 0
+        fail_count = 0
+        filtered_count = 0
+        resumed_count = 0
+
+        if max_count == 0 and hasattr(links, '__len__'):
+            max_count = len(links)
+
+        state = get_crawl_state(self.state_path)
+        known = state.load_urls(keyword, site_name)
+        next_index = state.next_index(keyword, site_name)
+
+        stop_event = threading.Event()
+        timing = TaskTiming()
+        pending = {}
+
+        def collect_results(futures):
+            nonlocal success_count, fail_count, filtered_count
+            for future in futures:
+                index, link = pending.pop(future)
+                result, path, error = future.result()
+                if result is None:
+                    if error == CrawlState.STATUS_DUPLICATE:
+                        state.record(keyword, site_name, link, index, CrawlState.STATUS_DUPLICATE, path=path)
+                    elif error == CrawlState.STATUS_FILTERED:
+                        filtered_count += 1
+                        state.record(keyword, site_name, link, index, CrawlState.STATUS_FILTERED)
+                    continue
+                if result and max_count and success_count >= max_count and not isinstance(path, ShardMember):
+                    # 목표 개수를 이미 채운 뒤에 끝난 다운로드는 버립니다.
+                    # (샤드는 이어 쓰기만 하므로 이미 쓴 이미지는 그대로 기록합니다)
+                    os.remove(path)
+                elif result:
                     success_count += 1
-                    del response
-
-                    # 이미지 유효성 검사
-                    ext2 = self.validate_image(path)
-                    if ext2 is None:
-                        print('읽을 수 없는 파일 - {}'.format(link))
-                        os.remove(path)
-                        success_count -= 1
-                        fail_count += 1
-                    else:
-                        if ext != ext2:
-                            path2 = no_ext_path + '.' + ext2
-                            os.rename(path, path2)
-                            print('확장자 변경 {} -> {}'.format(ext, ext2))
+                    size = path.size if isinstance(path, ShardMember) else os.path.getsize(path)
+                    state.record(keyword, site_name, link, index, CrawlState.STATUS_DONE, path=path, size=size)
                 else:
                     fail_count += 1
+                    state.record(keyword, site_name, link, index, CrawlState.STATUS_FAILED, error=error)
 
-            except KeyboardInterrupt:
-                print("사용자에 의한 중단")
-                break
+            if max_count and success_count >= max_count:
+                stop_event.set()
+            if self.lease_lost():
+                # 다른 워커가 다시 처리하는 작업이므로 진행 중인 다운로드도 중단합니다.
+                stop_event.set()
 
-            except (ReadTimeoutError, ConnectTimeoutError, requests.exceptions.ReadTimeout,
-                    requests.exceptions.ConnectTimeout) as e:
-                print(f'다운로드 타임아웃 - {e}')
-                fail_count += 1
-                continue
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=self.n_download_threads)
+        try:
+            for link in links:
+                if stop_event.is_set():
+                    break
+
+                row = known.get(state.url_key(link))
+                if row is not None:
+                    index, status, path = row
+                    # 이전 실행에서 이미 받은 URL은 건너뛰고 성공으로 셉니다.
+                    if status == CrawlState.STATUS_DONE and path and self.stored_exists(path):
+                        success_count += 1
+                        resumed_count += 1
+                        if max_count and success_count >= max_count:
+                            stop_event.set()
+                        continue
+                    if status in (CrawlState.STATUS_DUPLICATE, CrawlState.STATUS_FILTERED):
+                        continue
+                else:
+                    index = next_index
+                    next_index += 1
 
-            except Exception as e:
-                print(f'다운로드 실패 - {e}')
-                fail_count += 1
-                continue
+                future = executor.submit(self.download_image, keyword, index, link, site_name, stop_event, timing)
+                pending[future] = (index, link)
+
+                # 동시 요청 수가 가득 차면 하나 이상 끝날 때까지 기다립니다.
+                while len(pending) >= self.n_download_threads:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect_results(done)
+
+            while pending and not stop_event.is_set():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect_results(done)
 
-        print(f'{site_name}에서 {keyword} 다운로드 완료: 성공 {success_count}, 실패 {fail_count}')
+        except KeyboardInterrupt:
+            print("사용자에 의한 중단")
+
+        finally:
+            # 진행 중인 다운로드는 stop_event를 보고 중단하고, 받던 파일을 지웁니다.
+            stop_event.set()
+            if own_executor:
+                executor.shutdown(wait=True)
+            elif pending:
+                wait(pending)
+            collect_results(list(pending))
+
+            # 목표 개수에 도달했으면 더 이상 스크롤하지 않도록 수집을 중단합니다.
+            if hasattr(links, 'close'):
+                links.close()
+
+        if resumed_count > 0:
+            print(f'{site_name}에서 {keyword}: 이전 실행에서 받은 이미지 {resumed_count}개 건너뜀')
+        print(f'{site_name}에서 {keyword} 다운로드 완료: 성공 {success_count}, 실패 {fail_count}'
+              + (f', 크기 필터 {filtered_count}' if filtered_count else ''))
+        print(f'{site_name}에서 {keyword} 다운로드 시간: {timing.summary()}')
         return success_count
 
+    def collect_options(self):
+        """CollectLinks 생성 시 전달할 옵션을 반환합니다."""
+        return {
+            'driver_path': self.driver_path,
+            'diagnostics': self.diagnostics,
+            'scroll_quiet': self.scroll_quiet,
+            'capture': self.capture,
+            'search_urls': self.search_urls,
+        }
+
     def download_from_site(self, keyword, site_code):
-        """특정 사이트에서 키워드에 대한 이미지를 다운로드합니다."""
+        """
+        특정 사이트에서 키워드에 대한 이미지를 다운로드합니다.
+        mode가 'collect'이면 다운로드 대신 링크 목록 파일만 기록합니다.
+        :return: collect 모드에서 링크 목록 파일을 끝까지 기록했으면 기록한 링크 수, 아니면 None
+        """
         site_name = Sites.get_text(site_code)
         add_url = Sites.get_face_url(site_code) if self.face else ""
 
+        if self.naver_backend == 'http' and site_code in (Sites.NAVER, Sites.NAVER_FULL):
+            generator = self.naver_http_links(keyword, site_code, add_url)
+            if generator is None and not self.naver_fallback:
+                generator = iter([])
+            if generator is not None:
+                try:
+                    print(f'링크 수집 중... {keyword} from {site_name} (HTTP)')
+                    return self.handle_links(keyword, site_name, generator)
+                except KeyboardInterrupt:
+                    print("사용자에 의한 중단")
+                except Exception as e:
+                    print(f'예외 발생 {site_name}:{keyword} - {e}')
+                    traceback.print_exc()
+                return
+            print(f'네이버 HTTP 수집 실패, Selenium으로 수집합니다 - {keyword}')
+
+        # Selenium은 브라우저가 필요한 경우에만 import 합니다. (download 모드, 네이버 HTTP 수집에서는 필요 없음)
+        from collect_links import CollectLinks
+        from browser_pool import get_browser_pool
+
+        pool = get_browser_pool() if self.reuse_browser else None
+
         try:
-            proxy = None
-            if self.proxy_list:
-                proxy = random.choice(self.proxy_list)
-                print(f"선택된 프록시: {proxy}")
+            with span('browser_acquire', 'browser', keyword=keyword, site=site_name):
+                if pool is not None:
+                    collect = pool.acquire(no_gui=self.no_gui, proxy_list=self.proxy_list, **self.collect_options())
+                else:
+                    proxy = None
+                    if self.proxy_list:
+                        proxy = random.choice(self.proxy_list)
+                        print(f"선택된 프록시: {proxy}")
 
-            collect = CollectLinks(no_gui=self.no_gui, proxy=proxy)  # 크롬 드라이버 초기화
+                    collect = CollectLinks(no_gui=self.no_gui, proxy=proxy, **self.collect_options())  # 크롬 드라이버 초기화
 
             # 브라우저 초기화 실패 시 종료
             if collect.browser is None:
                 print(f'ChromeDriver 초기화 실패 - {site_name}:{keyword}')
+                if pool is not None:
+                    pool.release(collect)
                 return
 
         except Exception as e:
@@ -347,31 +886,25 @@ class AutoCrawler:
             print(f'링크 수집 중... {keyword} from {site_name}')
 
             if site_code == Sites.GOOGLE:
-                links = collect.google(keyword, add_url)
+                generator = collect.iter_google(keyword, add_url)
 
             elif site_code == Sites.NAVER:
-                links = collect.naver(keyword, add_url)
+                generator = collect.iter_naver(keyword, add_url)
 
             elif site_code == Sites.GOOGLE_FULL:
-                links = collect.google_full(keyword, add_url, self.limit)
+                if self.full_source == 'page':
+                    generator = collect.iter_google_page_data(keyword, add_url, self.limit)
+                else:
+                    generator = collect.iter_google_full(keyword, add_url, self.limit)
 
             elif site_code == Sites.NAVER_FULL:
-                links = collect.naver_full(keyword, add_url)
+                generator = collect.iter_naver_full(keyword, add_url)
 
             else:
                 print('유효하지 않은 사이트 코드')
-                links = []
-
-            print(f'수집된 링크에서 이미지 다운로드 중... {keyword} from {site_name}')
-            success_count = self.download_images(keyword, links, site_name, max_count=self.limit)
+                generator = iter([])
 
-            # 다운로드 성공 시 완료 표시 파일 생성
-            if success_count > 0:
-                keyword_dir = os.path.join(self.download_path, keyword.replace('"', ''))
-                Path(f'{keyword_dir}/{site_name}_done').touch()
-                print(f'완료 {site_name} : {keyword}')
-            else:
-                print(f'다운로드 실패 {site_name} : {keyword} - 이미지 없음')
+            return self.handle_links(keyword, site_name, generator)
 
         except KeyboardInterrupt:
             print("사용자에 의한 중단")
@@ -382,35 +915,291 @@ class AutoCrawler:
             traceback.print_exc()
             return
 
+        finally:
+            if pool is not None:
+                pool.release(collect)
+
+    def handle_links(self, keyword, site_name, generator):
+        """
+        수집되는 링크를 실행 모드에 맞게 처리합니다.
+        collect: 링크 목록 파일에 기록, 분리 실행: 다운로드 풀로 전달, 그 외: 수집되는 즉시 다운로드
+        :return: collect 모드에서 collect_to_file()의 결과
+        """
+        if get_metrics().enabled:
+            generator = self.measure_links(generator, site_name)
+
+        if self.lease is not None:
+            # 임대를 잃은 작업은 다른 워커가 다시 처리하므로 더 수집하지 않습니다.
+            generator = self.until_lease_lost(generator)
+
+        if self.mode == 'collect':
+            return self.collect_to_file(keyword, site_name, generator)
+
+        if self.staged():
+            # 다운로드는 메인 프로세스의 다운로드 풀이 맡습니다.
+            sent = send_batches(generator, self.link_queue, self.stop_flags, keyword, site_name)
+            print(f'링크 수집 완료 {site_name} : {keyword} - {sent}개 전달')
+            return
+
+        # 링크가 수집되는 즉시 다운로드를 시작합니다.
+        print(f'수집되는 링크에서 이미지 다운로드 중... {keyword} from {site_name}')
+        links = LinkStream(generator)
+        try:
+            success_count = self.download_images(keyword, links, site_name, max_count=self.limit)
+        finally:
+            # 수집 스레드가 끝나야 브라우저를 다음 작업에 넘길 수 있습니다.
+            links.close()
+        self.finish_task(keyword, site_name, success_count)
+
+    def naver_http_links(self, keyword, site_code, add_url):
+        """
+        브라우저 없이 네이버 JSON 응답으로 링크를 수집하는 생성기를 반환합니다. (naver_backend='http')
+        첫 페이지를 미리 요청하여, 요청이 실패하거나 결과가 없으면 None을 반환합니다.
+        """
+        collector = NaverHttpCollector(get_session(self.http_pool_size),
+                                       api_url=(self.search_urls or {}).get('naver_api'))
+        links = collector.iter_links(keyword, add_url, full=site_code == Sites.NAVER_FULL)
+        try:
+            first = next(links)
+        except StopIteration:
+            print(f'네이버 HTTP 수집 결과 없음 - {keyword}')
+            return None
+        except Exception as e:
+            print(f'네이버 HTTP 수집 실패 - {keyword}: {e}')
+            return None
+        return itertools.chain([first], links)
+
+    def until_lease_lost(self, generator):
+        """작업의 임대를 잃을 때까지 링크를 그대로 전달합니다. (--task-queue)"""
+        lease = self.lease
+        try:
+            for link in generator:
+                if lease.lost:
+                    print(f'작업 임대를 잃어 수집을 중단합니다 (task {lease.task_id})')
+                    return
+                yield link
+        finally:
+            if hasattr(generator, 'close'):
+                generator.close()
+
+    def lease_lost(self):
+        """공유 작업 큐에서 처리 중인 작업의 임대를 잃었으면 True"""
+        return self.lease is not None and self.lease.lost
+
+    @staticmethod
+    def measure_links(generator, site_name):
+        """수집되는 링크 수와 수집에 걸린 시간을 지표에 기록하며 링크를 그대로 전달합니다."""
+        metrics = get_metrics()
+        started = time.time()
+        try:
+            for link in generator:
+                metrics.inc('autocrawler_links_found_total', site=site_name)
+                yield link
+        finally:
+            if hasattr(generator, 'close'):
+                generator.close()
+            metrics.observe('autocrawler_collect_seconds', time.time() - started, site=site_name)
+
+    def download_task_links(self, keyword, site_name, links, executor):
+        """브라우저 워커가 보낸 링크를 공유 다운로드 풀로 다운로드합니다. (분리 실행, 메인 프로세스)"""
+        print(f'수집되는 링크에서 이미지 다운로드 중... {keyword} from {site_name}')
+        with span('download_task', 'task', keyword=keyword, site=site_name):
+            success_count = self.download_images(keyword, links, site_name, max_count=self.limit, executor=executor)
+        self.finish_task(keyword, site_name, success_count)
+
+    def run_staged(self, tasks, metrics_queue=None):
+        """
+        브라우저 워커 풀은 링크만 수집하여 크기가 제한된 큐로 보내고,
+        메인 프로세스의 다운로드 풀이 모든 작업의 링크를 함께 다운로드합니다.
+        """
+        manager = Manager()
+        self.link_queue = manager.Queue(maxsize=self.link_queue_size)
+        self.stop_flags = manager.dict()
+
+        executor = ThreadPoolExecutor(max_workers=self.n_io_threads)
+        dispatcher = LinkDispatcher(lambda keyword, site_name, links:
+                                    self.download_task_links(keyword, site_name, links, executor),
+                                    self.stop_flags, max_batches=self.link_queue_size)
+
+        pool = Pool(self.n_threads, initializer=self.init_worker, initargs=(metrics_queue,))
+        try:
+            result = pool.map_async(self.download, tasks)
+            dispatcher.run(self.link_queue, result)
+        except KeyboardInterrupt:
+            print("\n키보드 인터럽트 감지됨. 작업 중단...")
+            dispatcher.close_all()
+            pool.terminate()
+            pool.join()
+        else:
+            # 워커가 정상 종료되어야 재사용 중인 브라우저도 함께 종료됩니다.
+            pool.close()
+            pool.join()
+        finally:
+            executor.shutdown(wait=True)
+            close_shard_writers()
+            self.link_queue = None
+            self.stop_flags = None
+            manager.shutdown()
+
+    def collect_to_file(self, keyword, site_name, generator):
+        """
+        수집되는 링크를 JSONL 링크 목록 파일에 기록합니다. (collect 모드)
+        :return: 기록한 링크 수. 수집이 중단되어 파일을 완성하지 못했으면 None
+        """
+        writer = LinkFileWriter(self.links_path, keyword, site_name)
+        complete = False
+        try:
+            for link in generator:
+                if getattr(link, 'width', None):
+                    writer.write(link, width=link.width, height=link.height)
+                else:
+                    writer.write(link)
+            complete = not self.lease_lost()
+        finally:
+            if hasattr(generator, 'close'):
+                generator.close()
+            writer.close(complete=complete)
+
+        if not complete:
+            print(f'링크 목록 저장 중단 {site_name} : {keyword} - {writer.count}개 -> {writer.part_path}')
+            return None
+        print(f'링크 목록 저장 완료 {site_name} : {keyword} - {writer.count}개 -> {writer.path}')
+        return writer.count
+
+    def download_from_file(self, keyword, site_name, path):
+        """JSONL 링크 목록 파일의 이미지를 다운로드합니다. (download 모드, Selenium 불필요)"""
+        try:
+            print(f'링크 목록에서 이미지 다운로드 중... {keyword} from {site_name} ({path})')
+            success_count = self.download_images(keyword, iter_link_urls(path), site_name, max_count=self.limit)
+            self.finish_task(keyword, site_name, success_count)
+
+        except KeyboardInterrupt:
+            print("사용자에 의한 중단")
+
+        except Exception as e:
+            print(f'예외 발생 {site_name}:{keyword} - {e}')
+            traceback.print_exc()
+
+    def finish_task(self, keyword, site_name, success_count):
+        """다운로드가 끝난 작업의 결과를 크롤링 상태 저장소에 기록합니다."""
+        if self.output == 'tar' and self.shard_by == 'keyword':
+            # 작업(키워드, 사이트)의 샤드는 작업이 끝나면 닫습니다. (global 샤드만 실행 내내 열어 둡니다)
+            close_shard_writer('{}/{}'.format(self.download_path.replace('"', ''), keyword.replace('"', '')), site_name)
+
+        state = get_crawl_state(self.state_path)
+        if success_count > 0:
+            state.mark_task(keyword, site_name, CrawlState.STATUS_DONE, success_count)
+            get_metrics().inc('autocrawler_tasks_total', site=site_name, result='done')
+            print(f'완료 {site_name} : {keyword}')
+        else:
+            state.mark_task(keyword, site_name, CrawlState.STATUS_FAILED)
+            get_metrics().inc('autocrawler_tasks_total', site=site_name, result='failed')
+            print(f'다운로드 실패 {site_name} : {keyword} - 이미지 없음')
+
     def download(self, args):
-        """멀티프로세싱을 위한 다운로드 래퍼 함수"""
-        self.download_from_site(keyword=args[0], site_code=args[1])
+        """멀티프로세싱을 위한 다운로드 래퍼 함수. :return: download_from_site()의 결과 (download 모드에서는 None)"""
+        if self.mode == 'download':
+            with span('task', 'task', keyword=args[0], site=args[1]):
+                self.download_from_file(keyword=args[0], site_name=args[1], path=args[2])
+        else:
+            with span('task', 'task', keyword=args[0], site=Sites.get_text(args[1])):
+                return self.download_from_site(keyword=args[0], site_code=args[1])
 
-    def init_worker(self):
-        """워커 초기화 함수 - Ctrl+C 처리"""
+    def queue_worker(self, index):
+        """
+        공유 작업 큐에서 작업을 하나씩 임대하여 처리하고 결과를 보고합니다. (--task-queue)
+        대기 중인 작업이 없어도 다른 워커가 임대한 작업이 남아 있으면, 임대가 만료되어 돌아올 수 있으므로 기다립니다.
+        """
+        queue = get_task_queue(self.task_queue)
+        state = get_crawl_state(self.state_path)
+        worker = worker_id()
+        processed = 0
+
+        while True:
+            task = queue.claim(worker, self.lease_seconds)
+            if task is None:
+                if not queue.counts().get(TaskQueue.STATUS_LEASED):
+                    break
+                time.sleep(min(QUEUE_POLL_SECONDS, self.lease_seconds / 2))
+                continue
+
+            task_id, keyword, site_code = task
+            site_name = Sites.get_text(site_code)
+            started = time.time()
+            with Heartbeat(queue, task_id, worker, self.lease_seconds) as lease:
+                self.lease = lease
+                try:
+                    collected = self.download([keyword, site_code])
+                finally:
+                    self.lease = None
+
+            if lease.lost:
+                # 임대가 만료되어 다른 워커가 다시 가져간 작업의 결과는 보고하지 않습니다.
+                print(f'임대를 잃은 작업의 결과를 보고하지 않습니다 - {site_name}:{keyword}')
+                continue
+
+            if self.mode == 'collect':
+                success = collected is not None
+                count = collected or 0
+            else:
+                status, count = state.task_result(keyword, site_name, since=started)
+                success = status == CrawlState.STATUS_DONE
+            if not queue.complete(task_id, worker, success, count, None if success else 'no images'):
+                print(f'임대가 만료되어 결과가 반영되지 않았습니다 - {site_name}:{keyword}')
+                continue
+            processed += 1
+
+        print(f'작업 큐 워커 {worker} 종료 - {processed}개 작업 처리')
+        return processed
+
+    def init_worker(self, metrics_queue=None):
+        """워커 초기화 함수 - Ctrl+C 처리, 지표 큐 연결"""
         signal.signal(signal.SIGINT, signal.SIG_IGN)
+        if metrics_queue is not None:
+            get_metrics().connect(metrics_queue)
+        if self.profile:
+            name = 'download worker' if self.mode == 'download' else 'browser worker'
+            get_profiler().start(parts_directory(self.profile), name)
 
-    def do_crawling(self):
-        """크롤링을 실행합니다."""
+    def plan_site_tasks(self, include_done=False):
+        """
+        keywords.txt의 키워드로 (키워드, 사이트 코드) 작업 목록을 만듭니다. (all, collect 모드)
+        :param include_done: 완료된 작업도 포함합니다. (--task-queue와 --skip false)
+        """
         keywords = self.get_keywords()
 
         if not keywords:
             print("키워드가 없습니다. keywords.txt 파일을 확인하세요.")
-            return
+            return []
 
         tasks = []
 
+        # 완료된 작업은 크롤링 상태 저장소에서 한 번에 읽어옵니다.
+        state = get_crawl_state(self.state_path)
+        done_tasks = state.done_tasks()
+
         for keyword in keywords:
             # 경로에 공백이나 특수문자가 있으면 따옴표로 처리
             sanitized_keyword = keyword.replace('"', '')
             dir_name = '{}/{}'.format(self.download_path, sanitized_keyword)
 
-            # 완료 파일 확인
-            google_done_path = os.path.join(os.getcwd(), dir_name, 'google_done')
-            naver_done_path = os.path.join(os.getcwd(), dir_name, 'naver_done')
+            for site_name in ['google', 'naver']:
+                # 이전 버전이 남긴 완료 파일(google_done, naver_done)은 상태 저장소로 옮깁니다.
+                if (keyword, site_name) not in done_tasks and \
+                        os.path.exists(os.path.join(dir_name, '{}_done'.format(site_name))):
+                    state.mark_task(keyword, site_name, CrawlState.STATUS_DONE)
+                    done_tasks.add((keyword, site_name))
+
+            if self.mode == 'collect':
+                # collect 모드에서는 링크 목록 파일이 이미 있는 작업을 완료된 것으로 봅니다.
+                google_done = os.path.exists(link_file_path(self.links_path, keyword, 'google'))
+                naver_done = os.path.exists(link_file_path(self.links_path, keyword, 'naver'))
+            else:
+                google_done = (keyword, 'google') in done_tasks
+                naver_done = (keyword, 'naver') in done_tasks
 
-            google_done = os.path.exists(google_done_path)
-            naver_done = os.path.exists(naver_done_path)
+            if include_done:
+                google_done = naver_done = False
 
             if google_done and naver_done and self.skip:
                 print(f'이미 완료된 작업 건너뛰기: {dir_name}')
@@ -428,37 +1217,204 @@ class AutoCrawler:
                 else:
                     tasks.append([keyword, Sites.NAVER])
 
+        return tasks
+
+    def plan_download_tasks(self):
+        """링크 목록 파일로 (키워드, 사이트, 파일 경로) 작업 목록을 만듭니다. (download 모드)"""
+        state = get_crawl_state(self.state_path)
+        done_tasks = state.done_tasks()
+        tasks = []
+
+        for keyword, site_name, path in find_link_files(self.links_path):
+            if site_name == 'google' and not self.do_google:
+                continue
+            if site_name == 'naver' and not self.do_naver:
+                continue
+            if (keyword, site_name) in done_tasks and self.skip:
+                print(f'이미 완료된 작업 건너뛰기: {keyword} ({site_name})')
+                continue
+            tasks.append([keyword, site_name, path])
+
         if not tasks:
+            print(f"{self.links_path}에 다운로드할 링크 목록이 없습니다.")
+        return tasks
+
+    def do_crawling(self):
+        """크롤링을 실행합니다."""
+        if self.mode == 'download':
+            tasks = self.plan_download_tasks()
+        else:
+            # 공유 작업 큐에서는 --skip false일 때 큐에서 완료된 작업도 다시 대기 상태로 되돌립니다.
+            tasks = self.plan_site_tasks(include_done=bool(self.task_queue) and not self.skip)
+
+        if self.task_queue:
+            # 여러 머신이 같은 키워드를 추가해도 (키워드, 사이트) 작업은 한 번만 들어갑니다.
+            queue = get_task_queue(self.task_queue)
+            added = queue.add([(keyword, site_code) for keyword, site_code in tasks], reset_done=not self.skip)
+            print(f"공유 작업 큐에 {added}개 작업 추가 (큐 상태: {queue.counts()})")
+        elif not tasks:
             print("모든 키워드가 이미 처리되었습니다.")
             return
+        else:
+            print(f"총 {len(tasks)}개 작업 대기 중")
+
+        if self.mode != 'download':
+            from collect_links import resolve_chromedriver
 
-        print(f"총 {len(tasks)}개 작업 대기 중")
+            # ChromeDriver는 실행당 한 번만 찾습니다. 결과는 Chrome 버전별로 디스크에 캐시됩니다.
+            self.driver_path = resolve_chromedriver()
+            print(f"ChromeDriver 경로: {self.driver_path}")
+
+        # 워커 프로세스의 지표는 큐로 모아 메인 프로세스에서 제공합니다. (Pool 인자로만 전달할 수 있습니다)
+        metrics_queue = None
+        metrics_server = None
+        if self.metrics_enabled():
+            metrics_queue = multiprocessing.Queue()
+            metrics_server = MetricsServer(metrics_queue, self.metrics_port)
+            get_metrics().connect(metrics_queue)
+
+        if self.profile:
+            # 이전 실행이 남긴 구간이 이번 트레이스에 섞이지 않도록 파트 디렉토리를 비우고 시작합니다.
+            clear_parts(self.profile)
+            get_profiler().start(parts_directory(self.profile), 'main')
 
         try:
-            pool = Pool(self.n_threads, initializer=self.init_worker)
-            pool.map(self.download, tasks)
-        except KeyboardInterrupt:
-            print("\n키보드 인터럽트 감지됨. 작업 중단...")
-            pool.terminate()
-            pool.join()
-        else:
-            pool.terminate()
-            pool.join()
+            if self.staged():
+                self.run_staged(tasks, metrics_queue)
+            else:
+                pool = Pool(self.n_threads, initializer=self.init_worker, initargs=(metrics_queue,))
+                try:
+                    if self.task_queue:
+                        pool.map(self.queue_worker, range(self.n_threads))
+                    else:
+                        pool.map(self.download, tasks)
+                except KeyboardInterrupt:
+                    print("\n키보드 인터럽트 감지됨. 작업 중단...")
+                    pool.terminate()
+                    pool.join()
+                else:
+                    # 워커가 정상 종료되어야 재사용 중인 브라우저도 함께 종료됩니다.
+                    pool.close()
+                    pool.join()
+        finally:
+            if metrics_server is not None:
+                get_metrics().close()
+                metrics_server.close(self.metrics_summary)
+            if self.profile:
+                get_profiler().close()
+                count = merge_trace(self.profile)
+                print(f'프로파일 저장: {self.profile} (구간 {count}개, Perfetto 또는 chrome://tracing 에서 열 수 있습니다)')
         print('작업 종료. 풀 종료.')
+        if self.task_queue:
+            print(f'공유 작업 큐 상태: {get_task_queue(self.task_queue).counts()}')
 
-        self.imbalance_check()
+        if self.mode != 'collect':
+            self.imbalance_check()
 
         print('프로그램 종료')
 
+    @staticmethod
+    def count_image_name(counts, keyword, name, size):
+        """파일 이름(google_0001.jpg 등)이 이미지이면 (키워드, 사이트) 집계에 더합니다."""
+        base = os.path.basename(name)
+        site = base.split('_')[0]
+        if site not in ('google', 'naver') or base.rsplit('.', 1)[-1] not in IMAGE_EXTENSIONS:
+            return
+        entry = counts.setdefault((keyword, site), [0, 0])
+        entry[0] += 1
+        entry[1] += size
+
+    def count_shard(self, counts, path, keyword=None):
+        """tar 샤드의 이미지를 집계에 더합니다. keyword가 None이면 멤버 경로(<keyword>/...)에서 읽습니다."""
+        try:
+            with tarfile.open(path) as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    member_keyword = keyword if keyword is not None else member.name.split('/')[0]
+                    self.count_image_name(counts, member_keyword, member.name, member.size)
+        except (tarfile.TarError, OSError) as e:
+            # 쓰는 중에 멈춘 샤드는 읽을 수 있는 데까지만 셉니다.
+            print(f'샤드 읽기 오류 - {path}: {e}')
+
+    def scan_counts(self):
+        """
+        다운로드 디렉토리를 모두 훑어 (키워드, 사이트)별 이미지 수와 바이트 수를 셉니다. (--rescan)
+        :return: [(keyword, site, images, bytes)] 목록
+        """
+        counts = {}
+
+        for dir in self.all_dirs(self.download_path):
+            keyword = os.path.basename(dir)
+            for file_path in self.all_files(dir):
+                if file_path.endswith('.tar'):
+                    self.count_shard(counts, file_path, keyword)
+                else:
+                    self.count_image_name(counts, keyword, file_path, os.path.getsize(file_path))
+
+        # --shard-by global 샤드는 다운로드 디렉토리 바로 아래에 있습니다.
+        if os.path.isdir(self.download_path):
+            for file in sorted(os.listdir(self.download_path)):
+                if file.endswith('.tar'):
+                    self.count_shard(counts, os.path.join(self.download_path, file))
+
+        return [(keyword, site, images, n_bytes) for (keyword, site), (images, n_bytes) in sorted(counts.items())]
+
+    def rescan(self):
+        """다운로드 디렉토리를 다시 훑어 키워드별 이미지 수 기록(manifest)을 새로 만듭니다."""
+        print('다운로드 디렉토리를 다시 훑는 중...')
+        rows = self.scan_counts()
+        get_crawl_state(self.state_path).replace_counts(rows)
+        print(f'키워드별 이미지 수 기록 갱신 완료: {len(rows)}개 (키워드, 사이트)')
+
+    def keyword_counts(self):
+        """
+        키워드별 이미지 수와 바이트 수를 크롤링 상태 저장소에서 읽습니다.
+        기록이 없는데 다운로드 디렉토리가 있으면(이전 버전의 다운로드) 한 번 훑어서 만듭니다.
+        :return: {keyword: {site: (images, bytes)}}
+        """
+        state = get_crawl_state(self.state_path)
+        rows = state.counts()
+        if not rows and self.all_dirs(self.download_path):
+            self.rescan()
+            rows = state.counts()
+
+        counts = {}
+        for keyword, site, images, n_bytes in rows:
+            counts.setdefault(keyword, {})[site] = (images, n_bytes)
+        return counts
+
+    def print_stats(self):
+        """키워드, 사이트별 이미지 수와 크기를 출력합니다. (--stats)"""
+        counts = self.keyword_counts()
+        if not counts:
+            print('다운로드된 이미지가 없습니다.')
+            return
+
+        total_images = 0
+        total_bytes = 0
+        print(f'{"키워드":<30} {"사이트":<8} {"이미지 수":>10} {"크기(MB)":>10}')
+        for keyword, sites in counts.items():
+            for site, (images, n_bytes) in sorted(sites.items()):
+                print(f'{keyword:<30} {site:<8} {images:>10} {n_bytes / (1024 * 1024):>10.1f}')
+                total_images += images
+                total_bytes += n_bytes
+        print(f'{"합계":<30} {"":<8} {total_images:>10} {total_bytes / (1024 * 1024):>10.1f}')
+
     def imbalance_check(self):
-        """데이터 불균형 여부를 확인합니다."""
+        """
+        데이터 불균형 여부를 확인합니다.
+        파일 수는 다운로드하면서 갱신한 키워드별 이미지 수 기록에서 읽으므로 다운로드 디렉토리를 훑지 않습니다.
+        """
         print('데이터 불균형 확인 중...')
 
         dict_num_files = {}
+        dir_keywords = {}
 
-        for dir in self.all_dirs(self.download_path):
-            n_files = len(self.all_files(dir))
-            dict_num_files[dir] = n_files
+        for keyword, sites in self.keyword_counts().items():
+            dir = os.path.join(self.download_path, keyword.replace('"', ''))
+            dict_num_files[dir] = sum(images for images, n_bytes in sites.values())
+            dir_keywords[dir] = keyword
 
         if not dict_num_files:
             print("다운로드된 디렉토리가 없습니다.")
@@ -490,9 +1446,13 @@ class AutoCrawler:
             if answer.lower() == 'y':
                 # 파일 수가 적은 디렉토리 삭제
                 print("파일 수가 적은 디렉토리를 삭제합니다...")
+                state = get_crawl_state(self.state_path)
                 for dir, n_files in dict_too_small.items():
                     try:
-                        shutil.rmtree(dir)
+                        if os.path.isdir(dir):
+                            shutil.rmtree(dir)
+                        # 기록도 지워야 다음 실행에서 이 키워드를 다시 받습니다.
+                        state.forget_keyword(dir_keywords[dir])
                         print(f'삭제됨: {dir}')
                     except Exception as e:
                         print(f"디렉토리 삭제 중 오류 발생: {e}")
@@ -506,11 +1466,19 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--skip', type=str, default='true',
                         help='이미 다운로드된 키워드를 건너뜁니다. 재다운로드 시 필요합니다.')
-    parser.add_argument('--threads', type=int, default=4, help='다운로드할 스레드 수.')
+    parser.add_argument('--threads', type=int, default=4, help='브라우저 워커 프로세스 수. (워커마다 크롬 하나)')
     parser.add_argument('--google', type=str, default='true', help='Google.com에서 다운로드 (boolean)')
     parser.add_argument('--naver', type=str, default='true', help='Naver.com에서 다운로드 (boolean)')
     parser.add_argument('--full', type=str, default='false',
-                        help='썸네일 대신 전체 해상도 이미지 다운로드 (느림)')
+                        help='썸네일 대신 전체 해상도 이미지 다운로드')
+    parser.add_argument('--full-source', type=str, default='page', choices=['page', 'viewer'],
+                        help='구글 전체 해상도 URL 수집 방식. page: 그리드를 한 번 스크롤한 뒤 페이지 데이터에서 원본 URL과 '
+                             '크기를 한 번에 읽습니다 (찾지 못하면 viewer로 대신함). viewer: 이미지를 하나씩 열어 수집 (느림)')
+    parser.add_argument('--naver-backend', type=str, default='selenium', choices=['selenium', 'http'],
+                        help='네이버 링크 수집 방식. selenium: 크롬으로 결과 페이지를 스크롤, '
+                             'http: 브라우저 없이 네이버 이미지 검색 JSON 응답을 페이지 단위로 요청')
+    parser.add_argument('--naver-fallback', type=str, default='true',
+                        help='--naver-backend http에서 첫 페이지 요청이 실패하거나 결과가 없으면 Selenium으로 수집합니다. (boolean)')
     parser.add_argument('--face', type=str, default='false', help='얼굴 검색 모드')
     parser.add_argument('--no_gui', type=str, default='auto',
                         help='GUI 없는 모드. 전체 해상도 모드에서 가속화됩니다. '
@@ -521,6 +1489,74 @@ if __name__ == '__main__':
     parser.add_argument('--proxy-list', type=str, default='',
                         help='쉼표로 구분된 프록시 목록: "socks://127.0.0.1:1080,http://127.0.0.1:1081". '
                              '각 스레드는 목록에서 하나를 무작위로 선택합니다.')
+    parser.add_argument('--download-threads', type=int, default=8,
+                        help='작업(키워드, 사이트)당 동시에 처리할 이미지 다운로드 요청 수.')
+    parser.add_argument('--pool-size', type=int, default=16,
+                        help='워커 프로세스의 HTTP 세션이 호스트당 유지할 keep-alive 연결 수.')
+    parser.add_argument('--reuse-browser', type=str, default='true',
+                        help='워커마다 크롬을 계속 실행해 두고 다음 작업에 재사용합니다. (boolean)')
+    parser.add_argument('--diagnostics', type=str, default='false',
+                        help='크롬 실행 시 ChromeDriver 파일, 서명, 버전 정보를 출력합니다. (boolean)')
+    parser.add_argument('--scroll-quiet', type=float, default=3.0,
+                        help='결과 그리드가 이 시간(초) 동안 늘어나지 않으면 스크롤을 멈춥니다.')
+    parser.add_argument('--dedup', type=str, default='false',
+                        help='같은 이미지를 download/.store에 한 번만 저장하고 키워드 디렉토리에는 하드링크를 만듭니다. '
+                             '(boolean)')
+    parser.add_argument('--collect-only', action='store_true',
+                        help='이미지를 다운로드하지 않고 링크 목록만 --links-path에 JSONL 파일로 저장합니다.')
+    parser.add_argument('--download-only', action='store_true',
+                        help='--links-path의 링크 목록 파일에서 이미지만 다운로드합니다. 크롬/Selenium이 필요 없습니다.')
+    parser.add_argument('--links-path', type=str, default='links',
+                        help='키워드/사이트별 링크 목록(JSONL) 디렉토리.')
+    parser.add_argument('--capture', type=str, default='false',
+                        help='브라우저가 페이지를 그리면서 이미 받은 이미지를 DevTools로 가져와 다시 다운로드하지 않습니다. '
+                             '(boolean)')
+    parser.add_argument('--io-threads', type=int, default=32,
+                        help='모든 작업이 함께 사용하는 다운로드 스레드 수. 브라우저 워커는 링크 수집만 합니다. '
+                             '(0: 이전처럼 각 브라우저 워커에서 다운로드)')
+    parser.add_argument('--link-queue', type=int, default=64,
+                        help='브라우저 워커와 다운로드 풀 사이에 쌓아둘 수 있는 최대 링크 배치 수.')
+    parser.add_argument('--host-limit', type=int, default=16,
+                        help='이미지 호스트당 최대 동시 요청 수. 실제 수는 응답 시간, 429/503, 타임아웃, Retry-After에 맞춰 '
+                             '자동으로 조절됩니다. (0: 제한 없음)')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='타임아웃, 연결 오류, 429/5xx 응답을 지터를 준 지수 백오프 후 다시 시도하는 횟수.')
+    parser.add_argument('--hedge', type=str, default='false',
+                        help='응답이 지금까지의 p95보다 늦으면 같은 요청을 한 번 더 보내고 먼저 온 응답을 사용합니다. '
+                             '(boolean)')
+    parser.add_argument('--min-bytes', type=int, default=0,
+                        help='Content-Length가 이보다 작은 이미지는 받지 않습니다. (0: 제한 없음)')
+    parser.add_argument('--max-bytes', type=int, default=0,
+                        help='Content-Length가 이보다 큰 이미지는 받지 않습니다. (0: 제한 없음)')
+    parser.add_argument('--min-dim', type=int, default=0,
+                        help='가로나 세로가 이보다 작은 이미지는 헤더만 읽고 연결을 끊습니다. (0: 제한 없음)')
+    parser.add_argument('--max-dim', type=int, default=0,
+                        help='가로나 세로가 이보다 큰 이미지는 헤더만 읽고 연결을 끊습니다. (0: 제한 없음)')
+    parser.add_argument('--output', type=str, default='files', choices=['files', 'tar'],
+                        help='저장 방식. files: 이미지마다 파일 하나 (기본값), '
+                             'tar: 이미지와 JSON 메타데이터를 tar 샤드에 순서대로 이어 씁니다. (WebDataset 형식)')
+    parser.add_argument('--shard-size', type=int, default=1024,
+                        help='tar 샤드 하나의 최대 크기(MB). 넘으면 다음 샤드를 만듭니다.')
+    parser.add_argument('--shard-by', type=str, default='keyword', choices=['keyword', 'global'],
+                        help='keyword: 키워드 디렉토리마다 샤드, global: 다운로드 디렉토리에 모든 키워드를 함께 저장.')
+    parser.add_argument('--task-queue', type=str, default='',
+                        help='여러 머신이 작업을 나누어 처리할 공유 작업 큐. 모든 머신에서 접근할 수 있는 SQLite 파일 경로 '
+                             '(또는 sqlite:///경로). 각 머신은 keywords.txt의 작업을 큐에 추가한 뒤 큐가 빌 때까지 작업을 임대하여 처리합니다.')
+    parser.add_argument('--lease', type=int, default=300,
+                        help='작업 임대 시간(초). 이 시간 동안 연장되지 않은 작업은 다른 워커가 다시 처리합니다.')
+    parser.add_argument('--stats', action='store_true',
+                        help='키워드, 사이트별 이미지 수와 크기를 출력하고 종료합니다. (크롤링하지 않음)')
+    parser.add_argument('--rescan', action='store_true',
+                        help='시작하기 전에 다운로드 디렉토리를 다시 훑어 키워드별 이미지 수 기록을 새로 만듭니다.')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='크롤링 중 처리량과 단계별 지연 시간 지표를 http://127.0.0.1:<port>/metrics 로 '
+                             '제공합니다. (Prometheus 형식, 0: 사용 안 함)')
+    parser.add_argument('--metrics-summary', type=str, default='',
+                        help='크롤링이 끝나면 지표 요약을 JSON 파일로 저장합니다. '
+                             '(--metrics-port를 쓰면 기본값 <download>/metrics_summary.json)')
+    parser.add_argument('--profile', type=str, default='',
+                        help='워커, 작업별로 크롤링 단계(브라우저 시작, 스크롤, 링크 추출, 요청, 검사, 저장) 실행 구간을 '
+                             '기록하여 Chrome trace JSON 파일로 저장합니다. (Perfetto, chrome://tracing)')
     args = parser.parse_args()
 
     _skip = False if str(args.skip).lower() == 'false' else True
@@ -531,6 +1567,49 @@ if __name__ == '__main__':
     _face = False if str(args.face).lower() == 'false' else True
     _limit = int(args.limit)
     _proxy_list = args.proxy_list.split(',')
+    _download_threads = int(args.download_threads)
+    _pool_size = int(args.pool_size)
+    _reuse_browser = False if str(args.reuse_browser).lower() == 'false' else True
+    _diagnostics = False if str(args.diagnostics).lower() == 'false' else True
+    _scroll_quiet = float(args.scroll_quiet)
+    _dedup = False if str(args.dedup).lower() == 'false' else True
+    _links_path = args.links_path
+    _capture = False if str(args.capture).lower() == 'false' else True
+    _io_threads = int(args.io_threads)
+    _link_queue = int(args.link_queue)
+    _host_limit = int(args.host_limit)
+    _retries = int(args.retries)
+    _hedge = False if str(args.hedge).lower() == 'false' else True
+    _min_bytes = int(args.min_bytes)
+    _max_bytes = int(args.max_bytes)
+    _min_dim = int(args.min_dim)
+    _max_dim = int(args.max_dim)
+    _output = args.output
+    _shard_size = int(args.shard_size)
+    _shard_by = args.shard_by
+    _metrics_port = int(args.metrics_port)
+    _metrics_summary = args.metrics_summary
+    _profile = args.profile
+    _full_source = args.full_source
+    _naver_backend = args.naver_backend
+    _naver_fallback = False if str(args.naver_fallback).lower() == 'false' else True
+    _task_queue = args.task_queue
+    _lease = int(args.lease)
+
+    if _output == 'tar' and _dedup:
+        parser.error('--dedup은 --output files에서만 사용할 수 있습니다.')
+
+    if _task_queue and args.download_only:
+        parser.error('--task-queue는 --download-only와 함께 사용할 수 없습니다. (링크 목록 파일은 머신마다 따로 있습니다)')
+
+    if args.collect_only and args.download_only:
+        parser.error('--collect-only와 --download-only는 함께 사용할 수 없습니다.')
+    elif args.collect_only:
+        _mode = 'collect'
+    elif args.download_only:
+        _mode = 'download'
+    else:
+        _mode = 'all'
 
     no_gui_input = str(args.no_gui).lower()
     if no_gui_input == 'auto':
@@ -541,10 +1620,34 @@ if __name__ == '__main__':
         _no_gui = False
 
     print(
-        'Options - skip:{}, threads:{}, google:{}, naver:{}, full_resolution:{}, face:{}, no_gui:{}, limit:{}, proxy_list:{}'
-        .format(_skip, _threads, _google, _naver, _full, _face, _no_gui, _limit, _proxy_list))
+        'Options - skip:{}, threads:{}, google:{}, naver:{}, full_resolution:{}, face:{}, no_gui:{}, limit:{}, proxy_list:{}, '
+        'download_threads:{}, pool_size:{}, reuse_browser:{}, diagnostics:{}, scroll_quiet:{}, dedup:{}, '
+        'mode:{}, links_path:{}, capture:{}, io_threads:{}, link_queue:{}, host_limit:{}, retries:{}, hedge:{}, '
+        'min_bytes:{}, max_bytes:{}, min_dim:{}, max_dim:{}, output:{}, shard_size:{}, shard_by:{}, '
+        'metrics_port:{}, metrics_summary:{}, profile:{}, full_source:{}, '
+        'naver_backend:{}, naver_fallback:{}, task_queue:{}, lease:{}'
+        .format(_skip, _threads, _google, _naver, _full, _face, _no_gui, _limit, _proxy_list, _download_threads,
+                _pool_size, _reuse_browser, _diagnostics, _scroll_quiet, _dedup, _mode, _links_path, _capture,
+                _io_threads, _link_queue, _host_limit, _retries, _hedge, _min_bytes, _max_bytes, _min_dim,
+                _max_dim, _output, _shard_size, _shard_by, _metrics_port, _metrics_summary, _profile, _full_source,
+                _naver_backend, _naver_fallback, _task_queue, _lease))
 
     crawler = AutoCrawler(skip_already_exist=_skip, n_threads=_threads,
                           do_google=_google, do_naver=_naver, full_resolution=_full,
-                          face=_face, no_gui=_no_gui, limit=_limit, proxy_list=_proxy_list)
-    crawler.do_crawling()
\ No newline at end of file
+                          face=_face, no_gui=_no_gui, limit=_limit, proxy_list=_proxy_list,
+                          n_download_threads=_download_threads, http_pool_size=_pool_size,
+                          reuse_browser=_reuse_browser, diagnostics=_diagnostics, scroll_quiet=_scroll_quiet,
+                          dedup=_dedup, mode=_mode, links_path=_links_path, capture=_capture,
+                          n_io_threads=_io_threads, link_queue_size=_link_queue,
+                          host_limit=_host_limit, retries=_retries, hedge=_hedge,
+                          min_bytes=_min_bytes, max_bytes=_max_bytes, min_dim=_min_dim, max_dim=_max_dim,
+                          output=_output, shard_size=_shard_size, shard_by=_shard_by,
+                          metrics_port=_metrics_port, metrics_summary=_metrics_summary, profile=_profile,
+                          full_source=_full_source, naver_backend=_naver_backend, naver_fallback=_naver_fallback,
+                          task_queue=_task_queue, lease_seconds=_lease)
+    if args.rescan:
+        crawler.rescan()
+    if args.stats:
+        crawler.print_stats()
+    else:
+        crawler.do_crawling()
\ No newline at end of file
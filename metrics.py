@@ -0,0 +1,327 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 크롤링 지표(카운터, 히스토그램, 게이지)를 모아 부모 프로세스에서 Prometheus 형식으로 제공합니다.
+#
+# 각 프로세스의 MetricsRecorder는 변경분을 모아 FLUSH_INTERVAL마다 multiprocessing 큐로 보내고,
+# 부모 프로세스의 MetricsServer가 이를 합쳐 http://127.0.0.1:<port>/metrics 로 제공합니다.
+# 큐가 연결되지 않은 프로세스에서는 기록 함수가 아무것도 하지 않습니다.
+
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import util
+
+FLUSH_INTERVAL = 1.0
+
+# 히스토그램 구간 (초)
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRecorder:
+    """프로세스 안에서 지표 변경분을 모아 부모 프로세스로 보냅니다."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sink = None
+        self._reset()
+
+    def _reset(self):
+        self.counters = {}
+        self.histograms = {}  # key -> [구간별 개수..., 합계, 개수]
+        self.gauge_deltas = {}
+        self.gauge_values = {}
+
+    @property
+    def enabled(self):
+        return self.sink is not None
+
+    def connect(self, sink):
+        """
+        :param sink: 변경분을 보낼 multiprocessing 큐
+        """
+        self.sink = sink
+        thread = threading.Thread(target=self._flush_loop, daemon=True)
+        thread.start()
+        # 워커 프로세스가 정상 종료될 때 남은 변경분을 보냅니다.
+        util.Finalize(self, self.flush, exitpriority=5)
+
+    def inc(self, name, value=1, **labels):
+        """카운터를 value만큼 늘립니다."""
+        if self.sink is None:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """히스토그램에 값 하나를 기록합니다."""
+        if self.sink is None:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = [0] * (len(BUCKETS) + 2)
+                self.histograms[key] = hist
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += seconds
+            hist[-1] += 1
+
+    def add_gauge(self, name, value, **labels):
+        """게이지를 value만큼 더합니다. (여러 프로세스의 값이 합쳐집니다)"""
+        if self.sink is None:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            self.gauge_deltas[key] = self.gauge_deltas.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """게이지 값을 설정합니다."""
+        if self.sink is None:
+            return
+        with self.lock:
+            self.gauge_values[_key(name, labels)] = value
+
+    def flush(self):
+        if self.sink is None:
+            return
+        with self.lock:
+            delta = (self.counters, self.histograms, self.gauge_deltas, self.gauge_values)
+            self._reset()
+        if any(delta):
+            try:
+                self.sink.put(delta)
+            except Exception as e:
+                print(f'지표 전송 실패 - {e}')
+
+    def close(self):
+        """남은 변경분을 보내고 연결을 끊습니다."""
+        self.flush()
+        self.sink = None
+
+    def _flush_loop(self):
+        while self.sink is not None:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+
+class _Timer:
+    def __init__(self, recorder, name, labels):
+        self.recorder = recorder
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.observe(self.name, time.time() - self.started, **self.labels)
+        return False
+
+
+def timer(name, **labels):
+    """with 블록의 실행 시간을 히스토그램에 기록합니다."""
+    return _Timer(get_metrics(), name, labels)
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    escaped = ['{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for k, v in items]
+    return '{' + ','.join(escaped) + '}'
+
+
+class MetricsServer:
+    """
+    워커가 보낸 지표 변경분을 합치고, Prometheus 텍스트 형식으로 제공합니다. 부모 프로세스에서 실행됩니다.
+    """
+
+    def __init__(self, sink, port=0):
+        """
+        :param sink: 워커와 공유하는 multiprocessing 큐
+        :param port: /metrics를 제공할 포트. 0이면 HTTP 서버를 실행하지 않습니다.
+        """
+        self.sink = sink
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.started = time.time()
+        self.stop_event = threading.Event()
+
+        self.thread = threading.Thread(target=self._collect, daemon=True)
+        self.thread.start()
+
+        self.httpd = None
+        if port:
+            server = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    body = server.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+            threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+            print(f'지표 제공 중: http://127.0.0.1:{port}/metrics')
+
+    def merge(self, delta):
+        counters, histograms, gauge_deltas, gauge_values = delta
+        with self.lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, hist in histograms.items():
+                total = self.histograms.get(key)
+                if total is None:
+                    self.histograms[key] = list(hist)
+                else:
+                    for i, value in enumerate(hist):
+                        total[i] += value
+            for key, value in gauge_deltas.items():
+                self.gauges[key] = self.gauges.get(key, 0) + value
+            self.gauges.update(gauge_values)
+
+    def _drain(self, timeout):
+        try:
+            delta = self.sink.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        self.merge(delta)
+        return True
+
+    def _collect(self):
+        while not self.stop_event.is_set():
+            self._drain(0.5)
+
+    def render(self):
+        """Prometheus 텍스트 형식 문자열을 반환합니다."""
+        lines = []
+        with self.lock:
+            for kind, values in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, labels in values}):
+                    lines.append(f'# TYPE {name} {kind}')
+                    for (key_name, labels), value in sorted(values.items()):
+                        if key_name == name:
+                            lines.append(f'{name}{_format_labels(labels)} {value}')
+
+            for name in sorted({name for name, labels in self.histograms}):
+                lines.append(f'# TYPE {name} histogram')
+                for (key_name, labels), hist in sorted(self.histograms.items()):
+                    if key_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, hist):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {hist[-1]}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {hist[-2]}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {hist[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _quantile(hist, q):
+        # 구간 상한으로 근사한 분위수. 마지막 구간을 넘으면 Prometheus le 라벨과 같은 "+Inf" (JSON에는 Infinity가 없습니다)
+        target = hist[-1] * q
+        cumulative = 0
+        for bound, count in zip(BUCKETS, hist):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return '+Inf'
+
+    def summary(self):
+        """지표 요약을 dict로 반환합니다."""
+        def label_text(labels):
+            return ','.join(f'{k}={v}' for k, v in labels)
+
+        with self.lock:
+            result = {'elapsed_seconds': round(time.time() - self.started, 3),
+                      'counters': {}, 'gauges': {}, 'histograms': {}}
+            for (name, labels), value in sorted(self.counters.items()):
+                result['counters'].setdefault(name, {})[label_text(labels)] = value
+            for (name, labels), value in sorted(self.gauges.items()):
+                result['gauges'].setdefault(name, {})[label_text(labels)] = value
+            for (name, labels), hist in sorted(self.histograms.items()):
+                result['histograms'].setdefault(name, {})[label_text(labels)] = {
+                    'count': hist[-1],
+                    'sum': round(hist[-2], 3),
+                    'mean': round(hist[-2] / hist[-1], 3) if hist[-1] else None,
+                    'p50_le': self._quantile(hist, 0.5),
+                    'p99_le': self._quantile(hist, 0.99),
+                }
+        return result
+
+    def close(self, summary_path=None):
+        """남은 변경분을 모두 합치고 HTTP 서버를 종료합니다. summary_path가 있으면 JSON 요약을 씁니다."""
+        self.stop_event.set()
+        self.thread.join()
+        while self._drain(0.2):
+            pass
+
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+        if summary_path:
+            directory = os.path.dirname(summary_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(self.summary(), f, ensure_ascii=False, indent=2, allow_nan=False)
+            print(f'지표 요약 저장: {summary_path}')
+
+
+_recorder = None
+_recorder_pid = None
+_recorder_lock = threading.Lock()
+
+
+def get_metrics():
+    """현재 프로세스의 MetricsRecorder를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _recorder, _recorder_pid
+
+    if _recorder is not None and _recorder_pid == os.getpid():
+        return _recorder
+
+    with _recorder_lock:
+        if _recorder is None or _recorder_pid != os.getpid():
+            _recorder = MetricsRecorder()
+            _recorder_pid = os.getpid()
+        return _recorder
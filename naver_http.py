@@ -0,0 +1,186 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 브라우저 없이 네이버 이미지 검색의 페이지별 JSON 응답으로 링크를 수집합니다. (--naver-backend http)
+# 결과 페이지가 스크롤할 때 불러가는 것과 같은 요청이므로 CollectLinks.naver/naver_full과 같은 링크를 얻습니다.
+#   썸네일 모드: 항목의 thumb, 전체 해상도 모드: 항목의 originalUrl (가로, 세로: orgWidth, orgHeight)
+#
+# 응답 파싱은 문자열만 다루므로 저장해 둔 응답으로 확인할 수 있습니다:
+#
+#   python3 naver_http.py recorded_page.json [--full]
+
+import json
+import sys
+import time
+from urllib.parse import parse_qsl, urlencode
+from google_page_data import decode_js_string
+from link_files import ImageLink
+from trace_profile import span
+
+NAVER_IMAGE_API = 'https://s.search.naver.com/p/c/image/search.naver'
+
+# 한 번에 요청하는 결과 수와 최대 페이지 수
+PAGE_SIZE = 50
+MAX_PAGES = 40
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/120.0.0.0 Safari/537.36')
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def load_payload(text):
+    """
+    응답 본문을 JSON으로 읽습니다. JSONP(callback({...}))로 감싸여 있으면 벗겨 냅니다.
+    :raise ValueError: JSON이 아닌 경우 (차단 페이지 등)
+    """
+    text = text.strip()
+    if not text.startswith('{'):
+        start, end = text.find('{'), text.rfind('}')
+        if start < 0 or end < start:
+            raise ValueError('JSON 응답이 아닙니다')
+        text = text[start:end + 1]
+    return json.loads(text)
+
+
+def parse_naver_items(payload):
+    """
+    페이지 응답의 결과 항목을 읽습니다.
+    :param payload: 응답 본문 문자열 또는 load_payload() 결과
+    :return: [{'thumb', 'original', 'width', 'height'}] 목록. URL이 없는 항목은 건너뜁니다.
+    """
+    if isinstance(payload, str):
+        payload = load_payload(payload)
+
+    results = []
+    for item in payload.get('items') or []:
+        if not isinstance(item, dict):
+            continue
+        thumb = item.get('thumb')
+        original = item.get('originalUrl')
+        if not thumb and not original:
+            continue
+        results.append({
+            'thumb': decode_js_string(thumb) if thumb else None,
+            'original': decode_js_string(original) if original else None,
+            'width': _to_int(item.get('orgWidth')),
+            'height': _to_int(item.get('orgHeight')),
+        })
+    return results
+
+
+def item_link(item, full):
+    """결과 항목 하나를 링크로 바꿉니다. 전체 해상도 모드에서는 크기를 가진 ImageLink를 반환합니다."""
+    if not full:
+        return item['thumb']
+    if not item['original']:
+        return None
+    if item['width'] and item['height']:
+        return ImageLink(item['original'], item['width'], item['height'], item['thumb'])
+    return item['original']
+
+
+class NaverHttpCollector:
+    """네이버 이미지 검색 JSON 응답을 페이지 단위로 요청하여 링크를 수집합니다."""
+
+    def __init__(self, session, api_url=None, page_size=PAGE_SIZE, max_pages=MAX_PAGES, timeout=10):
+        """
+        :param session: requests.Session (워커 프로세스의 공유 세션)
+        :param api_url: 페이지 요청 URL. None이면 NAVER_IMAGE_API
+        """
+        self.session = session
+        self.api_url = api_url or NAVER_IMAGE_API
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.timeout = timeout
+
+    def fetch_page(self, keyword, start, add_url=''):
+        """
+        start번째 결과부터 한 페이지를 요청합니다.
+        :return: parse_naver_items() 결과
+        :raise requests.RequestException, ValueError: 요청 실패 또는 JSON이 아닌 응답
+        """
+        params = {'where': 'image', 'section': 'image', 'query': keyword, 'start': start,
+                  'display': self.page_size, 'json_type': 6}
+        # 검색 옵션(예: &face=1)은 결과 페이지와 같은 이름의 파라미터로 보냅니다.
+        params.update(parse_qsl(add_url.lstrip('&?')))
+        headers = {'User-Agent': USER_AGENT,
+                   'Referer': 'https://search.naver.com/search.naver?' + urlencode({'where': 'image',
+                                                                                   'query': keyword})}
+        with span('naver_page', 'collect', keyword=keyword, start=start):
+            response = self.session.get(self.api_url, params=params, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return parse_naver_items(response.text)
+
+    def iter_pages(self, keyword, add_url='', full=False, limit=0):
+        """
+        페이지마다 새 링크 목록을 yield 합니다. 결과가 없거나 새 링크가 없는 페이지에서 멈춥니다.
+        첫 페이지 요청이 실패하면 예외를 그대로 발생시킵니다. (호출하는 쪽에서 Selenium으로 대신할 수 있도록)
+        """
+        seen = set()
+        start = 1
+        for page in range(self.max_pages):
+            try:
+                items = self.fetch_page(keyword, start, add_url)
+            except Exception as e:
+                if page == 0:
+                    raise
+                print(f'네이버 페이지 요청 실패 (start={start}) - {e}')
+                return
+
+            links = []
+            for item in items:
+                link = item_link(item, full)
+                if link and link not in seen:
+                    seen.add(link)
+                    links.append(link)
+
+            if limit and len(seen) >= limit:
+                links = links[:len(links) - (len(seen) - limit)]
+            if links:
+                yield links
+            if not items or not links or (limit and len(seen) >= limit):
+                return
+
+            # 결과 위치로 넘깁니다. (URL이 없어 건너뛴 결과가 있어도 페이지가 겹치지 않도록)
+            start += self.page_size
+            time.sleep(0.1)
+
+    def iter_links(self, keyword, add_url='', full=False, limit=0):
+        """CollectLinks.iter_naver/iter_naver_full처럼 링크를 하나씩 yield 합니다."""
+        for links in self.iter_pages(keyword, add_url, full, limit):
+            yield from links
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--full']
+    if not args:
+        print('사용법: python3 naver_http.py <저장한 응답.json> [...] [--full]')
+        sys.exit(1)
+
+    full_mode = '--full' in sys.argv
+    for path in args:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            parsed = parse_naver_items(f.read())
+        found = [link for link in (item_link(item, full_mode) for item in parsed) if link]
+        print(f'{path}: 결과 {len(parsed)}개, 링크 {len(found)}개')
+        for link in found[:10]:
+            size = f'{link.width}x{link.height} ' if getattr(link, 'width', None) else ''
+            print(f'  {size}{link}')
@@ -0,0 +1,189 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 이미지를 낱개 파일 대신 순서대로 이어 쓰는 tar 샤드에 저장합니다. (WebDataset 형식)
+# 샤드마다 이미지 하나당 두 멤버가 들어갑니다: <key>.<ext> (이미지), <key>.json (메타데이터)
+# 샤드가 shard_size를 넘으면 닫고 다음 번호의 샤드를 새로 만듭니다.
+#
+# 샤드 파일은 배타적으로 생성(open 'xb')하므로 여러 프로세스가 같은 디렉토리에 써도 서로 다른 샤드를 사용합니다.
+
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+from multiprocessing import util
+
+SHARD_PREFIX = 'shard'
+SHARD_EXT = '.tar'
+
+# 크롤링 상태에 기록하는 샤드 멤버 경로의 구분자: <샤드 경로>::<멤버 이름>
+MEMBER_SEP = '::'
+
+
+class ShardMember(str):
+    """샤드 안에 저장된 이미지의 경로(<샤드 경로>::<멤버 이름>). 일반 파일 경로처럼 문자열로 쓸 수 있습니다."""
+
+    def __new__(cls, shard, name, size):
+        member = super().__new__(cls, shard + MEMBER_SEP + name)
+        member.shard = shard
+        member.name = name
+        member.size = size
+        return member
+
+
+def split_member_ref(path):
+    """
+    :return: (샤드 경로, 멤버 이름). 샤드 멤버 경로가 아니면 (path, None)
+    """
+    if MEMBER_SEP in path:
+        shard, name = path.rsplit(MEMBER_SEP, 1)
+        return shard, name
+    return path, None
+
+
+class ShardWriter:
+    """한 디렉토리의 tar 샤드에 이미지와 메타데이터를 순서대로 이어 씁니다."""
+
+    def __init__(self, directory, shard_size=1024 * 1024 * 1024, prefix=SHARD_PREFIX):
+        """
+        :param directory: 샤드를 만들 디렉토리
+        :param shard_size: 샤드 하나의 최대 크기(바이트). 넘으면 다음 샤드로 넘어갑니다.
+        :param prefix: 샤드 파일 이름 앞부분 (<prefix>-000000.tar)
+        """
+        self.directory = directory
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.next_number = 0
+        self.path = None
+        self.file = None
+        self.tar = None
+        self.closed = False
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self):
+        while True:
+            path = os.path.join(self.directory, '{}-{:06d}{}'.format(self.prefix, self.next_number, SHARD_EXT))
+            self.next_number += 1
+            try:
+                self.file = open(path, 'xb')
+            except FileExistsError:
+                continue
+            self.path = path
+            self.tar = tarfile.open(fileobj=self.file, mode='w', format=tarfile.PAX_FORMAT)
+            print(f'새 샤드 생성 - {path}')
+            return
+
+    def _close(self):
+        if self.tar is not None:
+            self.tar.close()
+            self.file.close()
+        self.tar = None
+        self.file = None
+        self.path = None
+
+    def _add(self, name, fileobj, size, mtime):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = mtime
+        self.tar.addfile(info, fileobj)
+
+    def write(self, key, ext, fileobj, size, meta):
+        """
+        이미지와 메타데이터를 현재 샤드에 추가합니다.
+        :param key: 샘플 이름 (예: cat/google_0001). 멤버 이름은 <key>.<ext>와 <key>.json
+        :param fileobj: 이미지 바이트를 읽을 수 있는 파일 객체 (처음부터 읽습니다)
+        :param size: 이미지 크기(바이트)
+        :param meta: JSON으로 저장할 메타데이터
+        :return: ShardMember. 이미 닫힌 ShardWriter이면 None (get_shard_writer로 새로 받아 다시 씁니다)
+        """
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        name = '{}.{}'.format(key, ext)
+
+        with self.lock:
+            if self.closed:
+                return None
+            if self.tar is None or self.file.tell() >= self.shard_size:
+                self._close()
+                self._open()
+
+            now = time.time()
+            fileobj.seek(0)
+            self._add(name, fileobj, size, now)
+            self._add(key + '.json', io.BytesIO(meta_bytes), len(meta_bytes), now)
+            # 중간에 프로세스가 죽어도 이미 쓴 샘플은 읽을 수 있도록 바로 내보냅니다.
+            self.file.flush()
+
+            return ShardMember(self.path, name, size)
+
+    def close(self):
+        with self.lock:
+            self._close()
+            self.closed = True
+
+
+_writers = {}
+_writers_pid = None
+_writers_lock = threading.Lock()
+
+
+def close_shard_writers():
+    """현재 프로세스의 모든 샤드를 닫습니다. (tar 끝 표시를 씁니다)"""
+    with _writers_lock:
+        if _writers_pid == os.getpid():
+            for writer in _writers.values():
+                writer.close()
+        _writers.clear()
+
+
+def close_shard_writer(directory, prefix=SHARD_PREFIX):
+    """
+    directory의 prefix 샤드를 닫고 캐시에서 뺍니다. 작업별 샤드는 작업이 끝날 때 닫아
+    열린 파일이 작업 수만큼 쌓이지 않게 하고, 마지막 샤드를 바로 완성합니다.
+    """
+    with _writers_lock:
+        writer = _writers.pop((directory, prefix), None) if _writers_pid == os.getpid() else None
+    if writer is not None:
+        writer.close()
+
+
+def write_sample(directory, shard_size, key, ext, fileobj, size, meta, prefix=SHARD_PREFIX):
+    """
+    directory의 prefix 샤드에 샘플을 씁니다. 다른 스레드가 그 사이에 샤드를 닫았으면 새 ShardWriter로 다시 씁니다.
+    :return: ShardMember
+    """
+    while True:
+        member = get_shard_writer(directory, shard_size, prefix).write(key, ext, fileobj, size, meta)
+        if member is not None:
+            return member
+
+
+def get_shard_writer(directory, shard_size, prefix=SHARD_PREFIX):
+    """현재 프로세스에서 (directory, prefix)에 해당하는 ShardWriter를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _writers, _writers_pid
+
+    with _writers_lock:
+        if _writers_pid != os.getpid():
+            _writers = {}
+            _writers_pid = os.getpid()
+            # 워커 프로세스가 정상 종료될 때 (pool.close(), pool.join()) 샤드를 닫습니다.
+            util.Finalize(None, close_shard_writers, exitpriority=10)
+        if (directory, prefix) not in _writers:
+            _writers[(directory, prefix)] = ShardWriter(directory, shard_size, prefix)
+        return _writers[(directory, prefix)]
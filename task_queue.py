@@ -0,0 +1,268 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 여러 머신의 main.py가 (키워드, 사이트) 작업을 나누어 처리하기 위한 공유 작업 큐입니다. (--task-queue)
+#
+# 작업은 임대(lease) 방식으로 가져갑니다. 가져간 워커는 작업하는 동안 주기적으로 임대를 연장(heartbeat)하고,
+# 워커나 머신이 멈춰 연장이 끊긴 작업은 임대가 만료되면 다시 대기 상태가 되어 다른 워커가 가져갑니다.
+#
+# 백엔드는 TaskQueue를 구현하여 BACKENDS에 등록합니다. 기본 구현은 공유 볼륨(NFS 등)에 두는 SQLite 파일입니다.
+#   --task-queue /mnt/shared/queue.sqlite3   또는   --task-queue sqlite:///mnt/shared/queue.sqlite3
+# 임대 만료는 각 머신의 시계로 판단하므로 머신 사이의 시계가 맞아 있어야 합니다. (NTP)
+
+import os
+import socket
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+
+
+class TaskQueue(ABC):
+    """공유 작업 큐 백엔드의 인터페이스. 빠진 메서드가 있는 백엔드는 생성할 때 TypeError가 납니다."""
+
+    STATUS_PENDING = 'pending'
+    STATUS_LEASED = 'leased'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    @abstractmethod
+    def add(self, tasks, reset_done=False):
+        """
+        작업을 추가합니다. 이미 있는 (키워드, 사이트) 작업은 그대로 둡니다.
+        :param tasks: [(keyword, site_code)] 목록
+        :param reset_done: 완료되거나 실패한 작업도 다시 대기 상태로 되돌립니다. (--skip false)
+        :return: 새로 추가되거나 되돌린 작업 수
+        """
+
+    @abstractmethod
+    def claim(self, worker, lease_seconds):
+        """
+        대기 중인 작업 하나를 임대합니다. 임대가 만료된 작업은 먼저 대기 상태로 되돌립니다.
+        :return: (task_id, keyword, site_code) 또는 대기 중인 작업이 없으면 None
+        """
+
+    @abstractmethod
+    def heartbeat(self, task_id, worker, lease_seconds):
+        """임대를 연장합니다. :return: 아직 이 워커의 임대이면 True"""
+
+    @abstractmethod
+    def complete(self, task_id, worker, success, result=0, error=None):
+        """
+        작업 결과를 보고합니다. 실패한 작업은 시도 횟수가 남아 있으면 다시 대기 상태가 됩니다.
+        :return: 아직 이 워커의 임대여서 결과가 반영되었으면 True
+        """
+
+    @abstractmethod
+    def counts(self):
+        """:return: {상태: 작업 수}"""
+
+    def close(self):
+        pass
+
+
+class SQLiteTaskQueue(TaskQueue):
+    """
+    SQLite 파일 하나로 된 작업 큐. 여러 머신에서 같은 파일을 열어 사용합니다.
+    네트워크 파일 시스템에서는 WAL 모드의 공유 메모리를 쓸 수 없으므로 기본 롤백 저널을 사용하고,
+    임대는 BEGIN IMMEDIATE 트랜잭션(파일 잠금) 안에서 가져갑니다.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        """
+        :param path: SQLite 파일 경로 (모든 머신에서 접근할 수 있는 공유 볼륨)
+        :param max_attempts: 실패하거나 임대가 만료된 작업을 다시 시도하는 최대 횟수
+        """
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self.local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self.connect()
+        conn.execute('CREATE TABLE IF NOT EXISTS queue ('
+                     'id INTEGER PRIMARY KEY, keyword TEXT, site INTEGER, status TEXT, worker TEXT, '
+                     'lease_until REAL, attempts INTEGER DEFAULT 0, result INTEGER, error TEXT, updated REAL, '
+                     'UNIQUE (keyword, site))')
+        conn.execute('CREATE INDEX IF NOT EXISTS queue_status ON queue (status, id)')
+
+    def connect(self):
+        """스레드마다 별도의 SQLite 연결을 사용합니다. (트랜잭션은 직접 시작합니다)"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self.local.conn = conn
+        return conn
+
+    def _write(self, fn):
+        """쓰기 잠금을 잡은 트랜잭션 안에서 fn(conn)을 실행합니다."""
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    def add(self, tasks, reset_done=False):
+        now = time.time()
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO queue (keyword, site, status, updated) VALUES (?, ?, ?, ?)',
+                             [(keyword, site, self.STATUS_PENDING, now) for keyword, site in tasks])
+            if reset_done:
+                # 처리 중인(임대된) 작업은 그대로 둡니다.
+                conn.executemany('UPDATE queue SET status = ?, worker = NULL, lease_until = NULL, attempts = 0, '
+                                 'result = NULL, error = NULL, updated = ? '
+                                 'WHERE keyword = ? AND site = ? AND status IN (?, ?)',
+                                 [(self.STATUS_PENDING, now, keyword, site, self.STATUS_DONE, self.STATUS_FAILED)
+                                  for keyword, site in tasks])
+            return conn.total_changes - before
+
+        return self._write(insert)
+
+    def claim(self, worker, lease_seconds):
+        now = time.time()
+
+        def lease(conn):
+            # 임대가 만료된 작업: 시도 횟수가 남아 있으면 다시 대기, 아니면 실패
+            conn.execute('UPDATE queue SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, worker = NULL, '
+                         "error = 'lease expired', updated = ? WHERE status = ? AND lease_until < ?",
+                         (self.max_attempts, self.STATUS_PENDING, self.STATUS_FAILED, now, self.STATUS_LEASED, now))
+            row = conn.execute('SELECT id, keyword, site FROM queue WHERE status = ? ORDER BY attempts, id LIMIT 1',
+                               (self.STATUS_PENDING,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE queue SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, '
+                         'updated = ? WHERE id = ?',
+                         (self.STATUS_LEASED, worker, now + lease_seconds, now, row[0]))
+            return row
+
+        return self._write(lease)
+
+    def heartbeat(self, task_id, worker, lease_seconds):
+        now = time.time()
+        return self._write(lambda conn: conn.execute(
+            'UPDATE queue SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = ?',
+            (now + lease_seconds, now, task_id, worker, self.STATUS_LEASED)).rowcount > 0)
+
+    def complete(self, task_id, worker, success, result=0, error=None):
+        now = time.time()
+        if success:
+            sql = 'UPDATE queue SET status = ?, result = ?, error = ?, lease_until = NULL, updated = ? '
+            args = (self.STATUS_DONE, result, error, now)
+        else:
+            sql = ('UPDATE queue SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, worker = NULL, '
+                   'result = ?, error = ?, lease_until = NULL, updated = ? ')
+            args = (self.max_attempts, self.STATUS_PENDING, self.STATUS_FAILED, result, error, now)
+
+        return self._write(lambda conn: conn.execute(
+            sql + 'WHERE id = ? AND worker = ? AND status = ?',
+            args + (task_id, worker, self.STATUS_LEASED)).rowcount > 0)
+
+    def counts(self):
+        rows = self.connect().execute('SELECT status, COUNT(*) FROM queue GROUP BY status').fetchall()
+        return dict(rows)
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+
+# 백엔드 이름(URL 스킴) -> TaskQueue 클래스. 스킴이 없는 경로는 sqlite입니다.
+BACKENDS = {
+    'sqlite': SQLiteTaskQueue,
+}
+
+
+def open_task_queue(url):
+    """
+    --task-queue 값으로 작업 큐를 엽니다.
+    :param url: '<backend>://<location>' (예: sqlite:///mnt/shared/queue.sqlite3) 또는 SQLite 파일 경로
+    """
+    scheme, sep, location = url.partition('://')
+    if not sep:
+        scheme, location = 'sqlite', url
+    if scheme not in BACKENDS:
+        raise ValueError(f'알 수 없는 작업 큐 백엔드: {scheme} (사용 가능: {", ".join(sorted(BACKENDS))})')
+    return BACKENDS[scheme](location)
+
+
+def worker_id():
+    """작업 큐에 기록하는 워커 이름 (호스트 이름:pid)"""
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+class Heartbeat:
+    """
+    with 블록이 실행되는 동안 백그라운드 스레드에서 작업의 임대를 주기적으로 연장합니다.
+    임대를 잃으면(만료되어 다른 워커가 가져간 경우) lost가 True가 됩니다.
+    """
+
+    def __init__(self, queue, task_id, worker, lease_seconds):
+        self.queue = queue
+        self.task_id = task_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+
+    def _run(self):
+        # 임대 기간 안에 두 번 이상 연장을 시도합니다.
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self.stopped.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.task_id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    print(f'작업 임대를 잃었습니다 (task {self.task_id}) - 다른 워커가 다시 처리할 수 있습니다.')
+                    return
+            except Exception as e:
+                print(f'작업 임대 연장 실패 (task {self.task_id}) - {e}')
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        return False
+
+
+_queues = {}
+_queues_pid = None
+_queues_lock = threading.Lock()
+
+
+def get_task_queue(url):
+    """현재 프로세스에서 url에 해당하는 작업 큐를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _queues, _queues_pid
+
+    with _queues_lock:
+        if _queues_pid != os.getpid():
+            _queues = {}
+            _queues_pid = os.getpid()
+        if url not in _queues:
+            _queues[url] = open_task_queue(url)
+        return _queues[url]
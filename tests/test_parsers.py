@@ -0,0 +1,132 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 검색 결과 예시로 브라우저 없이 링크 파서를 확인합니다.
+# fixtures/의 *_synthetic 파일은 실제 결과를 저장한 것이 아니라 결과 데이터의 형식에 맞춰 직접 만든 예시입니다.
+# 실제 결과를 저장해 확인하려면 파서 모듈을 직접 실행합니다. (python3 google_page_data.py page.html)
+#
+#   python3 -m unittest discover tests      (또는 python3 tests/test_parsers.py)
+
+import os
+import pickle
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from google_page_data import parse_google_images, ImageLink  # noqa: E402
+from naver_http import parse_naver_items, item_link, NaverHttpCollector  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class GooglePageDataTest(unittest.TestCase):
+    def setUp(self):
+        self.images = parse_google_images(read_fixture('google_result_page_synthetic.html'))
+
+    def test_original_urls_in_page_order(self):
+        # 썸네일(gstatic), 로고(google.com)는 빠지고 중복(cat=1.jpg)은 한 번만 나옵니다.
+        self.assertEqual(self.images, [
+            'https://upload.example.org/photos/cat=1.jpg',
+            'https://cdn.example.com/img/cat_2.png',
+            'https://images.example.net/cats/3.webp',
+        ])
+
+    def test_sizes(self):
+        self.assertEqual([(image.width, image.height) for image in self.images],
+                         [(1600, 1200), (768, 1024), (1200, 900)])
+
+    def test_thumbnails(self):
+        self.assertEqual([image.thumbnail for image in self.images], [
+            'https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcQ1&s',
+            'https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcQ2&s',
+            'https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcQ3',
+        ])
+
+    def test_pickle_keeps_size(self):
+        # 브라우저 워커에서 다운로드 프로세스로 보낼 때 크기가 함께 전달되어야 합니다.
+        image = pickle.loads(pickle.dumps(self.images[0]))
+        self.assertIsInstance(image, ImageLink)
+        self.assertEqual((image.width, image.height), (1600, 1200))
+
+
+class _RecordedResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _ReplaySession:
+    """start 파라미터별로 저장해 둔 응답을 돌려주는 requests.Session 대용"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(dict(params))
+        return _RecordedResponse(self.pages.get(params['start'], '{"items": []}'))
+
+
+class NaverHttpTest(unittest.TestCase):
+    def setUp(self):
+        self.text = read_fixture('naver_image_page_synthetic.json')
+        self.items = parse_naver_items(self.text)
+
+    def test_items(self):
+        # URL이 하나도 없는 결과는 빠지고, 원본 URL이 없는 결과는 썸네일만 남습니다.
+        self.assertEqual(len(self.items), 3)
+        self.assertEqual(self.items[1]['original'], 'https://img.example.kr/cat2.png')
+        self.assertEqual((self.items[2]['original'], self.items[2]['width']), (None, None))
+
+    def test_full_links(self):
+        links = [link for link in (item_link(item, True) for item in self.items) if link]
+        self.assertEqual(links, ['http://blogfiles.naver.net/cat1.jpg', 'https://img.example.kr/cat2.png'])
+        self.assertEqual([(link.width, link.height) for link in links], [(1600, 1200), (800, 600)])
+
+    def test_thumbnail_links(self):
+        links = [item_link(item, False) for item in self.items]
+        self.assertEqual(links, [
+            'https://search.pstatic.net/common/?src=http%3A%2F%2Fblogfiles.naver.net%2Fcat1.jpg&type=b400',
+            'https://search.pstatic.net/common/?src=https%3A%2F%2Fimg.example.kr%2Fcat2.png&type=b400',
+            'https://search.pstatic.net/common/?src=https%3A%2F%2Fimg.example.kr%2Fcat3.gif&type=b400',
+        ])
+
+    def test_jsonp(self):
+        self.assertEqual(parse_naver_items('callback(' + self.text + ');'), self.items)
+
+    def test_collector_pages_until_empty(self):
+        session = _ReplaySession({1: self.text})
+        collector = NaverHttpCollector(session)
+        links = list(collector.iter_links('고양이', add_url='&face=1', full=True))
+
+        self.assertEqual(links, ['http://blogfiles.naver.net/cat1.jpg', 'https://img.example.kr/cat2.png'])
+        # 페이지 크기만큼 넘겨서 다음 페이지를 요청하고, 빈 페이지에서 멈춥니다.
+        self.assertEqual([params['start'] for params in session.requests], [1, 51])
+        self.assertEqual(session.requests[0]['query'], '고양이')
+        self.assertEqual(session.requests[0]['face'], '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Copyright 2018 YoongiKim
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+# 크롤링 단계별 실행 구간(span)을 Chrome trace event 형식으로 기록합니다. (--profile)
+# 결과 JSON은 https://ui.perfetto.dev 또는 chrome://tracing 에서 열 수 있습니다.
+#
+# 각 프로세스는 구간을 <profile>.parts/<pid>.jsonl 에 이어 쓰고,
+# 크롤링이 끝나면 메인 프로세스가 merge_trace()로 하나의 파일로 합칩니다.
+# 프로세스마다 파일이 따로 있으므로 워커끼리 잠금 없이 기록할 수 있습니다.
+
+import json
+import os
+import shutil
+import threading
+import time
+from multiprocessing import util
+
+# 이 개수만큼 쌓이면 파일에 씁니다.
+FLUSH_EVENTS = 500
+
+
+def _now_us():
+    # 프로세스끼리 시간축을 맞추기 위해 벽시계 시간을 씁니다.
+    return time.time() * 1000000
+
+
+class TraceRecorder:
+    """현재 프로세스의 구간을 모아 파트 파일에 씁니다. start() 전에는 아무것도 기록하지 않습니다."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.file = None
+        self.pid = os.getpid()
+        self.thread_names = set()
+
+    @property
+    def enabled(self):
+        return self.file is not None
+
+    def start(self, directory, process_name):
+        """
+        :param directory: 파트 파일을 쓸 디렉토리
+        :param process_name: 트레이스 뷰어에 표시할 프로세스 이름
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.file = open(os.path.join(directory, '{}.jsonl'.format(self.pid)), 'a', encoding='utf-8')
+        self.events.append({'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0,
+                            'args': {'name': '{} ({})'.format(process_name, self.pid)}})
+        # 워커 프로세스가 정상 종료될 때 남은 구간을 씁니다.
+        util.Finalize(self, self.close, exitpriority=5)
+
+    def add(self, name, cat, start_us, end_us, args):
+        if self.file is None:
+            return
+        thread = threading.current_thread()
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': round(start_us, 1),
+                 'dur': round(end_us - start_us, 1), 'pid': self.pid, 'tid': thread.ident}
+        if args:
+            event['args'] = args
+
+        with self.lock:
+            if thread.ident not in self.thread_names:
+                self.thread_names.add(thread.ident)
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': thread.ident,
+                                    'args': {'name': thread.name}})
+            self.events.append(event)
+            if len(self.events) >= FLUSH_EVENTS:
+                self._flush()
+
+    def _flush(self):
+        if self.file is None or not self.events:
+            return
+        self.file.write(''.join(json.dumps(event, ensure_ascii=False) + '\n' for event in self.events))
+        self.file.flush()
+        self.events = []
+
+    def close(self):
+        """남은 구간을 쓰고 파트 파일을 닫습니다."""
+        with self.lock:
+            self._flush()
+            if self.file is not None:
+                self.file.close()
+            self.file = None
+
+
+class _Span:
+    def __init__(self, recorder, name, cat, args):
+        self.recorder = recorder
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.started = _now_us()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        args = self.args
+        if exc_type is not None:
+            args = dict(args, error=exc_type.__name__)
+        self.recorder.add(self.name, self.cat, self.started, _now_us(), args)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, cat='crawl', **args):
+    """
+    with 블록의 실행 구간을 기록합니다. 프로파일링을 하지 않으면 아무것도 하지 않습니다.
+    :param args: 트레이스 뷰어에서 구간을 선택하면 보이는 값 (keyword, site 등)
+    """
+    recorder = get_profiler()
+    if recorder.file is None:
+        return _NO_SPAN
+    return _Span(recorder, name, cat, args)
+
+
+def parts_directory(path):
+    """프로세스별 파트 파일을 모으는 디렉토리"""
+    return path + '.parts'
+
+
+def clear_parts(path):
+    """이전 실행이나 강제 종료된 실행이 남긴 파트 파일을 지웁니다. 메인 프로세스가 프로파일링을 시작할 때 호출합니다."""
+    shutil.rmtree(parts_directory(path), ignore_errors=True)
+
+
+def merge_trace(path):
+    """
+    파트 파일을 하나의 Chrome trace JSON으로 합치고 파트 디렉토리를 지웁니다.
+    :return: 합친 이벤트 수
+    """
+    directory = parts_directory(path)
+    events = []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # 강제 종료된 워커가 마지막 줄을 다 쓰지 못한 경우
+                        continue
+
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    return len(events)
+
+
+_recorder = None
+_recorder_pid = None
+_recorder_lock = threading.Lock()
+
+
+def get_profiler():
+    """현재 프로세스의 TraceRecorder를 반환합니다. 처음 호출될 때 생성됩니다."""
+    global _recorder, _recorder_pid
+
+    if _recorder is not None and _recorder_pid == os.getpid():
+        return _recorder
+
+    with _recorder_lock:
+        if _recorder is None or _recorder_pid != os.getpid():
+            _recorder = TraceRecorder()
+            _recorder_pid = os.getpid()
+        return _recorder